@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import User, GoldPrice, Transaction, Wallet
+from .models import User, GoldPrice, Transaction, Wallet, LimitOrder, ConditionalOrder, RecurringBuyPlan, UserTradingStats, GoldLot, LedgerAccount, LedgerEntry
 
 
 @admin.register(User)
@@ -36,3 +36,75 @@ class WalletAdmin(admin.ModelAdmin):
     list_display = ['user', 'balance', 'gold_holdings', 'created_at']
     search_fields = ['user__email']
     readonly_fields = ['created_at', 'updated_at']
+
+
+@admin.register(LimitOrder)
+class LimitOrderAdmin(admin.ModelAdmin):
+    """Admin configuration for LimitOrder model."""
+    list_display = ['user', 'side', 'amount', 'limit_price', 'status', 'filled_price', 'created_at']
+    list_filter = ['side', 'status', 'created_at']
+    search_fields = ['user__email']
+    ordering = ['-created_at']
+    readonly_fields = ['created_at', 'updated_at', 'filled_at']
+
+
+@admin.register(ConditionalOrder)
+class ConditionalOrderAdmin(admin.ModelAdmin):
+    """Admin configuration for ConditionalOrder model."""
+    list_display = ['user', 'side', 'amount', 'condition', 'trigger_price', 'status', 'executed_price', 'created_at']
+    list_filter = ['side', 'condition', 'status', 'created_at']
+    search_fields = ['user__email']
+    ordering = ['-created_at']
+    readonly_fields = ['created_at', 'updated_at', 'executed_at']
+
+
+@admin.register(RecurringBuyPlan)
+class RecurringBuyPlanAdmin(admin.ModelAdmin):
+    """Admin configuration for RecurringBuyPlan model."""
+    list_display = ['user', 'amount', 'frequency', 'next_run_at', 'is_active', 'last_run_status']
+    list_filter = ['frequency', 'is_active', 'last_run_status']
+    search_fields = ['user__email']
+    ordering = ['next_run_at']
+    readonly_fields = ['created_at', 'updated_at', 'last_run_at']
+
+
+@admin.register(UserTradingStats)
+class UserTradingStatsAdmin(admin.ModelAdmin):
+    """Admin configuration for UserTradingStats model."""
+    list_display = ['user', 'trade_count', 'volume', 'realized_pnl', 'last_trade_at']
+    search_fields = ['user__email']
+    ordering = ['-last_trade_at']
+    readonly_fields = [field.name for field in UserTradingStats._meta.fields]
+
+
+@admin.register(GoldLot)
+class GoldLotAdmin(admin.ModelAdmin):
+    """Admin configuration for GoldLot model."""
+    list_display = ['user', 'grams', 'remaining', 'price_per_gram', 'acquired_at']
+    search_fields = ['user__email']
+    ordering = ['-acquired_at']
+    readonly_fields = [field.name for field in GoldLot._meta.fields]
+
+
+@admin.register(LedgerAccount)
+class LedgerAccountAdmin(admin.ModelAdmin):
+    """Admin configuration for LedgerAccount model."""
+    list_display = ['code', 'user', 'asset', 'created_at']
+    list_filter = ['asset']
+    search_fields = ['code', 'user__email']
+    ordering = ['code']
+
+
+@admin.register(LedgerEntry)
+class LedgerEntryAdmin(admin.ModelAdmin):
+    """Admin configuration for LedgerEntry model (read-only)."""
+    list_display = ['id', 'account', 'amount', 'entry_type', 'reference', 'created_at']
+    list_filter = ['entry_type', 'account__asset']
+    search_fields = ['account__code', 'reference']
+    ordering = ['-id']
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,83 @@
+"""
+JWT authentication backed by the profile cache.
+
+simplejwt's ``JWTAuthentication`` loads the user row on every request.
+The high-traffic read endpoints (wallet balance, profile) only need fields
+that ``ProfileCacheService`` keeps, so they authenticate against the cache
+and skip the query on a hit. ``JWTAuthMiddleware`` does the same for
+WebSocket connections.
+"""
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .services import ProfileCacheService
+
+
+class CachedUserJWTAuthentication(JWTAuthentication):
+    """
+    ``JWTAuthentication`` that resolves the user from ``ProfileCacheService``.
+
+    ``request.user`` is a ``User`` with only the cached fields loaded, so
+    views using this must not save it. Deactivation is still honoured, but
+    CHECK_REVOKE_TOKEN is not supported since password hashes are not cached.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_('Token contained no recognizable user identification')) from e
+
+        user = ProfileCacheService.user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        return user
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """
+    Sets ``scope['user']`` from a simplejwt access token.
+
+    Browsers cannot send an Authorization header on a WebSocket, so the
+    token is read from the ``token`` query parameter or from the requested
+    subprotocols as ``bearer, <token>``. In the latter case the consumer
+    must accept with the ``bearer`` subprotocol, which is left in
+    ``scope['auth_subprotocol']``. Without a token the user set by the outer
+    middleware is kept; an invalid token leaves the socket anonymous.
+    """
+
+    SUBPROTOCOL = 'bearer'
+
+    async def __call__(self, scope, receive, send):
+        scope = dict(scope)
+        raw_token = self.get_raw_token(scope)
+        if raw_token is not None:
+            scope['user'] = await self.get_user(raw_token)
+        return await super().__call__(scope, receive, send)
+
+    def get_raw_token(self, scope):
+        token = parse_qs(scope.get('query_string', b'').decode()).get('token')
+        if token:
+            return token[0]
+        subprotocols = list(scope.get('subprotocols') or [])
+        if self.SUBPROTOCOL in subprotocols[:-1]:
+            scope['auth_subprotocol'] = self.SUBPROTOCOL
+            return subprotocols[subprotocols.index(self.SUBPROTOCOL) + 1]
+        return None
+
+    @database_sync_to_async
+    def get_user(self, raw_token):
+        try:
+            return CachedUserJWTAuthentication().get_user(AccessToken(raw_token))
+        except (TokenError, InvalidToken, AuthenticationFailed):
+            return AnonymousUser()
@@ -1,8 +1,13 @@
 import json
+from abc import ABC, abstractmethod
 from channels.generic.websocket import AsyncWebsocketConsumer
 
+from .fanout import FanoutConsumerMixin, hub
+from .portfolio import aload_totals, portfolio_book
+from .ticks import tick_buffer
 
-class BaseConsumer(AsyncWebsocketConsumer):
+
+class BaseConsumer(FanoutConsumerMixin, AsyncWebsocketConsumer):
     """
     Base WebSocket consumer for real-time features.
     """
@@ -11,38 +16,140 @@ class BaseConsumer(AsyncWebsocketConsumer):
         """Handle new WebSocket connection."""
         await self.accept()
 
+    async def accept(self, subprotocol=None, headers=None):
+        """Accept, echoing the subprotocol a JWT arrived in (see JWTAuthMiddleware)."""
+        await super().accept(subprotocol or self.scope.get('auth_subprotocol'), headers)
+
     async def disconnect(self, close_code):
         """Handle WebSocket disconnection."""
         pass
 
     async def receive(self, text_data):
         """Handle incoming WebSocket message."""
-        data = json.loads(text_data)
-        # Process the data
+        try:
+            data = json.loads(text_data)
+        except (TypeError, ValueError):
+            await self.send_error('Invalid JSON')
+            return
+        if not isinstance(data, dict):
+            await self.send_error('Message must be a JSON object')
+            return
+        await self.handle_message(data)
+
+    async def handle_message(self, data):
+        """Process a decoded client message. Subclasses override this."""
         await self.send(text_data=json.dumps({
             'status': 'received',
             'data': data
         }))
 
+    async def send_error(self, message):
+        """Send an error message to the client."""
+        await self.send(text_data=json.dumps({
+            'type': 'error',
+            'message': message
+        }))
+
+    def get_user_id(self):
+        """Return the authenticated user's id, or None for anonymous sockets."""
+        user = self.scope.get('user')
+        if user is not None and user.is_authenticated:
+            return user.id
+        return self.scope.get('user_id')
+
+
+class TickStreamMixin(ABC):
+    """
+    Sequence-aware delivery of price ticks.
+
+    Live ticks at or below the last sequence already sent are dropped, so a
+    replay racing with live delivery never produces duplicates. Live ticks
+    arriving during a replay are held back and sent in sequence order once
+    it finishes, so they cannot push the last sequence past ticks the
+    replay has still to send.
+    """
+
+    last_tick_seq = None
+    held_ticks = None
+
+    @abstractmethod
+    async def send_tick(self, tick):
+        """Deliver one tick to the client."""
+
+    async def deliver_tick(self, tick):
+        """Deliver a live tick, or hold it while a replay is running."""
+        if self.held_ticks is not None:
+            self.held_ticks.append(tick)
+            return
+        await self._send_in_order(tick)
 
-class GoldPriceConsumer(AsyncWebsocketConsumer):
+    async def _send_in_order(self, tick):
+        seq = tick.get('seq')
+        if seq is not None and self.last_tick_seq is not None and seq <= self.last_tick_seq:
+            return
+        if seq is not None:
+            self.last_tick_seq = seq
+        await self.send_tick(tick)
+
+    async def resume_ticks(self, last_seq):
+        """
+        Replay ticks after ``last_seq``, or send a snapshot of the latest
+        tick when the gap is larger than the ring buffer.
+        """
+        try:
+            last_seq = int(last_seq)
+        except (TypeError, ValueError):
+            await self.send_error('last_seq must be an integer')
+            return
+
+        self.held_ticks = []
+        try:
+            ticks = await tick_buffer.asince(last_seq)
+            if ticks is None:
+                latest = await tick_buffer.alatest()
+                if latest is not None:
+                    self.last_tick_seq = None
+                    await self._send_in_order(dict(latest, type='snapshot'))
+            else:
+                for tick in ticks:
+                    await self._send_in_order(tick)
+        finally:
+            held, self.held_ticks = self.held_ticks, None
+            for tick in sorted(held, key=lambda tick: tick.get('seq') or 0):
+                await self._send_in_order(tick)
+
+
+class GoldPriceConsumer(TickStreamMixin, BaseConsumer):
     """
     WebSocket consumer for real-time gold price updates.
+
+    A reconnecting client sends ``{"action": "resume", "last_seq": N}`` to
+    receive the ticks it missed.
     """
 
     async def connect(self):
         """Join the gold price updates group."""
         self.group_name = 'gold_price_updates'
-        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await hub.join(self.group_name, self)
         await self.accept()
 
     async def disconnect(self, close_code):
         """Leave the gold price updates group."""
-        await self.channel_layer.group_discard(self.group_name, self.channel_name)
+        await hub.leave(self.group_name, self)
+
+    async def handle_message(self, data):
+        """Handle resume requests."""
+        if data.get('action') != 'resume':
+            await self.send_error(f"Unknown action: {data.get('action')}")
+            return
+        await self.resume_ticks(data.get('last_seq'))
+
+    async def send_tick(self, tick):
+        await self.send(text_data=json.dumps(tick))
 
     async def gold_price_update(self, event):
         """Send gold price update to the client."""
-        await self.send(text_data=json.dumps(event.get('data', event)))
+        await self.deliver_tick(event.get('data', event))
 
 
 class PriceAlertConsumer(AsyncWebsocketConsumer):
@@ -71,3 +178,121 @@ class PriceAlertConsumer(AsyncWebsocketConsumer):
     async def send_alert_notification(self, event):
         """Send alert notification to the client."""
         await self.send(text_data=json.dumps(event.get('message', event)))
+
+
+class StreamConsumer(TickStreamMixin, BaseConsumer):
+    """
+    Multiplexed WebSocket consumer.
+
+    A single socket subscribes to any number of topics instead of opening one
+    connection per feature. Clients send::
+
+        {"action": "subscribe", "topic": "prices"}
+        {"action": "unsubscribe", "topic": "prices"}
+
+    and every pushed message is wrapped as ``{"topic": ..., "data": ...}``.
+    Subscribing to ``prices`` with ``"last_seq": N`` replays missed ticks.
+    """
+
+    # topic -> (group name template, requires an authenticated user)
+    TOPICS = {
+        'prices': ('gold_price_updates', False),
+        'alerts': ('user_{user_id}_alerts', True),
+        'wallet': ('user_{user_id}_wallet', True),
+        'portfolio': ('user_{user_id}_portfolio', True),
+    }
+
+    async def connect(self):
+        """Accept the connection; topics are joined on demand."""
+        self.subscriptions = {}
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        """Leave every group this socket joined."""
+        for topic in list(self.subscriptions):
+            await self.leave(topic)
+
+    async def handle_message(self, data):
+        """Route subscribe/unsubscribe actions."""
+        action = data.get('action')
+        topic = data.get('topic')
+        if action not in ('subscribe', 'unsubscribe'):
+            await self.send_error(f'Unknown action: {action}')
+            return
+        if topic not in self.TOPICS:
+            await self.send_error(f'Unknown topic: {topic}')
+            return
+
+        if action == 'subscribe':
+            await self.subscribe(topic)
+            if topic == 'prices' and 'last_seq' in data and topic in self.subscriptions:
+                await self.resume_ticks(data['last_seq'])
+        else:
+            await self.unsubscribe(topic)
+
+    async def subscribe(self, topic):
+        """Join the channel-layer group backing ``topic``."""
+        if topic in self.subscriptions:
+            await self.send_ack('subscribed', topic)
+            return
+
+        template, requires_user = self.TOPICS[topic]
+        user_id = self.get_user_id()
+        if requires_user and not user_id:
+            await self.send_error(f'Authentication required for topic: {topic}')
+            return
+
+        group_name = template.format(user_id=user_id)
+        await hub.join(group_name, self)
+        self.subscriptions[topic] = group_name
+        await self.send_ack('subscribed', topic)
+
+        if topic == 'portfolio':
+            total_amount, total_cost = await aload_totals(user_id)
+            await portfolio_book.register(user_id, self, total_amount, total_cost)
+
+    async def unsubscribe(self, topic):
+        """Leave ``topic`` and confirm to the client."""
+        await self.leave(topic)
+        await self.send_ack('unsubscribed', topic)
+
+    async def leave(self, topic):
+        """Leave the channel-layer group backing ``topic``."""
+        group_name = self.subscriptions.pop(topic, None)
+        if group_name is not None:
+            await hub.leave(group_name, self)
+        if group_name is not None and topic == 'portfolio':
+            await portfolio_book.unregister(self.get_user_id(), self)
+
+    async def send_ack(self, status, topic):
+        """Confirm a subscription change to the client."""
+        await self.send(text_data=json.dumps({'type': status, 'topic': topic}))
+
+    async def send_topic(self, topic, data):
+        """Push a payload for ``topic`` to the client."""
+        await self.send(text_data=json.dumps({'topic': topic, 'data': data}))
+
+    async def send_tick(self, tick):
+        await self.send_topic('prices', tick)
+
+    async def gold_price_update(self, event):
+        """Forward a price tick."""
+        await self.deliver_tick(event.get('data', event))
+
+    async def send_alert_notification(self, event):
+        """Forward a triggered price alert."""
+        await self.send_topic('alerts', event.get('message', event))
+
+    async def wallet_update(self, event):
+        """Forward a wallet balance change."""
+        await self.send_topic('wallet', event.get('data', event))
+
+    async def portfolio_update(self, event):
+        """Forward a portfolio valuation change."""
+        await self.send_topic('portfolio', event.get('data', event))
+
+    async def portfolio_holdings_changed(self, event):
+        """Reload the user's holdings totals into the live portfolio book."""
+        user_id = self.get_user_id()
+        total_amount, total_cost = await aload_totals(user_id)
+        await portfolio_book.update_holdings(user_id, total_amount, total_cost)
@@ -0,0 +1,296 @@
+"""
+Per-process fan-out hub for broadcast groups.
+
+With one channel per socket, ``group_send`` costs one channel-layer delivery
+per subscriber. For broadcast groups listed in ``settings.FANOUT_GROUPS`` each
+worker process instead joins the group once with its own channel and fans
+messages out in memory to the sockets it owns, so a tick costs one delivery
+per process.
+"""
+import asyncio
+import contextlib
+import logging
+import time
+
+from channels.consumer import get_handler_name
+from channels.layers import DEFAULT_CHANNEL_LAYER, get_channel_layer
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+FANOUT_MESSAGE_TYPE = 'fanout.message'
+
+
+def is_fanout_group(group):
+    """Return True if ``group`` is delivered through the fan-out hub."""
+    return group in getattr(settings, 'FANOUT_GROUPS', ())
+
+
+def fanout_layer_alias():
+    """Channel layer alias used for fan-out groups."""
+    alias = getattr(settings, 'FANOUT_CHANNEL_LAYER', DEFAULT_CHANNEL_LAYER)
+    if alias not in getattr(settings, 'CHANNEL_LAYERS', {}):
+        return DEFAULT_CHANNEL_LAYER
+    return alias
+
+
+def envelope(group, event):
+    """Wrap ``event`` so the receiving hub knows which group it belongs to."""
+    return {'type': FANOUT_MESSAGE_TYPE, 'group': group, 'event': event}
+
+
+class QueueSubscriber:
+    """
+    Buffers events of one type for async iteration by non-consumer
+    listeners such as SSE responses. Slow readers drop the oldest event.
+    """
+
+    def __init__(self, event_type, maxsize=100):
+        self.queue = asyncio.Queue(maxsize)
+        setattr(self, get_handler_name({'type': event_type}), self.put)
+
+    async def put(self, event):
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+
+class FanoutConsumerMixin:
+    """
+    Runs hub events on a channels consumer's own dispatch loop.
+
+    The hub queues events for these consumers instead of awaiting their
+    handlers from its listener task, so a handler never interleaves with the
+    consumer's handling of client messages. A slow socket drops its oldest
+    queued event rather than holding up the hub.
+    """
+
+    fanout_queue_size = 100
+    fanout_queue = None
+
+    async def __call__(self, scope, receive, send):
+        self.fanout_queue = asyncio.Queue(self.fanout_queue_size)
+        client_message = None
+
+        async def receive_or_event():
+            nonlocal client_message
+            if client_message is None:
+                client_message = asyncio.ensure_future(receive())
+            event = asyncio.ensure_future(self.fanout_queue.get())
+            try:
+                await asyncio.wait([client_message, event], return_when=asyncio.FIRST_COMPLETED)
+            except asyncio.CancelledError:
+                event.cancel()
+                raise
+            if event.done():
+                # A pending client message is kept for the next call
+                return event.result()
+            event.cancel()
+            message, client_message = client_message.result(), None
+            return message
+
+        try:
+            await super().__call__(scope, receive_or_event, send)
+        finally:
+            if client_message is not None:
+                client_message.cancel()
+
+    def fanout_put(self, event):
+        if self.fanout_queue.full():
+            self.fanout_queue.get_nowait()
+        self.fanout_queue.put_nowait(event)
+
+
+async def dispatch(subscriber, event):
+    """
+    Hand ``event`` to ``subscriber``: queued for ``FanoutConsumerMixin``
+    consumers, awaited directly for plain subscribers.
+    """
+    if getattr(subscriber, 'fanout_queue', None) is not None:
+        subscriber.fanout_put(event)
+    else:
+        await getattr(subscriber, get_handler_name(event))(event)
+
+
+class FanoutHub:
+    """
+    Joins each broadcast group once per process and dispatches incoming
+    events to local subscribers.
+
+    A subscriber is any object with consumer-style handler methods, e.g. a
+    ``gold_price_update(event)`` coroutine for ``{'type': 'gold_price_update'}``.
+    Consumers should use ``FanoutConsumerMixin`` so events reach them through
+    their own dispatch loop (see ``dispatch``).
+    """
+
+    # channels_redis expires group membership after a day by default
+    GROUP_REFRESH_SECONDS = 3600
+
+    def __init__(self):
+        self._reset()
+        self._start_lock = None
+        self._start_lock_loop = None
+
+    def _reset(self):
+        self.subscribers = {}
+        self.channel_name = None
+        self.listener = None
+        self.loop = None
+        self.refreshed_at = 0.0
+
+    @property
+    def channel_layer(self):
+        return get_channel_layer(fanout_layer_alias())
+
+    async def join(self, group, consumer):
+        """Add ``consumer`` to ``group`` via the hub or the channel layer."""
+        if is_fanout_group(group):
+            await self.subscribe(group, consumer)
+        else:
+            await consumer.channel_layer.group_add(group, consumer.channel_name)
+
+    async def leave(self, group, consumer):
+        """Remove ``consumer`` from ``group`` via the hub or the channel layer."""
+        if is_fanout_group(group):
+            await self.unsubscribe(group, consumer)
+        else:
+            await consumer.channel_layer.group_discard(group, consumer.channel_name)
+
+    async def subscribe(self, group, subscriber):
+        """Register a local subscriber, joining the group on first use."""
+        await self._ensure_listener()
+        subscribers = self.subscribers.setdefault(group, set())
+        if not subscribers:
+            await self.channel_layer.group_add(group, self.channel_name)
+        subscribers.add(subscriber)
+
+    async def unsubscribe(self, group, subscriber):
+        """Drop a local subscriber, leaving the group when none remain."""
+        if self.loop is not asyncio.get_running_loop():
+            return
+        subscribers = self.subscribers.get(group)
+        if not subscribers or subscriber not in subscribers:
+            return
+        subscribers.discard(subscriber)
+        if not subscribers:
+            del self.subscribers[group]
+            await self.channel_layer.group_discard(group, self.channel_name)
+        if not self.subscribers and self.listener is not None:
+            self.listener.cancel()
+            self._reset()
+
+    @contextlib.asynccontextmanager
+    async def subscription(self, group, event_type):
+        """
+        Subscribe to ``event_type`` events sent to ``group`` for the duration
+        of the block.
+
+        Yields an async ``get(timeout=None)`` returning the next event, or
+        None when ``timeout`` seconds pass without one. Events sent after
+        entering the block are kept until read, so a caller can subscribe
+        before replaying history without missing anything in between.
+        """
+        if is_fanout_group(group):
+            subscriber = QueueSubscriber(event_type)
+            await self.subscribe(group, subscriber)
+
+            async def get(timeout=None):
+                try:
+                    return await asyncio.wait_for(subscriber.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    return None
+
+            try:
+                yield get
+            finally:
+                await self.unsubscribe(group, subscriber)
+        else:
+            channel_layer = get_channel_layer()
+            channel_name = await channel_layer.new_channel()
+            await channel_layer.group_add(group, channel_name)
+
+            async def get(timeout=None):
+                while True:
+                    try:
+                        message = await asyncio.wait_for(channel_layer.receive(channel_name), timeout)
+                    except asyncio.TimeoutError:
+                        return None
+                    if message.get('type') == event_type:
+                        return message
+
+            try:
+                yield get
+            finally:
+                await channel_layer.group_discard(group, channel_name)
+
+    async def listen(self, group, event_type, timeout=None):
+        """
+        Async iterator over ``event_type`` events sent to ``group``.
+
+        Yields None whenever ``timeout`` seconds pass without an event so the
+        caller can emit keep-alives.
+        """
+        async with self.subscription(group, event_type) as get:
+            while True:
+                yield await get(timeout)
+
+    async def _ensure_listener(self):
+        loop = asyncio.get_running_loop()
+        if self._start_lock_loop is not loop:
+            self._start_lock, self._start_lock_loop = asyncio.Lock(), loop
+        # Subscribers arriving together must not each start a listener
+        async with self._start_lock:
+            if self.loop is not loop or self.listener is None or self.listener.done():
+                # First use in this process (or the previous event loop is gone)
+                stale_groups, stale_channel = list(self.subscribers), self.channel_name
+                self._reset()
+                for group in stale_groups:
+                    try:
+                        await self.channel_layer.group_discard(group, stale_channel)
+                    except Exception:
+                        pass
+                self.loop = loop
+                self.channel_name = await self.channel_layer.new_channel('fanout')
+                self.refreshed_at = time.monotonic()
+                self.listener = loop.create_task(self._listen())
+
+    async def _listen(self):
+        channel_layer = self.channel_layer
+        while True:
+            try:
+                message = await asyncio.wait_for(
+                    channel_layer.receive(self.channel_name),
+                    timeout=self.GROUP_REFRESH_SECONDS,
+                )
+            except asyncio.TimeoutError:
+                message = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Fan-out hub receive failed: {e}")
+                await asyncio.sleep(1)
+                continue
+
+            if time.monotonic() - self.refreshed_at >= self.GROUP_REFRESH_SECONDS:
+                await self._refresh_groups()
+            if message is not None:
+                await self.deliver(message.get('group'), message.get('event') or {})
+
+    async def _refresh_groups(self):
+        for group in list(self.subscribers):
+            await self.channel_layer.group_add(group, self.channel_name)
+        self.refreshed_at = time.monotonic()
+
+    async def deliver(self, group, event):
+        """Dispatch ``event`` to every local subscriber of ``group``."""
+        handler_name = get_handler_name(event)
+        for subscriber in list(self.subscribers.get(group, ())):
+            if getattr(subscriber, handler_name, None) is None:
+                continue
+            try:
+                await dispatch(subscriber, event)
+            except Exception as e:
+                logger.error(f"Fan-out delivery to {subscriber!r} failed: {e}")
+
+
+hub = FanoutHub()
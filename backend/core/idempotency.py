@@ -0,0 +1,90 @@
+"""
+Idempotency keys for money-moving endpoints.
+
+A client sends an ``Idempotency-Key`` header with a POST. The first response
+for that key is stored in the shared cache for ``settings.IDEMPOTENCY_KEY_TTL``
+seconds; a retry with the same key and body gets the stored response back
+without the view running again.
+"""
+import functools
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+
+
+def request_fingerprint(request):
+    """Hash of the request body, used to reject a key reused for another request."""
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(f'{request.method} {request.path}\n{body}'.encode()).hexdigest()
+
+
+def _cache_key(request, scope, key):
+    user_id = request.user.pk if request.user.is_authenticated else 'anon'
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return f'idempotency:{scope}:{user_id}:{digest}'
+
+
+def idempotent(view_method):
+    """
+    Decorator for APIView handler methods honouring the Idempotency-Key header.
+
+    Requests without the header run normally. Responses with a 5xx status
+    are not stored so the client can retry them.
+    """
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {'error': f'{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        cache_key = _cache_key(request, type(self).__name__, key)
+        lock_key = f'{cache_key}:lock'
+        fingerprint = request_fingerprint(request)
+
+        stored = cache.get(cache_key)
+        if stored is None:
+            if not cache.add(lock_key, fingerprint, timeout=settings.IDEMPOTENCY_LOCK_TTL):
+                return Response(
+                    {'error': 'A request with this Idempotency-Key is already in progress'},
+                    status=status.HTTP_409_CONFLICT,
+                )
+            try:
+                # The request holding the lock before us may have stored its
+                # response and released the lock since our first read.
+                stored = cache.get(cache_key)
+                if stored is None:
+                    response = view_method(self, request, *args, **kwargs)
+                    if response.status_code < 500:
+                        stored = {
+                            'fingerprint': fingerprint,
+                            'status': response.status_code,
+                            'data': response.data,
+                        }
+                        cache.set(cache_key, stored, timeout=settings.IDEMPOTENCY_KEY_TTL)
+                    return response
+            finally:
+                cache.delete(lock_key)
+
+        if stored['fingerprint'] != fingerprint:
+            return Response(
+                {'error': f'{IDEMPOTENCY_HEADER} was already used for a different request'},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        response = Response(stored['data'], status=stored['status'])
+        response[REPLAYED_HEADER] = 'true'
+        return response
+
+    return wrapper
@@ -0,0 +1,173 @@
+"""
+Lot accounting for realized and unrealized P&L.
+
+Every buy opens a lot; sells consume lots under one of two cost methods:
+
+``FIFO``
+    Sells consume the oldest lots first. Realized P&L is the sale proceeds
+    minus the cost of the grams consumed.
+``AVERAGE``
+    Every gram held costs the running average price. Buys move the average;
+    sells realize against it and leave it unchanged.
+
+``replay`` processes a user's whole history in one vectorized pass, for
+backfills. Live trades are applied one at a time by ``LotService``, which
+keeps the open FIFO lots in the ``GoldLot`` table.
+"""
+from collections import namedtuple
+from decimal import Decimal, ROUND_HALF_UP
+
+import numpy as np
+
+METHODS = ('FIFO', 'AVERAGE')
+
+# Positions smaller than this (grams) count as flat; guards float residue
+EPSILON = 1e-9
+# Largest shrink of a run's cost factor (in log space) before it is re-anchored
+MAX_LOG_SHRINK = 600.0
+
+Replay = namedtuple('Replay', ['realized', 'remaining', 'open_grams', 'open_cost'])
+Replay.__doc__ = """
+Result of replaying a trade history.
+
+realized: per-trade realized P&L (zero for buys)
+remaining: per-trade grams still open from each buy under FIFO (zero for sells)
+open_grams: grams still open from the buys in the history
+open_cost: cost basis of the grams still held under the chosen method
+"""
+
+
+def _arrays(sides, grams, prices):
+    is_buy = np.asarray(sides) == 'BUY'
+    return is_buy, np.asarray(grams, dtype=float), np.asarray(prices, dtype=float)
+
+
+def _covered(is_buy, grams):
+    """
+    Grams each sell takes from bought gold, as ``(before, after)`` cumulative
+    totals per trade.
+
+    A sell can only take what has been bought and not yet sold; the rest
+    (holdings that predate the history) is uncovered, as in ``LotService``.
+    So ``C_k = min(C_{k-1} + s_k, B_k)`` with ``B`` and ``S`` the cumulative
+    grams bought and sold, which unrolls to
+    ``C_k = S_k + min(0, min_{j<=k}(B_j - S_j))``.
+    """
+    bought_so_far = np.cumsum(np.where(is_buy, grams, 0.0))
+    sold_so_far = np.cumsum(np.where(is_buy, 0.0, grams))
+    shortfall = np.minimum(np.minimum.accumulate(bought_so_far - sold_so_far), 0.0)
+    after = sold_so_far + shortfall
+    before = np.concatenate(([0.0], after[:-1]))
+    return before, after
+
+
+def _fifo(is_buy, grams, prices):
+    """
+    FIFO replay without a per-trade loop.
+
+    Cumulative bought grams against cumulative buy cost is a piecewise-linear
+    curve; under FIFO the cost of the grams a sell consumes is that curve's
+    rise between the covered total sold before and after it, which
+    ``np.interp`` evaluates for every sell at once. Uncovered grams cost the
+    sale price, so they realize nothing.
+    """
+    buy_grams = np.where(is_buy, grams, 0.0)
+
+    bought = np.concatenate(([0.0], np.cumsum(buy_grams[is_buy])))
+    cost = np.concatenate(([0.0], np.cumsum((buy_grams * prices)[is_buy])))
+    covered_before, covered_after = _covered(is_buy, grams)
+    consumed_cost = np.interp(covered_after, bought, cost) - np.interp(covered_before, bought, cost)
+    realized = np.where(is_buy, 0.0, (covered_after - covered_before) * prices - consumed_cost)
+
+    total_sold = covered_after[-1] if len(grams) else 0.0
+    remaining = np.zeros(len(grams))
+    remaining[is_buy] = np.clip(bought[1:] - total_sold, 0.0, buy_grams[is_buy])
+    open_cost = cost[-1] - np.interp(total_sold, bought, cost)
+    return realized, remaining, open_cost
+
+
+def _average(is_buy, grams, prices):
+    """
+    Average-cost replay, vectorized within each run of trades.
+
+    A sell of ``q`` from ``H`` held scales the position's total cost by
+    ``r = 1 - q / H``; a buy adds ``q * p``. So within a run the total cost
+    after trade ``i`` is ``P_i * (K_0 + sum(q_j * p_j / P_j))`` over the
+    run's buys, with ``P`` the cumulative product of ``r`` (taken in log
+    space) and ``K_0`` the cost carried into the run. A run ends when the
+    position goes flat, or early when ``P`` would underflow; summing each
+    run separately keeps earlier runs' magnitudes out of its cumulative sum.
+    Sells only count their covered grams (see ``_covered``).
+    """
+    count = len(grams)
+    covered_before, covered_after = _covered(is_buy, grams)
+    grams = np.where(is_buy, grams, covered_after - covered_before)
+    signed = np.where(is_buy, grams, -grams)
+    held = np.cumsum(signed)
+    held_before = held - signed
+    flat_before = held_before <= EPSILON
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = np.where(is_buy | flat_before, 1.0, 1.0 - grams / np.where(flat_before, 1.0, held_before))
+    # A sell that closes the position ends its run; its cost is zeroed below
+    log_ratio = np.log(np.where(ratio > EPSILON, ratio, 1.0))
+    buy_cost = np.where(is_buy, grams * prices, 0.0)
+
+    total_cost = np.zeros(count)
+    flat_starts = np.append(np.flatnonzero(flat_before), count)
+    start, carried = 0, 0.0
+    while start < count:
+        if flat_before[start]:
+            carried = 0.0
+        end = flat_starts[np.searchsorted(flat_starts, start, side='right')]
+        log_product = np.cumsum(log_ratio[start:end])
+        too_deep = np.flatnonzero(log_product < -MAX_LOG_SHRINK)
+        if len(too_deep):
+            end = start + max(too_deep[0], 1)
+            log_product = log_product[:end - start]
+        product = np.exp(log_product)
+        run_cost = product * (carried + np.cumsum(buy_cost[start:end] / product))
+        total_cost[start:end] = run_cost
+        start, carried = end, run_cost[-1]
+    total_cost = np.where(held > EPSILON, total_cost, 0.0)
+
+    cost_before = np.concatenate(([0.0], total_cost[:-1]))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        avg_before = np.where(flat_before, prices, cost_before / np.where(flat_before, 1.0, held_before))
+    realized = np.where(is_buy, 0.0, grams * (prices - avg_before))
+    return realized, total_cost[-1] if count else 0.0
+
+
+def replay(sides, grams, prices, method='FIFO'):
+    """
+    Replay a trade history in one vectorized pass.
+
+    Args:
+        sides: 'BUY'/'SELL' per trade, in trade order
+        grams: Gold amount per trade
+        prices: Price per gram per trade
+        method (str): 'FIFO' or 'AVERAGE'
+
+    Returns:
+        Replay: float arrays and totals; see ``to_money`` for rounding
+    """
+    if method not in METHODS:
+        raise ValueError(f'Unknown lot accounting method: {method}')
+    is_buy, grams, prices = _arrays(sides, grams, prices)
+    covered_sold = _covered(is_buy, grams)[1][-1] if len(grams) else 0.0
+    open_grams = float(np.where(is_buy, grams, 0.0).sum() - covered_sold)
+
+    realized, remaining, open_cost = _fifo(is_buy, grams, prices)
+    if method == 'AVERAGE':
+        realized, open_cost = _average(is_buy, grams, prices)
+    return Replay(realized, remaining, open_grams, float(open_cost))
+
+
+def to_money(value):
+    """Round a float THB amount to satang."""
+    return Decimal(repr(float(value))).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+def to_grams(value):
+    """Round a float gram amount to the milligram."""
+    return Decimal(repr(float(value))).quantize(Decimal('0.001'), rounding=ROUND_HALF_UP)
@@ -0,0 +1,51 @@
+"""
+Django management command to rebuild per-user trading statistics.
+
+Replays each user's completed transactions and overwrites their
+UserTradingStats row. Run once after deploying the stats table, or to
+repair a user's totals.
+
+Usage:
+    python manage.py backfill_trading_stats
+
+Options:
+    --user USER_ID      Only rebuild these users (repeatable)
+    --chunk-size COUNT  Users per database transaction (default: 500)
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Transaction
+from core.services import TradingStatsService
+
+
+class Command(BaseCommand):
+    help = 'Rebuild UserTradingStats from transaction history'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=int,
+            action='append',
+            dest='user_ids',
+            help='Only rebuild these users (repeatable)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Users per database transaction (default: 500)'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        if chunk_size <= 0:
+            raise CommandError('--chunk-size must be positive')
+
+        user_ids = options['user_ids'] or list(
+            Transaction.objects.order_by('user_id').values_list('user_id', flat=True).distinct()
+        )
+        rebuilt = 0
+        for start in range(0, len(user_ids), chunk_size):
+            rebuilt += TradingStatsService.rebuild(user_ids[start:start + chunk_size])
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt trading stats for {rebuilt} users'))
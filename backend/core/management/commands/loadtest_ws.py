@@ -0,0 +1,241 @@
+"""
+Django management command to load-test WebSocket price fan-out.
+
+Opens many concurrent clients against ws/gold-price/ and ws/alerts/ on a
+running ASGI server while simulate_prices publishes ticks at a fixed rate,
+then reports tick fan-out latency percentiles, dropped ticks and server
+memory per connection.
+
+Usage:
+    python manage.py loadtest_ws --clients 5000 --tick-interval 0.5 --duration 60
+
+Options:
+    --url URL                 Server base URL (default: ws://localhost:8000)
+    --clients COUNT           Concurrent clients (default: 1000)
+    --alerts-share RATIO      Share of clients on ws/alerts/ (default: 0.2)
+    --ramp-rate PER_SECOND    New connections per second (default: 500)
+    --tick-interval SECONDS   Publisher interval (default: 1.0)
+    --duration SECONDS        Measurement window (default: 30)
+    --no-publisher            Do not start simulate_prices (run it yourself)
+    --server-pid PID          Server process to sample RSS from (repeatable)
+
+Requires the ``websockets`` package (listed in requirements.txt) and enough
+file descriptors for the client count (ulimit -n).
+"""
+import asyncio
+import io
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+
+def percentiles(samples, points=(50, 99, 99.9)):
+    """Percentiles of ``samples`` keyed by point, or None when empty."""
+    if not samples:
+        return {point: None for point in points}
+    values = np.percentile(np.asarray(samples, dtype=float), points)
+    return dict(zip(points, values.tolist()))
+
+
+def count_dropped(received_seqs, last_seq):
+    """
+    Ticks a client missed between its first received tick and ``last_seq``.
+    """
+    if not received_seqs:
+        return 0
+    expected = last_seq - min(received_seqs) + 1
+    return max(expected - len(set(received_seqs)), 0)
+
+
+def process_tree_rss_kb(pid):
+    """Resident memory of ``pid`` and all its descendants, in kB (Linux only)."""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        pending.extend(children.get(current, []))
+        try:
+            with open(f'/proc/{current}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1])
+                        break
+        except OSError:
+            continue
+    return total
+
+
+class ClientStats:
+    """Per-client measurements."""
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.connected = False
+        self.error = None
+        self.latencies_ms = []
+        self.seqs = []
+
+
+class Command(BaseCommand):
+    help = 'Load-test WebSocket price fan-out and report latency percentiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='ws://localhost:8000', help='Server base URL (default: ws://localhost:8000)')
+        parser.add_argument('--clients', type=int, default=1000, help='Concurrent clients (default: 1000)')
+        parser.add_argument('--alerts-share', type=float, default=0.2, help='Share of clients on ws/alerts/ (default: 0.2)')
+        parser.add_argument('--ramp-rate', type=float, default=500.0, help='New connections per second (default: 500)')
+        parser.add_argument('--tick-interval', type=float, default=1.0, help='Publisher interval in seconds (default: 1.0)')
+        parser.add_argument('--duration', type=float, default=30.0, help='Measurement window in seconds (default: 30)')
+        parser.add_argument('--no-publisher', action='store_true', help='Do not start simulate_prices')
+        parser.add_argument('--server-pid', type=int, action='append', default=[], help='Server PID to sample RSS from (repeatable)')
+
+    def handle(self, *args, **options):
+        if min(options['clients'], options['duration'], options['tick_interval'], options['ramp_rate']) <= 0:
+            raise CommandError('--clients, --duration, --tick-interval and --ramp-rate must be positive')
+        if not 0 <= options['alerts_share'] <= 1:
+            raise CommandError('--alerts-share must be between 0 and 1')
+        if not options['url'].startswith(('ws://', 'wss://')):
+            raise CommandError('--url must start with ws:// or wss://')
+
+        try:
+            import websockets  # noqa: F401
+        except ImportError:
+            raise CommandError('loadtest_ws requires the websockets package: pip install websockets')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'\n=== WebSocket Load Test ===\n'
+            f'Server: {options["url"]}\n'
+            f'Clients: {options["clients"]} ({options["alerts_share"]:.0%} on ws/alerts/)\n'
+            f'Tick interval: {options["tick_interval"]}s for {options["duration"]}s\n'
+        ))
+        asyncio.run(self._run(options))
+
+    async def _run(self, options):
+        import websockets
+
+        base_url = options['url'].rstrip('/')
+        server_pids = options['server_pid']
+        rss_before = sum(process_tree_rss_kb(pid) for pid in server_pids)
+
+        alerts_clients = int(options['clients'] * options['alerts_share'])
+        endpoints = ['ws/alerts/'] * alerts_clients + ['ws/gold-price/'] * (options['clients'] - alerts_clients)
+        stats = [ClientStats(endpoint) for endpoint in endpoints]
+        all_connected = asyncio.Event()
+        pending_connections = [len(stats)]
+
+        async def client(client_stats):
+            try:
+                async with websockets.connect(f'{base_url}/{client_stats.endpoint}', open_timeout=30) as socket:
+                    client_stats.connected = True
+                    pending_connections[0] -= 1
+                    if not pending_connections[0]:
+                        all_connected.set()
+                    async for raw in socket:
+                        received_at = time.time()
+                        message = _parse(raw)
+                        if message is None or 'seq' not in message:
+                            continue
+                        client_stats.seqs.append(message['seq'])
+                        sent_at = _timestamp(message.get('timestamp'))
+                        if sent_at is not None:
+                            client_stats.latencies_ms.append((received_at - sent_at) * 1000)
+            except Exception as e:
+                client_stats.error = repr(e)
+                if not client_stats.connected:
+                    pending_connections[0] -= 1
+                    if not pending_connections[0]:
+                        all_connected.set()
+
+        started = time.monotonic()
+        tasks = []
+        for client_stats in stats:
+            tasks.append(asyncio.create_task(client(client_stats)))
+            await asyncio.sleep(1 / options['ramp_rate'])
+        await all_connected.wait()
+        ramp_seconds = time.monotonic() - started
+        connected = sum(1 for s in stats if s.connected and s.error is None)
+        rss_connected = sum(process_tree_rss_kb(pid) for pid in server_pids)
+        self.stdout.write(f'Connected {connected}/{len(stats)} clients in {ramp_seconds:.1f}s')
+
+        publisher = None
+        if not options['no_publisher']:
+            count = max(int(options['duration'] / options['tick_interval']), 1)
+            publisher = threading.Thread(
+                target=call_command,
+                args=('simulate_prices',),
+                kwargs={'interval': options['tick_interval'], 'count': count, 'stdout': io.StringIO()},
+                daemon=True,
+            )
+            publisher.start()
+
+        await asyncio.sleep(options['duration'])
+        if publisher is not None:
+            await asyncio.to_thread(publisher.join)
+        # Grace period for ticks still in flight
+        await asyncio.sleep(min(options['tick_interval'], 2.0))
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        self._report(stats, server_pids, rss_before, rss_connected, connected)
+
+    def _report(self, stats, server_pids, rss_before, rss_connected, connected):
+        price_clients = [s for s in stats if s.endpoint == 'ws/gold-price/' and s.connected]
+        latencies = [latency for s in price_clients for latency in s.latencies_ms]
+        last_seq = max((max(s.seqs) for s in price_clients if s.seqs), default=0)
+        dropped = sum(count_dropped(s.seqs, last_seq) for s in price_clients)
+        received = sum(len(s.seqs) for s in price_clients)
+        errors = [s.error for s in stats if s.error]
+
+        p = percentiles(latencies)
+
+        def fmt(value):
+            return 'n/a' if value is None else f'{value:.1f} ms'
+
+        self.stdout.write(self.style.SUCCESS('\n=== Results ==='))
+        self.stdout.write(f'Ticks received: {received} across {len(price_clients)} price clients')
+        self.stdout.write(f'Fan-out latency: p50 {fmt(p[50])}, p99 {fmt(p[99])}, p999 {fmt(p[99.9])}')
+        self.stdout.write(f'Dropped ticks: {dropped}')
+        self.stdout.write(f'Connection errors: {len(errors)}')
+        if server_pids and connected:
+            per_connection = (rss_connected - rss_before) / connected
+            self.stdout.write(
+                f'Server RSS: {rss_before / 1024:.1f} MB idle, {rss_connected / 1024:.1f} MB connected '
+                f'({per_connection:.1f} kB per connection)'
+            )
+        if errors:
+            self.stdout.write(self.style.WARNING(f'First error: {errors[0]}'))
+
+
+def _parse(raw):
+    try:
+        message = json.loads(raw)
+    except (TypeError, ValueError):
+        return None
+    return message if isinstance(message, dict) else None
+
+
+def _timestamp(value):
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        return None
@@ -0,0 +1,68 @@
+"""
+Django management command to maintain monthly transactions partitions.
+
+Meant to run from a scheduler (e.g. cron once a day) so partitions exist
+well before trades for that month arrive. PostgreSQL only; on other
+databases it reports that there is nothing to do.
+
+Usage:
+    python manage.py manage_partitions
+
+Options:
+    --months-ahead MONTHS  Create partitions up to this many months ahead (default: 3)
+    --drain-default        Move rows from the default partition into monthly partitions
+    --list                 Only list the existing partitions
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core import partitions
+
+
+class Command(BaseCommand):
+    help = 'Create monthly partitions for the transactions table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            default=3,
+            help='Create partitions up to this many months ahead (default: 3)'
+        )
+        parser.add_argument(
+            '--drain-default',
+            action='store_true',
+            help='Move rows from the default partition into monthly partitions'
+        )
+        parser.add_argument(
+            '--list',
+            action='store_true',
+            help='Only list the existing partitions'
+        )
+
+    def handle(self, *args, **options):
+        if options['months_ahead'] < 0:
+            raise CommandError('--months-ahead must be non-negative')
+        if not partitions.is_supported(connection):
+            self.stdout.write(f'Partitioning requires PostgreSQL ({connection.vendor} in use); nothing to do')
+            return
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            if options['list']:
+                for name in partitions.existing_partitions(cursor):
+                    self.stdout.write(name)
+                return
+
+            first = last = partitions.month_start(timezone.now())
+            last = partitions.add_months(last, options['months_ahead'])
+            if options['drain_default']:
+                oldest, newest = partitions.default_partition_range(cursor)
+                if oldest is not None:
+                    first, last = min(first, oldest.date()), max(last, newest.date())
+
+            created = partitions.ensure_partitions(cursor, first, last)
+
+        for name in created:
+            self.stdout.write(f'Created {name}')
+        self.stdout.write(self.style.SUCCESS(f'Created {len(created)} partitions'))
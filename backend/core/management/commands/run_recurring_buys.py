@@ -0,0 +1,70 @@
+"""
+Django management command to execute due recurring buy plans.
+
+Meant to run from a scheduler (e.g. cron at the top of every hour). All
+plans due in the window are executed as one batched job at a single price.
+
+Usage:
+    python manage.py run_recurring_buys
+
+Options:
+    --window-minutes MINUTES  Also execute plans due within this many minutes (default: 0)
+    --chunk-size COUNT        Plans per database transaction (default: 500)
+    --dry-run                 Only report how many plans are due
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.services import QuoteService, RecurringBuyService, TradeError
+
+
+class Command(BaseCommand):
+    help = 'Execute due recurring buy plans in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--window-minutes',
+            type=int,
+            default=0,
+            help='Also execute plans due within this many minutes (default: 0)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Plans per database transaction (default: 500)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many plans are due'
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] <= 0 or options['window_minutes'] < 0:
+            raise CommandError('--chunk-size must be positive and --window-minutes non-negative')
+
+        cutoff = timezone.now() + timedelta(minutes=options['window_minutes'])
+        due = RecurringBuyService.due_plans(cutoff).count()
+        price_per_gram = QuoteService.latest_price()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'\n=== Recurring Buys ===\n'
+            f'Due plans: {due} (up to {cutoff.isoformat()})\n'
+            f'Price: {price_per_gram} THB/gram\n'
+        ))
+        if options['dry_run'] or not due:
+            return
+
+        try:
+            results = RecurringBuyService.run_due(
+                cutoff=cutoff, chunk_size=options['chunk_size'], price_per_gram=price_per_gram
+            )
+        except TradeError as e:
+            raise CommandError(str(e))
+
+        for run_status, count in sorted(results.items()):
+            self.stdout.write(f'{run_status}: {count}')
+        self.stdout.write(self.style.SUCCESS(f'Processed {sum(results.values())} plans'))
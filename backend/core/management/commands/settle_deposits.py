@@ -0,0 +1,73 @@
+"""
+Django management command to settle pending deposits in bulk.
+
+Meant for end-of-day gateway batches: pending deposits are settled in
+chunks with one status update and one balance update per chunk. With
+--reconcile it instead checks completed deposits against the balance
+credits posted for them and exits non-zero on any discrepancy.
+
+Usage:
+    python manage.py settle_deposits
+
+Options:
+    --file PATH         Only settle deposits whose references are listed in PATH, one per line
+    --chunk-size COUNT  Deposits per database transaction (default: 500)
+    --reconcile         Only compare completed deposits with ledger credits
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from core.services import DepositService
+
+
+class Command(BaseCommand):
+    help = 'Settle pending deposits in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            help='Only settle deposits whose references are listed in this file, one per line'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Deposits per database transaction (default: 500)'
+        )
+        parser.add_argument(
+            '--reconcile',
+            action='store_true',
+            help='Only compare completed deposits with ledger credits'
+        )
+
+    def handle(self, *args, **options):
+        if options['reconcile']:
+            return self.reconcile()
+
+        chunk_size = options['chunk_size']
+        if chunk_size <= 0:
+            raise CommandError('--chunk-size must be positive')
+
+        references = None
+        if options['file']:
+            try:
+                with open(options['file']) as batch:
+                    references = [line.strip() for line in batch if line.strip()]
+            except OSError as e:
+                raise CommandError(f'Cannot read {options["file"]}: {e}')
+
+        settled, credited = DepositService.settle_pending(chunk_size=chunk_size, references=references)
+        self.stdout.write(self.style.SUCCESS(f'Settled {settled} deposits totalling {credited:.2f}'))
+
+    def reconcile(self):
+        report = DepositService.reconcile()
+        labels = {
+            'uncredited': 'Completed deposits without a credit',
+            'orphaned': 'Credits without a completed deposit',
+            'mismatched': 'Credits differing from the deposit amount',
+        }
+        for key, label in labels.items():
+            if report[key]:
+                self.stdout.write(f'{label}: {", ".join(map(str, report[key]))}')
+        if any(report.values()):
+            raise CommandError('Deposits do not reconcile with ledger credits')
+        self.stdout.write(self.style.SUCCESS('Deposits reconcile with ledger credits'))
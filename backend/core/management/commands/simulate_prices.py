@@ -15,7 +15,7 @@ import random
 import logging
 from django.core.management.base import BaseCommand
 from django.utils import timezone
-from decimal import Decimal
+from decimal import Decimal, ROUND_HALF_UP
 from django.db import transaction
 
 from core.models import PriceHistory
@@ -30,7 +30,7 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument(
             '--interval',
-            type=int,
+            type=float,
             default=10,
             help='Update interval in seconds (default: 10)'
         )
@@ -87,7 +87,9 @@ class Command(BaseCommand):
 
                 # Simulate price movement (-2% to +2%)
                 change_percent = random.uniform(-0.02, 0.02)
-                current_price = current_price * (1 + change_percent)
+                current_price = (current_price * (1 + Decimal(str(change_percent)))).quantize(
+                    Decimal('0.01'), rounding=ROUND_HALF_UP
+                )
 
                 # Ensure price stays within bounds
                 if current_price < min_price:
@@ -96,7 +98,7 @@ class Command(BaseCommand):
                     current_price = max_price
 
                 # Calculate price per baht (15.244 grams per baht)
-                price_per_baht = current_price * Decimal('15.244')
+                price_per_baht = (current_price * Decimal('15.244')).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
 
                 price_data = {
                     'price_per_gram': current_price,
@@ -0,0 +1,59 @@
+"""
+Django management command to snapshot ledger balances.
+
+Run periodically (e.g. every few minutes) so ledger balance reads only sum
+the entries posted since the latest snapshot. With --verify it then checks
+the User.balance / GoldHolding projections against the ledger and fails if
+any user has drifted.
+
+Usage:
+    python manage.py snapshot_ledger
+
+Options:
+    --open-balances     First post opening balances for users that predate the ledger
+    --lag-seconds SECS  Only include entries at least this old (default: LEDGER_SNAPSHOT_LAG_SECONDS)
+    --verify            Check balance projections against the ledger afterwards
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from core.services import LedgerService
+
+
+class Command(BaseCommand):
+    help = 'Write ledger balance snapshots for accounts with new entries'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--open-balances',
+            action='store_true',
+            help='Post opening balances for users that predate the ledger'
+        )
+        parser.add_argument(
+            '--lag-seconds',
+            type=int,
+            default=None,
+            help='Only include entries at least this old'
+        )
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Check balance projections against the ledger afterwards'
+        )
+
+    def handle(self, *args, **options):
+        if options['open_balances']:
+            opened = LedgerService.open_balances()
+            self.stdout.write(f'Opened ledger balances for {opened} users')
+
+        written = LedgerService.snapshot(lag_seconds=options['lag_seconds'])
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} ledger snapshots'))
+
+        if options['verify']:
+            mismatches = LedgerService.verify()
+            for user_id, asset, gap in mismatches:
+                self.stdout.write(self.style.WARNING(
+                    f'User {user_id} {asset}: projection is {gap} ahead of the ledger'
+                ))
+            if mismatches:
+                raise CommandError(f'{len(mismatches)} balance projections do not match the ledger')
+            self.stdout.write(self.style.SUCCESS('Balance projections match the ledger'))
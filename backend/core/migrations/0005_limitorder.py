@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_pricealert'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LimitOrder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('side', models.CharField(choices=[('BUY', 'Buy'), ('SELL', 'Sell')], max_length=4)),
+                ('amount', models.DecimalField(decimal_places=3, max_digits=10)),
+                ('limit_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('status', models.CharField(choices=[('OPEN', 'Open'), ('FILLED', 'Filled'), ('CANCELLED', 'Cancelled')], default='OPEN', max_length=10)),
+                ('filled_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('filled_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='limit_orders', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Limit Order',
+                'verbose_name_plural': 'Limit Orders',
+                'db_table': 'limit_orders',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'id'], name='limit_order_status_id_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_limitorder'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConditionalOrder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('side', models.CharField(choices=[('BUY', 'Buy'), ('SELL', 'Sell')], max_length=4)),
+                ('amount', models.DecimalField(decimal_places=3, max_digits=10)),
+                ('trigger_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('condition', models.CharField(choices=[('ABOVE', 'Above'), ('BELOW', 'Below')], max_length=5)),
+                ('status', models.CharField(choices=[('ACTIVE', 'Active'), ('EXECUTED', 'Executed'), ('FAILED', 'Failed'), ('CANCELLED', 'Cancelled')], default='ACTIVE', max_length=10)),
+                ('executed_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('executed_at', models.DateTimeField(blank=True, null=True)),
+                ('failure_reason', models.CharField(blank=True, default='', max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conditional_orders', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Conditional Order',
+                'verbose_name_plural': 'Conditional Orders',
+                'db_table': 'conditional_orders',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'id'], name='cond_order_status_id_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:33
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_conditionalorder'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecurringBuyPlan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('frequency', models.CharField(choices=[('DAILY', 'Daily'), ('WEEKLY', 'Weekly')], max_length=6)),
+                ('next_run_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('is_active', models.BooleanField(default=True)),
+                ('last_run_at', models.DateTimeField(blank=True, null=True)),
+                ('last_run_status', models.CharField(blank=True, choices=[('EXECUTED', 'Executed'), ('INSUFFICIENT_FUNDS', 'Insufficient funds'), ('AMOUNT_TOO_SMALL', 'Amount too small')], default='', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recurring_buy_plans', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Recurring Buy Plan',
+                'verbose_name_plural': 'Recurring Buy Plans',
+                'db_table': 'recurring_buy_plans',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['is_active', 'next_run_at'], name='recurring_buy_due_idx')],
+            },
+        ),
+    ]
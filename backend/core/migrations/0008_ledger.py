@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:37
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_recurringbuyplan'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerAccount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=64, unique=True)),
+                ('asset', models.CharField(choices=[('CASH', 'Cash (THB)'), ('GOLD', 'Gold (grams)')], max_length=4)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ledger_accounts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Ledger Account',
+                'verbose_name_plural': 'Ledger Accounts',
+                'db_table': 'ledger_accounts',
+                'ordering': ['code'],
+            },
+        ),
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('journal_id', models.UUIDField(db_index=True)),
+                ('amount', models.DecimalField(decimal_places=3, max_digits=18)),
+                ('entry_type', models.CharField(choices=[('OPENING', 'Opening balance'), ('DEPOSIT', 'Deposit'), ('TRADE', 'Trade'), ('RESERVE', 'Order reservation'), ('RELEASE', 'Reservation release'), ('ADJUSTMENT', 'Adjustment')], max_length=10)),
+                ('reference', models.CharField(blank=True, default='', max_length=64)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='entries', to='core.ledgeraccount')),
+            ],
+            options={
+                'verbose_name': 'Ledger Entry',
+                'verbose_name_plural': 'Ledger Entries',
+                'db_table': 'ledger_entries',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['account', 'id'], name='ledger_entry_account_id_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='LedgerSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('balance', models.DecimalField(decimal_places=3, max_digits=18)),
+                ('last_entry_id', models.BigIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='snapshots', to='core.ledgeraccount')),
+            ],
+            options={
+                'verbose_name': 'Ledger Snapshot',
+                'verbose_name_plural': 'Ledger Snapshots',
+                'db_table': 'ledger_snapshots',
+                'ordering': ['-last_entry_id'],
+                'indexes': [models.Index(fields=['account', '-last_entry_id'], name='ledger_snapshot_latest_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:42
+
+from django.db import migrations, models
+from django.utils import timezone
+
+from core import partitions
+
+
+def partition_transactions(apps, schema_editor):
+    """
+    Rebuild ``transactions`` as a table range-partitioned by month.
+
+    PostgreSQL only. A partitioned table's primary key must include the
+    partition key, so the key becomes ``(id, transaction_date)``; ids still
+    come from a single sequence and stay unique.
+    """
+    if not partitions.is_supported(schema_editor.connection):
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('ALTER TABLE transactions RENAME TO transactions_unpartitioned')
+        cursor.execute('ALTER TABLE transactions_unpartitioned ALTER COLUMN id DROP IDENTITY IF EXISTS')
+        cursor.execute('ALTER TABLE transactions_unpartitioned ALTER COLUMN id DROP DEFAULT')
+        cursor.execute('DROP SEQUENCE IF EXISTS transactions_id_seq')
+        cursor.execute(
+            'CREATE TABLE transactions ('
+            'LIKE transactions_unpartitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS, '
+            'PRIMARY KEY (id, transaction_date)'
+            ') PARTITION BY RANGE (transaction_date)'
+        )
+        cursor.execute('CREATE SEQUENCE transactions_id_seq OWNED BY transactions.id')
+        cursor.execute("ALTER TABLE transactions ALTER COLUMN id SET DEFAULT nextval('transactions_id_seq')")
+        cursor.execute(
+            'ALTER TABLE transactions ADD CONSTRAINT transactions_user_id_fk_users_id '
+            'FOREIGN KEY (user_id) REFERENCES users (id) DEFERRABLE INITIALLY DEFERRED'
+        )
+        cursor.execute(f'CREATE TABLE {partitions.DEFAULT_PARTITION} PARTITION OF transactions DEFAULT')
+        cursor.execute('INSERT INTO transactions SELECT * FROM transactions_unpartitioned')
+        cursor.execute(
+            "SELECT setval('transactions_id_seq', COALESCE((SELECT MAX(id) FROM transactions), 0) + 1, false)"
+        )
+        cursor.execute('DROP TABLE transactions_unpartitioned')
+
+        # Move existing history out of the default partition, one partition per month
+        first, last = partitions.default_partition_range(cursor)
+        now = timezone.now()
+        partitions.ensure_partitions(cursor, min(first or now, now), max(last or now, now))
+
+
+def unpartition_transactions(apps, schema_editor):
+    if not partitions.is_supported(schema_editor.connection):
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('ALTER SEQUENCE transactions_id_seq OWNED BY NONE')
+        cursor.execute(
+            'CREATE TABLE transactions_unpartitioned ('
+            'LIKE transactions INCLUDING DEFAULTS INCLUDING CONSTRAINTS, PRIMARY KEY (id))'
+        )
+        cursor.execute('INSERT INTO transactions_unpartitioned SELECT * FROM transactions')
+        cursor.execute('DROP TABLE transactions')
+        cursor.execute('ALTER TABLE transactions_unpartitioned RENAME TO transactions')
+        cursor.execute('ALTER SEQUENCE transactions_id_seq OWNED BY transactions.id')
+        cursor.execute(
+            'ALTER TABLE transactions ADD CONSTRAINT transactions_user_id_fk_users_id '
+            'FOREIGN KEY (user_id) REFERENCES users (id) DEFERRABLE INITIALLY DEFERRED'
+        )
+        cursor.execute('CREATE INDEX transactions_user_id_idx ON transactions (user_id)')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_ledger'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='transaction',
+            options={'ordering': ['-transaction_date', '-id'], 'verbose_name': 'Transaction', 'verbose_name_plural': 'Transactions'},
+        ),
+        migrations.RunPython(partition_transactions, unpartition_transactions),
+        # Created on the partitioned parent, so every partition inherits it
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', '-transaction_date', '-id'], name='transactions_user_date_idx'),
+        ),
+    ]
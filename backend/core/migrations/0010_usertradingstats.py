@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:49
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_transaction_partitions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserTradingStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trading_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total_bought', models.DecimalField(decimal_places=3, default=0, max_digits=14)),
+                ('total_sold', models.DecimalField(decimal_places=3, default=0, max_digits=14)),
+                ('volume', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('trade_count', models.PositiveIntegerField(default=0)),
+                ('realized_pnl', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('first_trade_at', models.DateTimeField(blank=True, null=True)),
+                ('last_trade_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'User Trading Stats',
+                'verbose_name_plural': 'User Trading Stats',
+                'db_table': 'user_trading_stats',
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_usertradingstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GoldLot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('transaction_id', models.BigIntegerField(blank=True, null=True)),
+                ('grams', models.DecimalField(decimal_places=3, max_digits=10)),
+                ('remaining', models.DecimalField(decimal_places=3, max_digits=10)),
+                ('price_per_gram', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('acquired_at', models.DateTimeField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='gold_lots', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Gold Lot',
+                'verbose_name_plural': 'Gold Lots',
+                'db_table': 'gold_lots',
+                'ordering': ['id'],
+                'indexes': [models.Index(condition=models.Q(('remaining__gt', 0)), fields=['user', 'id'], name='gold_lot_open_idx')],
+            },
+        ),
+    ]
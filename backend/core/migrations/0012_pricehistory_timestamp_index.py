@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_goldlot'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pricehistory',
+            index=models.Index(fields=['-timestamp', '-id'], name='price_history_ts_idx'),
+        ),
+    ]
@@ -1,7 +1,8 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.utils import timezone
-from decimal import Decimal
+from decimal import Decimal, ROUND_HALF_UP
+from datetime import timedelta
 
 
 class User(AbstractUser):
@@ -27,6 +28,11 @@ class User(AbstractUser):
     def __str__(self):
         return self.email
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        from .services import ProfileCacheService
+        ProfileCacheService.invalidate(self.pk)
+
 
 class GoldPrice(models.Model):
     """
@@ -77,7 +83,11 @@ class Transaction(models.Model):
         db_table = 'transactions'
         verbose_name = 'Transaction'
         verbose_name_plural = 'Transactions'
-        ordering = ['-transaction_date']
+        ordering = ['-transaction_date', '-id']
+        indexes = [
+            # History pages: filter(user=...).order_by('-transaction_date', '-id')
+            models.Index(fields=['user', '-transaction_date', '-id'], name='transactions_user_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.transaction_type} {self.gold_weight}g - {self.user.email}"
@@ -148,6 +158,9 @@ class PriceHistory(models.Model):
         verbose_name = 'Price History'
         verbose_name_plural = 'Price History'
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['-timestamp', '-id'], name='price_history_ts_idx'),
+        ]
 
     def __str__(self):
         return f"{self.price_per_baht} THB/baht at {self.timestamp}"
@@ -183,18 +196,12 @@ class Deposit(models.Model):
     def complete_deposit(self):
         """
         Complete the deposit and update user's balance.
-        """
-        if self.status == 'COMPLETED':
-            return False
-
-        self.status = 'COMPLETED'
-        self.save()
 
-        # Update user balance
-        self.user.balance += self.amount
-        self.user.save()
-
-        return True
+        Returns False if the deposit was no longer pending; see
+        ``DepositService.settle``.
+        """
+        from .services import DepositService
+        return DepositService.settle(self)
 
 
 class PriceAlert(models.Model):
@@ -250,3 +257,301 @@ class PriceAlert(models.Model):
             self.save()
             return True
         return False
+
+
+class LimitOrder(models.Model):
+    """
+    Limit order to buy or sell gold once the price reaches ``limit_price``.
+
+    Funds are reserved when the order is placed (cash for a BUY at the limit
+    price, gold for a SELL) and settled at the tick price when it fills.
+    """
+    SIDE_CHOICES = [
+        ('BUY', 'Buy'),
+        ('SELL', 'Sell'),
+    ]
+
+    STATUS_CHOICES = [
+        ('OPEN', 'Open'),
+        ('FILLED', 'Filled'),
+        ('CANCELLED', 'Cancelled'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='limit_orders')
+    side = models.CharField(max_length=4, choices=SIDE_CHOICES)
+    amount = models.DecimalField(max_digits=10, decimal_places=3)  # Gold amount in grams
+    limit_price = models.DecimalField(max_digits=10, decimal_places=2)  # THB/gram
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='OPEN')
+    filled_price = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
+    filled_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'limit_orders'
+        verbose_name = 'Limit Order'
+        verbose_name_plural = 'Limit Orders'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'id'], name='limit_order_status_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.email} - {self.side} {self.amount}g @ {self.limit_price} THB/g ({self.status})"
+
+    @property
+    def reserved_amount(self):
+        """Cash (BUY) or gold (SELL) held back while the order is open."""
+        if self.side == 'BUY':
+            return (self.amount * self.limit_price).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        return self.amount
+
+
+class ConditionalOrder(models.Model):
+    """
+    Market order that executes automatically once the price crosses
+    ``trigger_price``, e.g. a stop-loss (SELL BELOW) or take-profit
+    (SELL ABOVE). Funds are not reserved; an order that cannot be funded
+    when it triggers is marked FAILED.
+    """
+    SIDE_CHOICES = LimitOrder.SIDE_CHOICES
+
+    CONDITION_CHOICES = [
+        ('ABOVE', 'Above'),
+        ('BELOW', 'Below'),
+    ]
+
+    STATUS_CHOICES = [
+        ('ACTIVE', 'Active'),
+        ('EXECUTED', 'Executed'),
+        ('FAILED', 'Failed'),
+        ('CANCELLED', 'Cancelled'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='conditional_orders')
+    side = models.CharField(max_length=4, choices=SIDE_CHOICES)
+    amount = models.DecimalField(max_digits=10, decimal_places=3)  # Gold amount in grams
+    trigger_price = models.DecimalField(max_digits=10, decimal_places=2)  # THB/gram
+    condition = models.CharField(max_length=5, choices=CONDITION_CHOICES)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='ACTIVE')
+    executed_price = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
+    executed_at = models.DateTimeField(blank=True, null=True)
+    failure_reason = models.CharField(max_length=255, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'conditional_orders'
+        verbose_name = 'Conditional Order'
+        verbose_name_plural = 'Conditional Orders'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'id'], name='cond_order_status_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.email} - {self.side} {self.amount}g when {self.condition} {self.trigger_price} THB/g"
+
+
+class RecurringBuyPlan(models.Model):
+    """
+    Recurring (dollar-cost averaging) plan: buy ``amount`` THB of gold every
+    day or week. Due plans are executed in batches by the
+    ``run_recurring_buys`` management command.
+    """
+    FREQUENCY_CHOICES = [
+        ('DAILY', 'Daily'),
+        ('WEEKLY', 'Weekly'),
+    ]
+
+    RUN_STATUS_CHOICES = [
+        ('EXECUTED', 'Executed'),
+        ('INSUFFICIENT_FUNDS', 'Insufficient funds'),
+        ('AMOUNT_TOO_SMALL', 'Amount too small'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='recurring_buy_plans')
+    amount = models.DecimalField(max_digits=12, decimal_places=2)  # THB per run
+    frequency = models.CharField(max_length=6, choices=FREQUENCY_CHOICES)
+    next_run_at = models.DateTimeField(default=timezone.now)
+    is_active = models.BooleanField(default=True)
+    last_run_at = models.DateTimeField(blank=True, null=True)
+    last_run_status = models.CharField(max_length=20, choices=RUN_STATUS_CHOICES, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'recurring_buy_plans'
+        verbose_name = 'Recurring Buy Plan'
+        verbose_name_plural = 'Recurring Buy Plans'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['is_active', 'next_run_at'], name='recurring_buy_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.email} - {self.amount} THB {self.frequency}"
+
+    @property
+    def interval(self):
+        return timedelta(days=7 if self.frequency == 'WEEKLY' else 1)
+
+    def following_run(self, now):
+        """First scheduled run after ``now``; missed periods are skipped."""
+        next_run = self.next_run_at
+        while next_run <= now:
+            next_run += self.interval
+        return next_run
+
+
+class UserTradingStats(models.Model):
+    """
+    Per-user trading totals, updated in the same transaction as each trade
+    and rebuildable from history with ``backfill_trading_stats``.
+
+    Realized P&L follows ``settings.LOT_ACCOUNTING_METHOD`` (see
+    ``core.lots``).
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='trading_stats')
+    total_bought = models.DecimalField(max_digits=14, decimal_places=3, default=0)  # grams
+    total_sold = models.DecimalField(max_digits=14, decimal_places=3, default=0)  # grams
+    volume = models.DecimalField(max_digits=16, decimal_places=2, default=0)  # THB, both sides
+    trade_count = models.PositiveIntegerField(default=0)
+    realized_pnl = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    first_trade_at = models.DateTimeField(blank=True, null=True)
+    last_trade_at = models.DateTimeField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'user_trading_stats'
+        verbose_name = 'User Trading Stats'
+        verbose_name_plural = 'User Trading Stats'
+
+    def __str__(self):
+        return f"{self.user.email} - {self.trade_count} trades"
+
+
+class GoldLot(models.Model):
+    """
+    Gold bought by one transaction, consumed oldest-first by later sells.
+
+    ``remaining`` drops to zero once the lot is sold; fully consumed lots
+    are kept and excluded by the partial index.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='gold_lots')
+    # Plain column: a partitioned transactions table cannot be the target of a FK on id alone
+    transaction_id = models.BigIntegerField(blank=True, null=True)
+    grams = models.DecimalField(max_digits=10, decimal_places=3)
+    remaining = models.DecimalField(max_digits=10, decimal_places=3)
+    price_per_gram = models.DecimalField(max_digits=10, decimal_places=2)
+    acquired_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'gold_lots'
+        verbose_name = 'Gold Lot'
+        verbose_name_plural = 'Gold Lots'
+        ordering = ['id']
+        indexes = [
+            models.Index(
+                fields=['user', 'id'], name='gold_lot_open_idx', condition=models.Q(remaining__gt=0)
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user.email} - {self.remaining}/{self.grams}g @ {self.price_per_gram}"
+
+
+class LedgerAccount(models.Model):
+    """
+    Account in the double-entry ledger.
+
+    Codes identify the owner and asset, e.g. ``user:42:cash``,
+    ``user:42:gold`` or system accounts such as ``house:gold`` and
+    ``external:cash``.
+    """
+    ASSET_CHOICES = [
+        ('CASH', 'Cash (THB)'),
+        ('GOLD', 'Gold (grams)'),
+    ]
+
+    code = models.CharField(max_length=64, unique=True)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, related_name='ledger_accounts', blank=True, null=True)
+    asset = models.CharField(max_length=4, choices=ASSET_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'ledger_accounts'
+        verbose_name = 'Ledger Account'
+        verbose_name_plural = 'Ledger Accounts'
+        ordering = ['code']
+
+    def __str__(self):
+        return self.code
+
+
+class LedgerEntry(models.Model):
+    """
+    Append-only posting to a ledger account.
+
+    Postings sharing a ``journal_id`` form one balanced journal: per asset
+    their amounts sum to zero. Entries are never updated or deleted;
+    corrections are new journals.
+    """
+    ENTRY_TYPES = [
+        ('OPENING', 'Opening balance'),
+        ('DEPOSIT', 'Deposit'),
+        ('TRADE', 'Trade'),
+        ('RESERVE', 'Order reservation'),
+        ('RELEASE', 'Reservation release'),
+        ('ADJUSTMENT', 'Adjustment'),
+    ]
+
+    journal_id = models.UUIDField(db_index=True)
+    account = models.ForeignKey(LedgerAccount, on_delete=models.PROTECT, related_name='entries')
+    amount = models.DecimalField(max_digits=18, decimal_places=3)  # THB or grams, signed
+    entry_type = models.CharField(max_length=10, choices=ENTRY_TYPES)
+    reference = models.CharField(max_length=64, blank=True, default='')  # e.g. 'transaction:12'
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'ledger_entries'
+        verbose_name = 'Ledger Entry'
+        verbose_name_plural = 'Ledger Entries'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['account', 'id'], name='ledger_entry_account_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.account.code} {self.amount:+} ({self.entry_type})"
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise ValueError('Ledger entries are append-only')
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError('Ledger entries are append-only')
+
+
+class LedgerSnapshot(models.Model):
+    """
+    Balance of an account as of ``last_entry_id``. A current balance is the
+    latest snapshot plus the entries posted after it.
+    """
+    account = models.ForeignKey(LedgerAccount, on_delete=models.PROTECT, related_name='snapshots')
+    balance = models.DecimalField(max_digits=18, decimal_places=3)
+    last_entry_id = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'ledger_snapshots'
+        verbose_name = 'Ledger Snapshot'
+        verbose_name_plural = 'Ledger Snapshots'
+        ordering = ['-last_entry_id']
+        indexes = [
+            models.Index(fields=['account', '-last_entry_id'], name='ledger_snapshot_latest_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.account.code} = {self.balance} @ {self.last_entry_id}"
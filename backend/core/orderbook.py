@@ -0,0 +1,190 @@
+"""
+In-memory limit order book and conditional order trigger index.
+
+The price publisher (the process calling ``broadcast_price_update``) keeps
+every open limit order in a price-time-priority book: each side is a sorted
+list of price levels with a FIFO queue per level. A tick only walks the
+levels that cross it, so matching cost is proportional to the fills rather
+than to the number of open orders.
+
+Orders are placed and cancelled through the API in other processes. The
+book picks up new orders incrementally by id on every tick and rebuilds
+from the database every ``settings.ORDER_BOOK_RESYNC_SECONDS`` to shed
+cancelled orders; fills re-check the order status in the database, so a
+stale entry never fills.
+"""
+import bisect
+import time
+from collections import deque
+from decimal import Decimal
+
+from django.conf import settings
+
+from .models import ConditionalOrder, LimitOrder
+
+
+class BookSide:
+    """
+    One side of the book: ascending price levels, each a FIFO queue.
+    """
+
+    def __init__(self):
+        self.prices = []
+        self.levels = {}
+
+    def __len__(self):
+        return sum(len(queue) for queue in self.levels.values())
+
+    def add(self, order):
+        queue = self.levels.get(order.limit_price)
+        if queue is None:
+            bisect.insort(self.prices, order.limit_price)
+            queue = self.levels[order.limit_price] = deque()
+        queue.append(order)
+
+    def pop_level(self, index):
+        price = self.prices.pop(index)
+        return self.levels.pop(price)
+
+
+class SyncedIndex:
+    """
+    Base for in-memory indexes of open orders mirrored from the database.
+
+    Subclasses set ``model``, ``open_status`` and ``fields`` and implement
+    ``_insert``/``clear``. ``sync`` loads rows with an id above the highest
+    seen so far and rebuilds from scratch every
+    ``settings.ORDER_BOOK_RESYNC_SECONDS``.
+    """
+
+    model = None
+    open_status = None
+    fields = ()
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.order_ids = set()
+        self.last_id = 0
+        self.synced_at = None
+
+    def __len__(self):
+        return len(self.order_ids)
+
+    @property
+    def resync_seconds(self):
+        return getattr(settings, 'ORDER_BOOK_RESYNC_SECONDS', 60)
+
+    def add(self, order):
+        if order.id in self.order_ids:
+            return
+        self.order_ids.add(order.id)
+        self.last_id = max(self.last_id, order.id)
+        self._insert(order)
+
+    def _insert(self, order):
+        raise NotImplementedError
+
+    def discard(self, order_id):
+        """Forget an order; its index entry is skipped when reached."""
+        self.order_ids.discard(order_id)
+
+    def sync(self):
+        """Load orders placed since the last sync, rebuilding periodically."""
+        now = time.monotonic()
+        if self.synced_at is None or now - self.synced_at >= self.resync_seconds:
+            self.clear()
+            self.synced_at = now
+        orders = (
+            self.model.objects
+            .filter(status=self.open_status, id__gt=self.last_id)
+            .only(*self.fields)
+            .order_by('id')
+        )
+        for order in orders:
+            self.add(order)
+
+    def _take(self, orders):
+        taken = []
+        for order in orders:
+            if order.id in self.order_ids:
+                self.order_ids.discard(order.id)
+                taken.append(order)
+        return taken
+
+
+class OrderBook(SyncedIndex):
+    """
+    Price-time-priority book of open limit orders.
+
+    Bids fill when the price falls to or below their limit, best (highest)
+    limit first; asks fill when it rises to or above theirs, best (lowest)
+    limit first. Within a level, earlier orders fill first.
+    """
+
+    model = LimitOrder
+    open_status = 'OPEN'
+    fields = ('id', 'user_id', 'side', 'amount', 'limit_price')
+
+    def clear(self):
+        super().clear()
+        self.bids = BookSide()
+        self.asks = BookSide()
+
+    def _insert(self, order):
+        (self.bids if order.side == 'BUY' else self.asks).add(order)
+
+    def match(self, price):
+        """
+        Remove and return every order that crosses ``price``, in priority order.
+        """
+        price = Decimal(str(price))
+        matched = []
+        while self.bids.prices and self.bids.prices[-1] >= price:
+            matched.extend(self._take(self.bids.pop_level(-1)))
+        while self.asks.prices and self.asks.prices[0] <= price:
+            matched.extend(self._take(self.asks.pop_level(0)))
+        return matched
+
+
+class TriggerIndex(SyncedIndex):
+    """
+    Sorted threshold index of active conditional orders.
+
+    ``ABOVE`` orders fire once the price reaches their trigger price and
+    ``BELOW`` orders once it falls to theirs, the same rule as
+    ``PriceAlert.check_alert``. Each condition keeps its thresholds sorted,
+    so a tick only touches the prefix or suffix that fires.
+    """
+
+    model = ConditionalOrder
+    open_status = 'ACTIVE'
+    fields = ('id', 'user_id', 'side', 'amount', 'trigger_price', 'condition')
+
+    def clear(self):
+        super().clear()
+        self.above = []
+        self.below = []
+        self.orders = {}
+
+    def _insert(self, order):
+        self.orders[order.id] = order
+        bisect.insort(self.above if order.condition == 'ABOVE' else self.below, (order.trigger_price, order.id))
+
+    def match(self, price):
+        """
+        Remove and return every order triggered at ``price``, oldest first.
+        """
+        price = Decimal(str(price))
+        # (price, inf) sorts after every entry at exactly ``price``
+        cut = bisect.bisect_right(self.above, (price, float('inf')))
+        fired, self.above = self.above[:cut], self.above[cut:]
+        cut = bisect.bisect_left(self.below, (price, -1))
+        fired, self.below = fired + self.below[cut:], self.below[:cut]
+        ids = sorted(order_id for _, order_id in fired)
+        return self._take(self.orders.pop(order_id) for order_id in ids)
+
+
+order_book = OrderBook()
+trigger_index = TriggerIndex()
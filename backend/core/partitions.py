@@ -0,0 +1,108 @@
+"""
+Monthly range partitions for the ``transactions`` table.
+
+On PostgreSQL ``transactions`` is partitioned by ``transaction_date`` into
+one partition per calendar month (``transactions_p2026_01`` ...), plus a
+default partition that catches rows outside every monthly range. The
+``manage_partitions`` command keeps partitions created ahead of time so new
+trades never land in the default partition.
+
+Other database backends keep a plain table; every helper here is a no-op
+there.
+"""
+from datetime import date, datetime, timezone as dt_timezone
+
+TABLE = 'transactions'
+DEFAULT_PARTITION = f'{TABLE}_default'
+
+
+def is_supported(connection):
+    return connection.vendor == 'postgresql'
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def months_between(first, last):
+    """Every month start from ``first`` to ``last`` inclusive."""
+    months = []
+    month = month_start(first)
+    while month <= month_start(last):
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def partition_name(month):
+    return f'{TABLE}_p{month:%Y_%m}'
+
+
+def _bound(month):
+    # Partition bounds must be literals; the value is a date we built ourselves
+    return "'{}'".format(datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc).isoformat())
+
+
+def existing_partitions(cursor):
+    cursor.execute(
+        """
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = %s
+        ORDER BY child.relname
+        """,
+        [TABLE]
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def create_partition(cursor, month):
+    """
+    Create and attach the partition for ``month``.
+
+    Rows for that month already sitting in the default partition are moved
+    into the new partition before it is attached, otherwise PostgreSQL
+    refuses the attach.
+    """
+    name = partition_name(month)
+    start, end = _bound(month), _bound(add_months(month, 1))
+    cursor.execute(f'CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+    cursor.execute(
+        f"""
+        WITH moved AS (
+            DELETE FROM {DEFAULT_PARTITION}
+            WHERE transaction_date >= {start} AND transaction_date < {end}
+            RETURNING *
+        )
+        INSERT INTO {name} SELECT * FROM moved
+        """
+    )
+    cursor.execute(f'ALTER TABLE {TABLE} ATTACH PARTITION {name} FOR VALUES FROM ({start}) TO ({end})')
+    return name
+
+
+def ensure_partitions(cursor, first, last):
+    """
+    Create any missing monthly partitions from ``first`` to ``last``.
+
+    Returns the names of the partitions created.
+    """
+    existing = set(existing_partitions(cursor))
+    return [
+        create_partition(cursor, month)
+        for month in months_between(first, last)
+        if partition_name(month) not in existing
+    ]
+
+
+def default_partition_range(cursor):
+    """Oldest and newest ``transaction_date`` in the default partition."""
+    cursor.execute(f'SELECT MIN(transaction_date), MAX(transaction_date) FROM {DEFAULT_PARTITION}')
+    return cursor.fetchone()
@@ -0,0 +1,223 @@
+"""
+Live portfolio valuation for connected users.
+
+Each worker process keeps the holdings totals of users with an open
+``portfolio`` subscription in a column-oriented in-memory table. Every price
+tick revalues all rows with one vectorized multiply and pushes the result to
+the users whose value moved by at least ``settings.PORTFOLIO_PUSH_THRESHOLD``.
+
+``value_curve`` computes the historical value series behind the portfolio
+history chart.
+"""
+import logging
+
+import numpy as np
+from django.conf import settings
+from django.db.models import F, Sum
+
+from .fanout import dispatch, hub
+from .models import GoldHolding
+from .ticks import tick_buffer
+
+logger = logging.getLogger(__name__)
+
+
+def holdings_totals_queryset(user_id):
+    return GoldHolding.objects.filter(user_id=user_id)
+
+
+def _totals(result):
+    return float(result['total_amount'] or 0), float(result['total_cost'] or 0)
+
+
+TOTALS_AGGREGATES = {
+    'total_amount': Sum('amount'),
+    'total_cost': Sum(F('amount') * F('avg_price')),
+}
+
+
+def load_totals(user_id):
+    """(total grams, total cost) for a user in one aggregate query."""
+    return _totals(holdings_totals_queryset(user_id).aggregate(**TOTALS_AGGREGATES))
+
+
+async def aload_totals(user_id):
+    return _totals(await holdings_totals_queryset(user_id).aaggregate(**TOTALS_AGGREGATES))
+
+
+def valuation(total_amount, total_cost, price):
+    """
+    Same numbers as GoldHoldingsSummaryView, for one user.
+    """
+    current_value = total_amount * price
+    profit_loss = current_value - total_cost if total_cost > 0 else 0.0
+    profit_loss_percent = (profit_loss / total_cost) * 100 if total_cost > 0 else 0.0
+    return {
+        'total_amount': total_amount,
+        'total_cost': total_cost,
+        'current_value': current_value,
+        'profit_loss': profit_loss,
+        'profit_loss_percent': profit_loss_percent,
+    }
+
+
+def value_curve(grid, trade_times, trade_grams, trade_cash, price_times, prices):
+    """
+    Portfolio value at each grid time, without a per-point loop.
+
+    Holdings are a step function of time: the cumulative sum of signed trade
+    grams, looked up at each grid time with ``np.searchsorted``. Prices are
+    carried forward from the last price at or before each grid time, and the
+    two series are multiplied.
+
+    Args:
+        grid: Grid times (epoch seconds), ascending
+        trade_times: Trade times (epoch seconds), ascending
+        trade_grams: Signed grams per trade (+ buy, - sell)
+        trade_cash: Signed THB per trade (+ paid, - received)
+        price_times: Price times (epoch seconds), ascending
+        prices: Price per gram at each price time
+
+    Returns:
+        tuple: (grams, invested, price, value) arrays over the grid; price
+        and value are NaN before the first known price
+    """
+    grid = np.asarray(grid, dtype=float)
+    traded = np.searchsorted(np.asarray(trade_times, dtype=float), grid, side='right')
+    grams = np.concatenate(([0.0], np.cumsum(np.asarray(trade_grams, dtype=float))))[traded]
+    invested = np.concatenate(([0.0], np.cumsum(np.asarray(trade_cash, dtype=float))))[traded]
+
+    prices = np.asarray(prices, dtype=float)
+    priced = np.searchsorted(np.asarray(price_times, dtype=float), grid, side='right') - 1
+    price = np.where(priced >= 0, prices[np.maximum(priced, 0)] if len(prices) else np.nan, np.nan)
+    return grams, invested, price, grams * price
+
+
+class PortfolioBook:
+    """
+    In-memory holdings table for this process's portfolio subscribers.
+
+    Rows are stored in parallel NumPy arrays (amount, cost, last pushed
+    value); removal swaps the last row into the freed slot so the live rows
+    always occupy ``[:size]``.
+    """
+
+    GROUP = 'gold_price_updates'
+
+    def __init__(self, capacity=64):
+        self.user_ids = []
+        self.rows = {}
+        self.consumers = []
+        self.amounts = np.zeros(capacity)
+        self.costs = np.zeros(capacity)
+        self.last_values = np.full(capacity, np.nan)
+        self.price = None
+
+    @property
+    def size(self):
+        return len(self.user_ids)
+
+    @property
+    def threshold(self):
+        return float(getattr(settings, 'PORTFOLIO_PUSH_THRESHOLD', 1.0))
+
+    def _grow(self):
+        capacity = len(self.amounts) * 2
+        for name, fill in (('amounts', 0.0), ('costs', 0.0), ('last_values', np.nan)):
+            column = np.full(capacity, fill)
+            column[:self.size] = getattr(self, name)[:self.size]
+            setattr(self, name, column)
+
+    async def register(self, user_id, consumer, total_amount, total_cost):
+        """Track ``consumer`` for ``user_id`` and push its current valuation."""
+        if user_id not in self.rows:
+            if self.size == len(self.amounts):
+                self._grow()
+            index = self.size
+            self.rows[user_id] = index
+            self.user_ids.append(user_id)
+            self.consumers.append(set())
+            if index == 0:
+                await hub.subscribe(self.GROUP, self)
+        index = self.rows[user_id]
+        self.consumers[index].add(consumer)
+        if self.price is None:
+            latest = await tick_buffer.alatest()
+            if latest is not None:
+                self.price = float(latest['price_per_gram'])
+        self.amounts[index] = total_amount
+        self.costs[index] = total_cost
+        self.last_values[index] = np.nan
+        if self.price is not None:
+            await self._push(index)
+
+    async def unregister(self, user_id, consumer):
+        """Stop tracking ``consumer``; drop the row when it was the last one."""
+        index = self.rows.get(user_id)
+        if index is None:
+            return
+        self.consumers[index].discard(consumer)
+        if self.consumers[index]:
+            return
+
+        last = self.size - 1
+        if index != last:
+            moved_user = self.user_ids[last]
+            self.user_ids[index] = moved_user
+            self.consumers[index] = self.consumers[last]
+            self.rows[moved_user] = index
+            for column in (self.amounts, self.costs, self.last_values):
+                column[index] = column[last]
+        self.user_ids.pop()
+        self.consumers.pop()
+        del self.rows[user_id]
+        if not self.user_ids:
+            await hub.unsubscribe(self.GROUP, self)
+
+    async def update_holdings(self, user_id, total_amount, total_cost):
+        """Replace a user's totals after a trade and push immediately."""
+        index = self.rows.get(user_id)
+        if index is None:
+            return
+        self.amounts[index] = total_amount
+        self.costs[index] = total_cost
+        self.last_values[index] = np.nan
+        if self.price is not None:
+            await self._push(index)
+
+    def revalue(self, price):
+        """
+        Revalue every row at ``price``.
+
+        Returns:
+            numpy.ndarray: Row indexes whose value moved by at least the
+            push threshold (or that have never been pushed)
+        """
+        size = self.size
+        values = self.amounts[:size] * price
+        last = self.last_values[:size]
+        changed = np.isnan(last) | (np.abs(values - last) >= self.threshold)
+        return np.flatnonzero(changed)
+
+    async def gold_price_update(self, event):
+        """Hub handler: revalue on every tick and push significant changes."""
+        tick = event.get('data', event)
+        price = tick.get('price_per_gram')
+        if price is None or not self.size:
+            return
+        self.price = float(price)
+        for index in self.revalue(self.price):
+            await self._push(int(index))
+
+    async def _push(self, index):
+        data = valuation(float(self.amounts[index]), float(self.costs[index]), self.price)
+        self.last_values[index] = data['current_value']
+        data.update({'type': 'portfolio_update', 'user_id': self.user_ids[index], 'price_per_gram': self.price})
+        for consumer in list(self.consumers[index]):
+            try:
+                await dispatch(consumer, {'type': 'portfolio_update', 'data': data})
+            except Exception as e:
+                logger.error(f"Failed to push portfolio update: {e}")
+
+
+portfolio_book = PortfolioBook()
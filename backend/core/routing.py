@@ -2,6 +2,10 @@ from django.urls import re_path
 from . import consumers
 
 websocket_urlpatterns = [
+    # Multiplexed endpoint: one socket, subscribe/unsubscribe per topic
+    re_path(r'ws/stream/$', consumers.StreamConsumer.as_asgi()),
+
+    # Legacy single-topic endpoints, kept until all clients use ws/stream/
     re_path(r'ws/gold-price/$', consumers.GoldPriceConsumer.as_asgi()),
     re_path(r'ws/alerts/$', consumers.PriceAlertConsumer.as_asgi()),
 ]
@@ -1,6 +1,7 @@
+from django.conf import settings
 from rest_framework import serializers
 from django.contrib.auth.password_validation import validate_password
-from .models import User, Transaction, GoldHolding, PriceHistory, Deposit, PriceAlert
+from .models import User, Transaction, GoldHolding, PriceHistory, Deposit, PriceAlert, LimitOrder, ConditionalOrder, RecurringBuyPlan, UserTradingStats
 
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -49,8 +50,27 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'username', 'email', 'balance')
 
 
+class OwnerEmailField(serializers.EmailField):
+    """
+    Read-only email of the object's owner.
+
+    List endpoints are scoped to ``request.user``, so the owner is taken from
+    the request instead of loading ``obj.user`` once per row.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        user = getattr(self.context.get('request'), 'user', None)
+        if user is not None and user.is_authenticated and instance.user_id == user.pk:
+            return user.email
+        return instance.user.email
+
+
 class TransactionSerializer(serializers.ModelSerializer):
-    user_email = serializers.EmailField(source='user.email', read_only=True)
+    user_email = OwnerEmailField()
 
     class Meta:
         model = Transaction
@@ -62,7 +82,7 @@ class TransactionSerializer(serializers.ModelSerializer):
 
 
 class GoldHoldingSerializer(serializers.ModelSerializer):
-    user_email = serializers.EmailField(source='user.email', read_only=True)
+    user_email = OwnerEmailField()
     current_value = serializers.SerializerMethodField()
     profit_loss = serializers.SerializerMethodField()
     profit_loss_percent = serializers.SerializerMethodField()
@@ -76,11 +96,19 @@ class GoldHoldingSerializer(serializers.ModelSerializer):
                            'current_value', 'profit_loss', 'profit_loss_percent',
                            'created_at', 'updated_at')
 
+    def latest_price_per_gram(self):
+        # Looked up once per serializer; a list reuses its child for every row
+        if not hasattr(self, '_latest_price_per_gram'):
+            self._latest_price_per_gram = (
+                PriceHistory.objects.order_by('-timestamp').values_list('price_per_gram', flat=True).first()
+            )
+        return self._latest_price_per_gram
+
     def get_current_value(self, obj):
         try:
-            latest_price = PriceHistory.objects.order_by('-timestamp').first()
-            if latest_price:
-                return float(obj.amount * latest_price.price_per_gram)
+            price_per_gram = self.latest_price_per_gram()
+            if price_per_gram is not None:
+                return float(obj.amount * price_per_gram)
             return float(obj.total_value)
         except Exception:
             return float(obj.total_value)
@@ -118,7 +146,7 @@ class PriceHistoryCreateSerializer(serializers.ModelSerializer):
 
 
 class DepositSerializer(serializers.ModelSerializer):
-    user_email = serializers.EmailField(source='user.email', read_only=True)
+    user_email = OwnerEmailField()
 
     class Meta:
         model = Deposit
@@ -149,8 +177,8 @@ class PriceAlertSerializer(serializers.ModelSerializer):
     """
     Serializer for PriceAlert model with user email.
     """
-    user_email = serializers.EmailField(source='user.email', read_only=True)
-    user_id = serializers.IntegerField(source='user.id', read_only=True)
+    user_email = OwnerEmailField()
+    user_id = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = PriceAlert
@@ -182,3 +210,130 @@ class PriceAlertUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = PriceAlert
         fields = ('target_price', 'condition', 'is_active')
+
+
+class LimitOrderSerializer(serializers.ModelSerializer):
+    """
+    Serializer for LimitOrder model.
+    """
+    class Meta:
+        model = LimitOrder
+        fields = ('id', 'side', 'amount', 'limit_price', 'status', 'filled_price',
+                  'filled_at', 'created_at', 'updated_at')
+        read_only_fields = fields
+
+
+class LimitOrderCreateSerializer(serializers.ModelSerializer):
+    """
+    Serializer for placing a new LimitOrder.
+    """
+    class Meta:
+        model = LimitOrder
+        fields = ('side', 'amount', 'limit_price')
+
+    def validate_amount(self, value):
+        """Ensure amount is positive."""
+        if value <= 0:
+            raise serializers.ValidationError("Amount must be greater than zero.")
+        return value
+
+    def validate_limit_price(self, value):
+        """Ensure limit price is positive."""
+        if value <= 0:
+            raise serializers.ValidationError("Limit price must be greater than zero.")
+        return value
+
+
+class ConditionalOrderSerializer(serializers.ModelSerializer):
+    """
+    Serializer for ConditionalOrder model.
+    """
+    class Meta:
+        model = ConditionalOrder
+        fields = ('id', 'side', 'amount', 'trigger_price', 'condition', 'status', 'executed_price',
+                  'executed_at', 'failure_reason', 'created_at', 'updated_at')
+        read_only_fields = fields
+
+
+class ConditionalOrderCreateSerializer(serializers.ModelSerializer):
+    """
+    Serializer for creating a new ConditionalOrder.
+    """
+    class Meta:
+        model = ConditionalOrder
+        fields = ('side', 'amount', 'trigger_price', 'condition')
+
+    def validate_amount(self, value):
+        """Ensure amount is positive."""
+        if value <= 0:
+            raise serializers.ValidationError("Amount must be greater than zero.")
+        return value
+
+    def validate_trigger_price(self, value):
+        """Ensure trigger price is positive."""
+        if value <= 0:
+            raise serializers.ValidationError("Trigger price must be greater than zero.")
+        return value
+
+
+class RecurringBuyPlanSerializer(serializers.ModelSerializer):
+    """
+    Serializer for RecurringBuyPlan model.
+    """
+    class Meta:
+        model = RecurringBuyPlan
+        fields = ('id', 'amount', 'frequency', 'next_run_at', 'is_active', 'last_run_at',
+                  'last_run_status', 'created_at', 'updated_at')
+        read_only_fields = ('id', 'last_run_at', 'last_run_status', 'created_at', 'updated_at')
+
+    def validate_amount(self, value):
+        """Ensure amount is positive."""
+        if value <= 0:
+            raise serializers.ValidationError("Amount must be greater than zero.")
+        return value
+
+
+class UserTradingStatsSerializer(serializers.ModelSerializer):
+    """
+    Serializer for UserTradingStats model.
+    """
+    class Meta:
+        model = UserTradingStats
+        fields = ('total_bought', 'total_sold', 'volume', 'trade_count', 'realized_pnl',
+                  'first_trade_at', 'last_trade_at')
+        read_only_fields = fields
+
+
+class TradeOrderSerializer(serializers.Serializer):
+    """
+    One market order within a batch trade.
+    """
+    type = serializers.ChoiceField(choices=Transaction.TRANSACTION_TYPES)
+    amount = serializers.DecimalField(max_digits=10, decimal_places=3)
+
+    def validate_amount(self, value):
+        """Ensure amount is positive."""
+        if value <= 0:
+            raise serializers.ValidationError("Amount must be greater than zero.")
+        return value
+
+
+class QuoteRequestSerializer(TradeOrderSerializer):
+    """
+    Serializer for requesting a trade quote.
+    """
+
+
+class BatchTradeSerializer(serializers.Serializer):
+    """
+    Serializer for the batch trade endpoint.
+    """
+    orders = TradeOrderSerializer(many=True, allow_empty=False)
+
+    def validate_orders(self, value):
+        """Cap the batch size."""
+        if len(value) > settings.BATCH_TRADE_MAX_ORDERS:
+            raise serializers.ValidationError(
+                f"A batch may contain at most {settings.BATCH_TRADE_MAX_ORDERS} orders."
+            )
+        return value
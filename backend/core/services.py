@@ -2,14 +2,47 @@
 Services for Gold Trader application.
 """
 import logging
+import uuid
+from collections import Counter, defaultdict
+from itertools import groupby
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal, ROUND_DOWN, ROUND_HALF_UP
+import numpy as np
 from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.cache import cache
 from asgiref.sync import async_to_sync
+from django.db import transaction
+from django.db.models import (
+    Case, DateTimeField, DecimalField, F, IntegerField, Max, Min, OuterRef, Q, Subquery, Sum, Value, When,
+)
+from django.db.models.functions import Coalesce
 from django.utils import timezone
-from .models import PriceAlert, PriceHistory
+from .fanout import envelope, fanout_layer_alias, is_fanout_group
+from .models import (
+    ConditionalOrder, Deposit, GoldHolding, GoldLot, LedgerAccount, LedgerEntry, LedgerSnapshot, LimitOrder, PriceAlert,
+    PriceHistory, RecurringBuyPlan, Transaction, User, UserTradingStats,
+)
+from . import lots, portfolio
+from .orderbook import order_book, trigger_index
+from .ticks import tick_buffer
 
 logger = logging.getLogger(__name__)
 
 
+def _group_send(group, event):
+    """
+    Send ``event`` to ``group``, routing broadcast groups through the
+    per-process fan-out hub (see core.fanout).
+    """
+    if is_fanout_group(group):
+        channel_layer = get_channel_layer(fanout_layer_alias())
+        event = envelope(group, event)
+    else:
+        channel_layer = get_channel_layer()
+    async_to_sync(channel_layer.group_send)(group, event)
+
+
 class PriceAlertService:
     """
     Service for managing price alerts.
@@ -83,6 +116,25 @@ class PriceAlertService:
         except Exception as e:
             logger.error(f"Failed to send alert notification: {e}")
 
+    @staticmethod
+    def build_price_message(price_data):
+        """
+        Build the client-facing payload for a price tick.
+
+        Args:
+            price_data (dict): Same keys as broadcast_price_update
+
+        Returns:
+            dict: JSON-serializable price message
+        """
+        return {
+            'type': 'gold_price_update',
+            'price_per_gram': float(price_data.get('price_per_gram', 0)),
+            'price_per_baht': float(price_data.get('price_per_baht', 0)),
+            'currency': price_data.get('currency', 'THB'),
+            'timestamp': price_data.get('timestamp', timezone.now()).isoformat(),
+        }
+
     @staticmethod
     def broadcast_price_update(price_data):
         """
@@ -96,18 +148,14 @@ class PriceAlertService:
                 - timestamp: datetime
         """
         try:
-            channel_layer = get_channel_layer()
-
-            message = {
-                'type': 'gold_price_update',
-                'price_per_gram': float(price_data.get('price_per_gram', 0)),
-                'price_per_baht': float(price_data.get('price_per_baht', 0)),
-                'currency': price_data.get('currency', 'THB'),
-                'timestamp': price_data.get('timestamp', timezone.now()).isoformat(),
-            }
+            message = PriceAlertService.build_price_message(price_data)
+            try:
+                message = tick_buffer.append(message)
+            except Exception as e:
+                logger.error(f"Failed to record tick sequence: {e}")
 
             # Broadcast to all gold price subscribers
-            async_to_sync(channel_layer.group_send)(
+            _group_send(
                 'gold_price_updates',
                 {
                     'type': 'gold_price_update',
@@ -119,6 +167,1761 @@ class PriceAlertService:
             current_price = price_data.get('price_per_gram')
             if current_price:
                 PriceAlertService.check_and_trigger_alerts(current_price)
+                try:
+                    LimitOrderService.match_tick(current_price)
+                except Exception as e:
+                    logger.error(f"Failed to match limit orders: {e}")
+                try:
+                    ConditionalOrderService.match_tick(current_price)
+                except Exception as e:
+                    logger.error(f"Failed to execute conditional orders: {e}")
 
         except Exception as e:
             logger.error(f"Failed to broadcast price update: {e}")
+
+
+def _versioned_get_many(key, *extra_keys):
+    """
+    Read the entry at ``key`` and ``extra_keys`` in one round trip.
+
+    Entries are stored with the version token current when their data was
+    loaded (see ``_versioned_set``); an entry whose token is no longer
+    current is treated as a miss.
+
+    Returns:
+        tuple: (entry value or None, current version, ``get_many`` result)
+    """
+    version_key = f'{key}:version'
+    found = cache.get_many([key, version_key, *extra_keys])
+    version = found.get(version_key)
+    if version is None:
+        cache.add(version_key, uuid.uuid4().hex, timeout=None)
+        version = cache.get(version_key)
+    entry = found.get(key)
+    if entry is None or entry['version'] != version:
+        return None, version, found
+    return entry['value'], version, found
+
+
+def _versioned_set(key, version, value, timeout):
+    """Store ``value``, loaded after reading ``version``, at ``key``."""
+    cache.set(key, {'version': version, 'value': value}, timeout=timeout)
+
+
+def _bump_version(key):
+    """Make every entry stored at ``key`` so far stale."""
+    cache.set(f'{key}:version', uuid.uuid4().hex, timeout=None)
+
+
+class ProfileCacheService:
+    """
+    Per-user cache of the profile row, balance included.
+
+    Balance polling is the busiest authenticated endpoint, so the wallet and
+    profile views read this instead of loading the user on every request
+    (see ``CachedUserJWTAuthentication``). Entries are versioned: every
+    balance change pushes a wallet update on commit, and it and
+    ``User.save`` replace the user's version token, so an entry loaded
+    before the change is never served after it, whichever order concurrent
+    loads and commits finish in.
+    """
+
+    KEY = 'profile:{}'
+    FIELDS = (
+        'id', 'username', 'email', 'first_name', 'last_name', 'phone_number', 'date_of_birth',
+        'balance', 'is_verified', 'is_active', 'is_staff', 'is_superuser', 'created_at', 'updated_at',
+    )
+
+    @staticmethod
+    def _load(user_id):
+        return User.objects.filter(pk=user_id).values(*ProfileCacheService.FIELDS).first()
+
+    @staticmethod
+    def get(user_id):
+        """
+        The user's cached profile, loading it on a miss.
+
+        Returns:
+            dict: Values of ``FIELDS``, or None if the user does not exist
+        """
+        key = ProfileCacheService.KEY.format(user_id)
+        profile, version, _ = _versioned_get_many(key)
+        if profile is None:
+            profile = ProfileCacheService._load(user_id)
+            if profile is not None:
+                _versioned_set(key, version, profile, settings.PROFILE_CACHE_TTL)
+        return profile
+
+    @staticmethod
+    def refresh(user_id):
+        """Drop the user's entry and return a freshly loaded profile."""
+        _bump_version(ProfileCacheService.KEY.format(user_id))
+        return ProfileCacheService.get(user_id)
+
+    @staticmethod
+    def invalidate(user_id):
+        """Drop the user's entry now and again once the transaction commits."""
+        key = ProfileCacheService.KEY.format(user_id)
+        _bump_version(key)
+        transaction.on_commit(lambda: _bump_version(key))
+
+    @staticmethod
+    def user(user_id):
+        """
+        A ``User`` built from the cached profile, without a database query.
+
+        Fields outside ``FIELDS`` (password, permissions) are deferred, so
+        anything that needs them, or saves the user, should load the row.
+
+        Returns:
+            User: Or None if the user does not exist
+        """
+        profile = ProfileCacheService.get(user_id)
+        if profile is None:
+            return None
+        # from_db expects values in model field order
+        fields = [f.attname for f in User._meta.concrete_fields if f.attname in profile]
+        return User.from_db('default', fields, [profile[name] for name in fields])
+
+
+class DashboardCacheService:
+    """
+    Per-user cache of the dashboard payload.
+
+    An entry is only served while the latest tick is the one it was built
+    at, so price moves rebuild it. The user's own changes (trades, deposits,
+    holdings edits, alerts) drop it through ``invalidate``.
+    """
+
+    KEY = 'dashboard:{}'
+
+    @staticmethod
+    def get(user_id, seq):
+        """The cached dashboard built at tick ``seq``, or None."""
+        entry = cache.get(DashboardCacheService.KEY.format(user_id))
+        if entry is not None and entry['seq'] == seq:
+            return entry['data']
+        return None
+
+    @staticmethod
+    def set(user_id, seq, data):
+        cache.set(DashboardCacheService.KEY.format(user_id), {'seq': seq, 'data': data},
+                  timeout=settings.DASHBOARD_CACHE_TTL)
+
+    @staticmethod
+    def invalidate(user_id):
+        cache.delete(DashboardCacheService.KEY.format(user_id))
+
+
+class HoldingsTotalsCacheService:
+    """
+    Per-user cache of the holdings totals behind the holdings summary.
+
+    Only the price-independent totals (grams held, cost basis) are cached,
+    so the entry survives price ticks and the current price is applied on
+    read. Entries are versioned like ``ProfileCacheService``'s: every
+    holdings change pushes ``send_holdings_changed`` after commit, which
+    replaces the version token, so totals loaded before the change are
+    never served after it.
+    """
+
+    KEY = 'holdings_totals:{}'
+
+    @staticmethod
+    def _load(user_id):
+        totals = portfolio.holdings_totals_queryset(user_id).aggregate(**portfolio.TOTALS_AGGREGATES)
+        return {'amount': totals['total_amount'] or Decimal('0'), 'cost': totals['total_cost'] or Decimal('0')}
+
+    @staticmethod
+    def get_with_tick(user_id):
+        """
+        The user's holdings totals and the latest tick, in one cache round trip.
+
+        Returns:
+            tuple: (``{'amount', 'cost'}``, latest tick or None)
+        """
+        key = HoldingsTotalsCacheService.KEY.format(user_id)
+        totals, version, found = _versioned_get_many(key, tick_buffer.LATEST_KEY)
+        if totals is None:
+            totals = HoldingsTotalsCacheService._load(user_id)
+            _versioned_set(key, version, totals, settings.HOLDINGS_TOTALS_CACHE_TTL)
+        return totals, found.get(tick_buffer.LATEST_KEY)
+
+    @staticmethod
+    def invalidate(user_id):
+        _bump_version(HoldingsTotalsCacheService.KEY.format(user_id))
+
+
+class PortfolioHistoryService:
+    """
+    A user's portfolio value over time, for the history chart.
+
+    Each range is sampled on a fixed grid; ``portfolio.value_curve`` joins
+    the user's trades with the price in effect at each grid time, so a chart
+    costs two queries however many points it has, and reads at most one
+    price row per point however many ticks the range holds. Results are cached
+    per user and range until the grid advances to its next point or the
+    user's holdings change.
+    """
+
+    KEY = 'portfolio_history:{}:{}'
+    # Range name -> (span, resolution)
+    RANGES = {
+        '1d': (timedelta(days=1), timedelta(minutes=15)),
+        '1w': (timedelta(days=7), timedelta(hours=1)),
+        '1m': (timedelta(days=30), timedelta(hours=6)),
+        '3m': (timedelta(days=90), timedelta(days=1)),
+        '1y': (timedelta(days=365), timedelta(days=1)),
+    }
+    DEFAULT_RANGE = '1m'
+
+    @staticmethod
+    def get(user_id, range_name, now=None):
+        """
+        The user's value curve over ``range_name``, cached.
+
+        Raises:
+            KeyError: If ``range_name`` is not one of ``RANGES``
+        """
+        span, step = PortfolioHistoryService.RANGES[range_name]
+        now = now or timezone.now()
+        point = int(now.timestamp() // step.total_seconds())
+        key = PortfolioHistoryService.KEY.format(user_id, range_name)
+        entry = cache.get(key)
+        if entry is not None and entry['point'] == point:
+            return entry['data']
+        data = PortfolioHistoryService.build(user_id, span, step, now)
+        data['range'] = range_name
+        cache.set(key, {'point': point, 'data': data}, timeout=int(step.total_seconds()))
+        return data
+
+    @staticmethod
+    def build(user_id, span, step, now):
+        """
+        Sample the user's portfolio every ``step`` over the ``span`` ending at ``now``.
+
+        Returns:
+            dict: ``resolution_seconds`` and ``points``, each with the price,
+            grams held, net cash invested and value at that time
+        """
+        trades = list(
+            Transaction.objects.filter(user_id=user_id, status='COMPLETED', transaction_date__lte=now)
+            .order_by('transaction_date', 'id')
+            .values_list('transaction_date', 'transaction_type', 'gold_weight', 'total_amount')
+        )
+        grid = now.timestamp() - step.total_seconds() * np.arange(int(span / step), -1, -1)
+        # Only the last price at or before each grid time is sampled, so
+        # fetch just those: one index lookup per point, not every tick in the span
+        sampled = Q()
+        for t in grid.tolist():
+            at = datetime.fromtimestamp(t, tz=dt_timezone.utc)
+            last = PriceHistory.objects.filter(timestamp__lte=at).order_by('-timestamp', '-id').values('pk')[:1]
+            sampled |= Q(pk=Subquery(last))
+        price_rows = list(
+            PriceHistory.objects.filter(sampled).order_by('timestamp', 'id').values_list('timestamp', 'price_per_gram')
+        )
+
+        sign = np.array([1.0 if side == 'BUY' else -1.0 for _, side, _, _ in trades])
+        grams, invested, price, value = portfolio.value_curve(
+            grid,
+            [date.timestamp() for date, _, _, _ in trades],
+            sign * np.array([float(weight) for _, _, weight, _ in trades]),
+            sign * np.array([float(total) for _, _, _, total in trades]),
+            [timestamp.timestamp() for timestamp, _ in price_rows],
+            [float(price_per_gram) for _, price_per_gram in price_rows],
+        )
+
+        columns = zip(grid.tolist(), price.round(2).tolist(), grams.round(3).tolist(),
+                      invested.round(2).tolist(), value.round(2).tolist())
+        return {
+            'resolution_seconds': int(step.total_seconds()),
+            'points': [
+                {
+                    'timestamp': datetime.fromtimestamp(t, tz=dt_timezone.utc).isoformat(),
+                    # NaN before the first known price
+                    'price_per_gram': None if np.isnan(p) else p,
+                    'gold_grams': g,
+                    'invested': i,
+                    'value': None if np.isnan(v) else v,
+                }
+                for t, p, g, i, v in columns
+            ],
+        }
+
+    @staticmethod
+    def invalidate(user_id):
+        cache.delete_many([PortfolioHistoryService.KEY.format(user_id, name) for name in PortfolioHistoryService.RANGES])
+
+
+class UserUpdateService:
+    """
+    Service for pushing per-user wallet and portfolio updates.
+    """
+
+    @staticmethod
+    def send_wallet_update(user_id):
+        """
+        Push the user's current cash balance to their wallet topic.
+
+        Called on commit after every balance change, so it also rewrites the
+        user's ProfileCacheService entry and drops their cached dashboard.
+
+        Args:
+            user_id (int): User whose balance changed
+        """
+        try:
+            DashboardCacheService.invalidate(user_id)
+            profile = ProfileCacheService.refresh(user_id)
+            balance = profile['balance'] if profile else None
+            channel_layer = get_channel_layer()
+            async_to_sync(channel_layer.group_send)(
+                f"user_{user_id}_wallet",
+                {
+                    'type': 'wallet_update',
+                    'data': {
+                        'type': 'wallet_update',
+                        'user_id': user_id,
+                        'balance': float(balance or 0),
+                        'timestamp': timezone.now().isoformat(),
+                    }
+                }
+            )
+        except Exception as e:
+            logger.error(f"Failed to send wallet update: {e}")
+
+    @staticmethod
+    def send_holdings_changed(user_id):
+        """
+        Tell the user's portfolio subscribers to reload holdings totals.
+
+        Args:
+            user_id (int): User whose holdings changed
+        """
+        try:
+            DashboardCacheService.invalidate(user_id)
+            HoldingsTotalsCacheService.invalidate(user_id)
+            PortfolioHistoryService.invalidate(user_id)
+            channel_layer = get_channel_layer()
+            async_to_sync(channel_layer.group_send)(
+                f"user_{user_id}_portfolio",
+                {'type': 'portfolio_holdings_changed', 'user_id': user_id}
+            )
+        except Exception as e:
+            logger.error(f"Failed to send holdings change: {e}")
+
+
+class LedgerService:
+    """
+    Service for the append-only double-entry ledger.
+
+    Every change to a user's cash or gold is posted as a balanced journal:
+    per asset the postings sum to zero, with the other side on a system
+    account (``house`` for trades, ``external`` for deposits, ``escrow`` for
+    open order reservations, ``adjustment`` for manual holding edits,
+    ``equity:opening`` for balances that predate the ledger).
+
+    The ledger is the audit trail, not the source of balances:
+    ``User.balance`` and ``GoldHolding.amount`` are updated in the same
+    transaction and stay authoritative for balance reads and conditional
+    debits, whose ``WHERE balance >= x`` UPDATE checks and debits in one
+    statement without a lock. ``verify`` checks those projections against
+    the ledger's snapshot-plus-tail balances.
+    """
+
+    HOUSE_CASH = 'house:cash'
+    HOUSE_GOLD = 'house:gold'
+    EXTERNAL_CASH = 'external:cash'
+    ESCROW_CASH = 'escrow:cash'
+    ESCROW_GOLD = 'escrow:gold'
+    ADJUSTMENT_GOLD = 'adjustment:gold'
+    OPENING_CASH = 'equity:opening:cash'
+    OPENING_GOLD = 'equity:opening:gold'
+
+    @staticmethod
+    def cash(user_id):
+        return f'user:{user_id}:cash'
+
+    @staticmethod
+    def gold(user_id):
+        return f'user:{user_id}:gold'
+
+    @staticmethod
+    def _account_fields(code):
+        parts = code.split(':')
+        user_id = int(parts[1]) if parts[0] == 'user' else None
+        return {'code': code, 'user_id': user_id, 'asset': parts[-1].upper()}
+
+    @staticmethod
+    def account_ids(codes):
+        """Map account codes to ids, opening accounts on first use."""
+        codes = set(codes)
+        ids = dict(LedgerAccount.objects.filter(code__in=codes).values_list('code', 'id'))
+        missing = codes - ids.keys()
+        if missing:
+            LedgerAccount.objects.bulk_create(
+                [LedgerAccount(**LedgerService._account_fields(code)) for code in missing],
+                ignore_conflicts=True,
+            )
+            ids.update(LedgerAccount.objects.filter(code__in=missing).values_list('code', 'id'))
+        return ids
+
+    @staticmethod
+    def post(entry_type, reference, postings):
+        """
+        Post one balanced journal.
+
+        Args:
+            entry_type (str): One of LedgerEntry.ENTRY_TYPES
+            reference (str): What the journal records, e.g. 'transaction:12'
+            postings (list): ``(account code, signed amount)`` pairs
+        """
+        LedgerService.post_many([(entry_type, reference, postings)])
+
+    @staticmethod
+    def post_many(journals):
+        """
+        Post several journals with one account lookup and one bulk insert.
+
+        Raises:
+            ValueError: If a journal does not balance per asset
+        """
+        journals = [(entry_type, reference, [p for p in postings if p[1]]) for entry_type, reference, postings in journals]
+        ids = LedgerService.account_ids(code for _, _, postings in journals for code, _ in postings)
+        now = timezone.now()
+        entries = []
+        for entry_type, reference, postings in journals:
+            totals = defaultdict(Decimal)
+            for code, amount in postings:
+                totals[code.rsplit(':', 1)[1]] += amount
+            if any(totals.values()):
+                raise ValueError(f'Unbalanced ledger journal {reference}: {dict(totals)}')
+            journal_id = uuid.uuid4()
+            entries.extend(
+                LedgerEntry(journal_id=journal_id, account_id=ids[code], amount=amount,
+                            entry_type=entry_type, reference=reference, created_at=now)
+                for code, amount in postings
+            )
+        LedgerEntry.objects.bulk_create(entries)
+
+    @staticmethod
+    def trade(user_id, side, grams, total):
+        """Postings for a trade settled against the house."""
+        sign = 1 if side == 'BUY' else -1
+        return [
+            (LedgerService.cash(user_id), -sign * total),
+            (LedgerService.HOUSE_CASH, sign * total),
+            (LedgerService.HOUSE_GOLD, -sign * grams),
+            (LedgerService.gold(user_id), sign * grams),
+        ]
+
+    @staticmethod
+    def deposit(user_id, amount):
+        """Postings for cash arriving from outside the platform."""
+        return [
+            (LedgerService.EXTERNAL_CASH, -amount),
+            (LedgerService.cash(user_id), amount),
+        ]
+
+    @staticmethod
+    def reservation(order):
+        """Postings moving a limit order's reserved funds into escrow."""
+        user_account, escrow = (
+            (LedgerService.cash(order.user_id), LedgerService.ESCROW_CASH) if order.side == 'BUY'
+            else (LedgerService.gold(order.user_id), LedgerService.ESCROW_GOLD)
+        )
+        return [(user_account, -order.reserved_amount), (escrow, order.reserved_amount)]
+
+    @staticmethod
+    def release(order):
+        """Postings returning a limit order's reservation from escrow."""
+        return [(code, -amount) for code, amount in LedgerService.reservation(order)]
+
+    @staticmethod
+    def record_trade(trans):
+        LedgerService.post('TRADE', f'transaction:{trans.pk}', LedgerService.trade(
+            trans.user_id, trans.transaction_type, trans.gold_weight, trans.total_amount
+        ))
+
+    @staticmethod
+    def record_trades(records):
+        LedgerService.post_many([
+            ('TRADE', f'transaction:{trans.pk}',
+             LedgerService.trade(trans.user_id, trans.transaction_type, trans.gold_weight, trans.total_amount))
+            for trans in records
+        ])
+
+    @staticmethod
+    def record_deposit(deposit):
+        LedgerService.post('DEPOSIT', f'deposit:{deposit.pk}', LedgerService.deposit(deposit.user_id, deposit.amount))
+
+    @staticmethod
+    def record_gold_adjustment(user_id, grams, reference):
+        """Postings for a holding edited directly rather than traded."""
+        LedgerService.post('ADJUSTMENT', reference, [
+            (LedgerService.ADJUSTMENT_GOLD, -grams),
+            (LedgerService.gold(user_id), grams),
+        ])
+
+    @staticmethod
+    def balance(code):
+        """
+        Current balance of an account: latest snapshot plus later entries.
+        """
+        return LedgerService.balances([code]).get(code, Decimal('0.000'))
+
+    @staticmethod
+    def balances(codes):
+        """
+        Current balances of several accounts in one query, each its latest
+        snapshot plus the entries posted after it.
+
+        Returns:
+            dict: Account code -> balance, for the accounts that exist
+        """
+        latest = LedgerSnapshot.objects.filter(account=OuterRef('pk')).order_by('-last_entry_id')
+        tail = (
+            LedgerEntry.objects.filter(account=OuterRef('pk'), id__gt=OuterRef('snapshot_entry_id'))
+            .order_by().values('account').annotate(total=Sum('amount')).values('total')
+        )
+        amount = DecimalField(max_digits=18, decimal_places=3)
+        accounts = (
+            LedgerAccount.objects.filter(code__in=codes)
+            .annotate(
+                snapshot_balance=Coalesce(
+                    Subquery(latest.values('balance')[:1]), Value(Decimal('0')), output_field=amount,
+                ),
+                snapshot_entry_id=Coalesce(Subquery(latest.values('last_entry_id')[:1]), Value(0)),
+            )
+            .annotate(tail=Coalesce(Subquery(tail), Value(Decimal('0')), output_field=amount))
+            .values_list('code', 'snapshot_balance', 'tail')
+        )
+        # Entries have 3 decimal places; SQLite sums them as floats
+        return {
+            code: (Decimal(snapshot) + Decimal(tail)).quantize(Decimal('0.001'))
+            for code, snapshot, tail in accounts
+        }
+
+    @staticmethod
+    def _projection_gaps(users):
+        """
+        How far the projections of ``users`` (``(user_id, balance)`` pairs)
+        are ahead of the ledger.
+
+        Returns:
+            dict: User id -> ``(cash, grams)``
+        """
+        user_ids = [pk for pk, _ in users]
+        gold = dict(
+            GoldHolding.objects.filter(user_id__in=user_ids).values('user_id')
+            .annotate(total=Sum('amount')).values_list('user_id', 'total')
+        )
+        ledger = LedgerService.balances(
+            code for pk in user_ids for code in (LedgerService.cash(pk), LedgerService.gold(pk))
+        )
+        zero = Decimal('0')
+        return {
+            pk: (
+                balance - ledger.get(LedgerService.cash(pk), zero),
+                (gold.get(pk) or zero) - ledger.get(LedgerService.gold(pk), zero),
+            )
+            for pk, balance in users
+        }
+
+    @staticmethod
+    def snapshot(lag_seconds=None):
+        """
+        Snapshot every account that has entries since its last snapshot.
+
+        Only entries older than ``lag_seconds`` are included, so entries of
+        transactions still in flight (which may commit with a lower id than
+        an already visible entry) are not skipped.
+
+        Returns:
+            int: Number of snapshots written
+        """
+        if lag_seconds is None:
+            lag_seconds = settings.LEDGER_SNAPSHOT_LAG_SECONDS
+        horizon = timezone.now() - timedelta(seconds=lag_seconds)
+        upto = LedgerEntry.objects.filter(created_at__lte=horizon).aggregate(last=Max('id'))['last']
+        if upto is None:
+            return 0
+
+        latest = LedgerSnapshot.objects.filter(account=OuterRef('pk')).order_by('-last_entry_id')
+        accounts = LedgerAccount.objects.annotate(
+            snapshot_balance=Subquery(latest.values('balance')[:1]),
+            snapshot_entry_id=Subquery(latest.values('last_entry_id')[:1]),
+        )
+        snapshots = []
+        for account in accounts:
+            since = account.snapshot_entry_id or 0
+            if since >= upto:
+                continue
+            tail = account.entries.filter(id__gt=since, id__lte=upto).aggregate(total=Sum('amount'))['total']
+            if tail is None:
+                continue
+            balance = (account.snapshot_balance or Decimal('0')) + tail
+            snapshots.append(LedgerSnapshot(
+                account=account, balance=balance.quantize(Decimal('0.001')), last_entry_id=upto
+            ))
+        LedgerSnapshot.objects.bulk_create(snapshots)
+        return len(snapshots)
+
+    @staticmethod
+    def open_balances(batch_size=1000):
+        """
+        Post opening balances for cash and gold that predate the ledger.
+
+        Each user's opening journal is the difference between their
+        ``User.balance`` / ``GoldHolding`` projection and what the ledger
+        already records for them, so users whose accounts were opened by a
+        trade or deposit before this ran are covered, and a rerun posts
+        nothing. Users are locked a batch at a time while their difference
+        is taken, so a concurrent trade lands wholly before or after it.
+
+        Returns:
+            int: Number of users opened
+        """
+        opened = 0
+        last_id = 0
+        while True:
+            with transaction.atomic():
+                users = list(
+                    User.objects.select_for_update().filter(pk__gt=last_id).order_by('pk')
+                    .values_list('pk', 'balance')[:batch_size]
+                )
+                if not users:
+                    break
+                last_id = users[-1][0]
+                journals = [
+                    ('OPENING', f'user:{user_id}', [
+                        (LedgerService.OPENING_CASH, -cash),
+                        (LedgerService.cash(user_id), cash),
+                        (LedgerService.OPENING_GOLD, -grams),
+                        (LedgerService.gold(user_id), grams),
+                    ])
+                    for user_id, (cash, grams) in LedgerService._projection_gaps(users).items()
+                    if cash or grams
+                ]
+                LedgerService.post_many(journals)
+                opened += len(journals)
+        return opened
+
+    @staticmethod
+    def verify(batch_size=1000):
+        """
+        Check every user's balance projections against the ledger.
+
+        Users are locked a batch at a time, as in ``open_balances``, so a
+        concurrent trade is seen in both or in neither.
+
+        Returns:
+            list: ``(user_id, asset, projection gap)`` for every mismatch
+        """
+        mismatches = []
+        last_id = 0
+        while True:
+            with transaction.atomic():
+                users = list(
+                    User.objects.select_for_update().filter(pk__gt=last_id).order_by('pk')
+                    .values_list('pk', 'balance')[:batch_size]
+                )
+                if not users:
+                    break
+                last_id = users[-1][0]
+                for user_id, (cash, grams) in LedgerService._projection_gaps(users).items():
+                    mismatches.extend(
+                        (user_id, asset, gap) for asset, gap in (('CASH', cash), ('GOLD', grams)) if gap
+                    )
+        return mismatches
+
+
+class TradeError(Exception):
+    """
+    Raised when a trade cannot be executed. The message is user-facing.
+    """
+
+
+class TradeService:
+    """
+    Service for executing gold trades.
+
+    Balances and holdings are changed with single conditional UPDATE
+    statements (``balance = balance - x WHERE balance >= x``) rather than
+    read-modify-write saves, so concurrent trades by the same user cannot
+    overdraw and no row lock is held across Python code. Batches are the
+    exception: they lock the user's rows while checking their orders.
+    """
+
+    TRADE_TYPES = ('BUY', 'SELL')
+
+    @staticmethod
+    def debit_cash(user_id, amount):
+        """
+        Debit ``amount`` THB if the balance covers it.
+
+        Returns:
+            bool: True if the balance was debited
+        """
+        return User.objects.filter(pk=user_id, balance__gte=amount).update(
+            balance=F('balance') - amount,
+            updated_at=timezone.now(),
+        ) == 1
+
+    @staticmethod
+    def credit_cash(user_id, amount):
+        """Credit ``amount`` THB to the user's balance."""
+        User.objects.filter(pk=user_id).update(
+            balance=F('balance') + amount,
+            updated_at=timezone.now(),
+        )
+
+    @staticmethod
+    def _holding(user_id):
+        """The user's primary (oldest) holding row, as an UPDATE target."""
+        first_id = GoldHolding.objects.filter(user_id=user_id).order_by('id').values('id')[:1]
+        return GoldHolding.objects.filter(pk=Subquery(first_id))
+
+    @staticmethod
+    def add_gold(user_id, amount, price_per_gram):
+        """
+        Add ``amount`` grams bought at ``price_per_gram``, folding the cost
+        into the running average price.
+        """
+        cost = amount * price_per_gram
+        updated = TradeService._holding(user_id).update(
+            avg_price=(F('amount') * F('avg_price') + cost) / (F('amount') + amount),
+            total_value=F('amount') * F('avg_price') + cost,
+            amount=F('amount') + amount,
+            updated_at=timezone.now(),
+        )
+        if not updated:
+            GoldHolding.objects.create(user_id=user_id, amount=amount, avg_price=price_per_gram)
+
+    @staticmethod
+    def remove_gold(user_id, amount):
+        """
+        Remove ``amount`` grams if the holding covers it.
+
+        Returns:
+            bool: True if the holding was reduced
+        """
+        return TradeService._holding(user_id).filter(amount__gte=amount).update(
+            amount=F('amount') - amount,
+            total_value=(F('amount') - amount) * F('avg_price'),
+            updated_at=timezone.now(),
+        ) == 1
+
+    @staticmethod
+    def reserve_gold(user_id, amount):
+        """
+        Remove ``amount`` grams or raise TradeError explaining why not.
+        """
+        if not TradeService.remove_gold(user_id, amount):
+            if GoldHolding.objects.filter(user_id=user_id).exists():
+                raise TradeError('จำนวนทองไม่เพียงพอ')
+            raise TradeError('คุณยังไม่มีทองในครอบครอง')
+
+    @staticmethod
+    def return_gold(user_id, amount):
+        """Put back ``amount`` grams reserved earlier, keeping the average price."""
+        updated = TradeService._holding(user_id).update(
+            amount=F('amount') + amount,
+            total_value=(F('amount') + amount) * F('avg_price'),
+            updated_at=timezone.now(),
+        )
+        return updated == 1
+
+    @staticmethod
+    def execute(user, trade_type, amount, price_per_gram):
+        """
+        Execute a market trade at ``price_per_gram``.
+
+        Args:
+            user (User): Trading user
+            trade_type (str): 'BUY' or 'SELL'
+            amount (Decimal): Gold amount in grams
+            price_per_gram (Decimal): Execution price
+
+        Returns:
+            Transaction: The completed transaction
+
+        Raises:
+            TradeError: If the trade type is invalid or funds are insufficient
+        """
+        if trade_type not in TradeService.TRADE_TYPES:
+            raise TradeError('ประเภทธุรกรรมไม่ถูกต้อง')
+
+        total_cost = _money(amount * price_per_gram)
+        with transaction.atomic():
+            if trade_type == 'BUY':
+                if not TradeService.debit_cash(user.pk, total_cost):
+                    raise TradeError('ยอดเงินไม่เพียงพอ')
+                TradeService.add_gold(user.pk, amount, price_per_gram)
+            else:
+                TradeService.reserve_gold(user.pk, amount)
+                TradeService.credit_cash(user.pk, total_cost)
+
+            trans = Transaction.objects.create(
+                user=user, transaction_type=trade_type, gold_weight=amount,
+                gold_price_per_gram=price_per_gram, total_amount=total_cost, status='COMPLETED'
+            )
+            LedgerService.record_trade(trans)
+            TradingStatsService.record([trans])
+            TradeService.notify_changed(user.pk)
+        return trans
+
+    @staticmethod
+    def execute_batch(user, orders, price_per_gram):
+        """
+        Execute several market trades at one price in one transaction.
+
+        The user's balance and primary holding are locked and every order is
+        checked in request order against the running cash and gold, exactly
+        as if the orders were placed one at a time. Because every order
+        fills at the same price the batch is then settled as its net
+        position: one conditional cash update and one holding update for the
+        net amount, plus a single bulk insert of the per-order transactions.
+        A net buy folds into the average price like a single buy; a net sell
+        leaves it unchanged.
+
+        Args:
+            user (User): Trading user
+            orders (list): Dicts with ``type`` ('BUY'/'SELL') and ``amount``
+            price_per_gram (Decimal): Execution price for every order
+
+        Returns:
+            list: The completed transactions, in request order
+
+        Raises:
+            TradeError: If any trade type is invalid or any order cannot be
+                funded from the balance and gold left by the orders before it
+        """
+        if any(order['type'] not in TradeService.TRADE_TYPES for order in orders):
+            raise TradeError('ประเภทธุรกรรมไม่ถูกต้อง')
+
+        with transaction.atomic():
+            cash = User.objects.select_for_update().values_list('balance', flat=True).get(pk=user.pk)
+            held = (
+                GoldHolding.objects.select_for_update().filter(user_id=user.pk)
+                .order_by('id').values_list('amount', flat=True).first()
+            )
+            gold = held if held is not None else Decimal('0')
+
+            net_amount = Decimal('0')
+            net_cash = Decimal('0')
+            for order in orders:
+                order_total = _money(order['amount'] * price_per_gram)
+                if order['type'] == 'BUY':
+                    if cash < order_total:
+                        raise TradeError('ยอดเงินไม่เพียงพอ')
+                    cash, gold = cash - order_total, gold + order['amount']
+                    net_amount, net_cash = net_amount + order['amount'], net_cash - order_total
+                else:
+                    if gold < order['amount']:
+                        raise TradeError('จำนวนทองไม่เพียงพอ' if held is not None else 'คุณยังไม่มีทองในครอบครอง')
+                    cash, gold = cash + order_total, gold - order['amount']
+                    net_amount, net_cash = net_amount - order['amount'], net_cash + order_total
+
+            if net_cash < 0 and not TradeService.debit_cash(user.pk, -net_cash):
+                raise TradeError('ยอดเงินไม่เพียงพอ')
+            if net_amount > 0:
+                TradeService.add_gold(user.pk, net_amount, price_per_gram)
+            elif net_amount < 0:
+                TradeService.reserve_gold(user.pk, -net_amount)
+            if net_cash > 0:
+                TradeService.credit_cash(user.pk, net_cash)
+
+            now = timezone.now()
+            records = Transaction.objects.bulk_create([
+                Transaction(
+                    user=user, transaction_type=order['type'], gold_weight=order['amount'],
+                    gold_price_per_gram=price_per_gram, total_amount=_money(order['amount'] * price_per_gram),
+                    status='COMPLETED', transaction_date=now,
+                )
+                for order in orders
+            ])
+            LedgerService.record_trades(records)
+            TradingStatsService.record(records)
+            if records:
+                TradeService.notify_changed(user.pk)
+        return records
+
+    @staticmethod
+    def notify_changed(user_id):
+        """Push wallet and portfolio updates once the trade commits."""
+        transaction.on_commit(lambda: UserUpdateService.send_wallet_update(user_id))
+        transaction.on_commit(lambda: UserUpdateService.send_holdings_changed(user_id))
+
+
+def _money(value):
+    """Round a THB amount to satang."""
+    return value.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+class LotService:
+    """
+    Live lot accounting (see ``core.lots``).
+
+    Buys open ``GoldLot`` rows and sells consume the oldest open lots, so
+    each lot is loaded and consumed at most once: O(1) amortized work per
+    trade. Realized P&L follows ``settings.LOT_ACCOUNTING_METHOD``; lots are
+    kept under either method so switching only needs a backfill.
+    """
+
+    CONSUME_BATCH = 16
+
+    @staticmethod
+    def method():
+        return getattr(settings, 'LOT_ACCOUNTING_METHOD', 'FIFO')
+
+    @staticmethod
+    def _cost_basis(user_ids):
+        """``{user_id: avg_price}`` of each user's primary (oldest) holding."""
+        basis = {}
+        holdings = GoldHolding.objects.filter(user_id__in=user_ids).order_by('-id')
+        for user_id, avg_price in holdings.values_list('user_id', 'avg_price'):
+            basis[user_id] = avg_price
+        return basis
+
+    @staticmethod
+    def apply(records):
+        """
+        Open and consume lots for newly created transactions, in order.
+
+        Call inside the trade's transaction after the holdings were updated.
+
+        Returns:
+            list: Realized P&L (Decimal) per record; zero for buys
+        """
+        queues = {}
+        new_lots, consumed, fifo_costs = [], {}, []
+        for trans in records:
+            queue = queues.setdefault(trans.user_id, _OpenLots(trans.user_id))
+            if trans.transaction_type == 'BUY':
+                lot = GoldLot(
+                    user_id=trans.user_id, transaction_id=trans.pk, grams=trans.gold_weight,
+                    remaining=trans.gold_weight, price_per_gram=trans.gold_price_per_gram,
+                    acquired_at=trans.transaction_date,
+                )
+                queue.new.append(lot)
+                new_lots.append(lot)
+                fifo_costs.append(None)
+            else:
+                fifo_costs.append(queue.consume(trans.gold_weight, trans.gold_price_per_gram, consumed))
+        GoldLot.objects.bulk_update(list(consumed.values()), ['remaining'])
+        GoldLot.objects.bulk_create(new_lots)
+
+        if LotService.method() == 'AVERAGE':
+            cost_basis = LotService._cost_basis(
+                {trans.user_id for trans in records if trans.transaction_type == 'SELL'}
+            )
+        realized = []
+        for trans, fifo_cost in zip(records, fifo_costs):
+            if trans.transaction_type == 'BUY':
+                realized.append(Decimal('0'))
+            elif LotService.method() == 'AVERAGE':
+                basis = cost_basis.get(trans.user_id, trans.gold_price_per_gram)
+                realized.append(_money((trans.gold_price_per_gram - basis) * trans.gold_weight))
+            else:
+                realized.append(_money(trans.gold_weight * trans.gold_price_per_gram - fifo_cost))
+        return realized
+
+    @staticmethod
+    def position(user_id, price_per_gram=None):
+        """
+        Open grams, their cost basis and unrealized P&L at ``price_per_gram``.
+        """
+        if LotService.method() == 'AVERAGE':
+            totals = GoldHolding.objects.filter(user_id=user_id).aggregate(
+                grams=Sum('amount'), cost=Sum(F('amount') * F('avg_price'))
+            )
+        else:
+            totals = GoldLot.objects.filter(user_id=user_id, remaining__gt=0).aggregate(
+                grams=Sum('remaining'), cost=Sum(F('remaining') * F('price_per_gram'))
+            )
+        grams = Decimal(totals['grams'] or 0).quantize(Decimal('0.001'))
+        cost = _money(Decimal(totals['cost'] or 0))
+        unrealized = None if price_per_gram is None else _money(grams * price_per_gram - cost)
+        return {'open_grams': grams, 'open_cost': cost, 'unrealized_pnl': unrealized}
+
+
+class _OpenLots:
+    """
+    One user's open lots in FIFO order while applying a set of trades:
+    stored lots (loaded lazily, a batch at a time) and then lots opened by
+    earlier trades in the same set.
+    """
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.stored = []
+        self.last_id = 0
+        self.exhausted = False
+        self.new = []
+
+    def _load(self):
+        batch = list(
+            GoldLot.objects.select_for_update()
+            .filter(user_id=self.user_id, remaining__gt=0, id__gt=self.last_id)
+            .order_by('id')[:LotService.CONSUME_BATCH]
+        )
+        self.exhausted = len(batch) < LotService.CONSUME_BATCH
+        if batch:
+            self.last_id = batch[-1].id
+        self.stored.extend(batch)
+
+    def _head(self):
+        while True:
+            if not self.stored and not self.exhausted:
+                self._load()
+            queue = self.stored or self.new
+            while queue and queue[0].remaining <= 0:
+                queue.pop(0)
+            if queue:
+                return queue[0]
+            if self.exhausted and not self.new:
+                return None
+
+    def consume(self, grams, price_per_gram, consumed):
+        """
+        Take ``grams`` from the oldest lots and return their cost. Grams not
+        covered by any lot (holdings that predate lot tracking) cost the sale
+        price, so they realize nothing.
+        """
+        cost = Decimal('0')
+        while grams > 0:
+            lot = self._head()
+            if lot is None:
+                return cost + grams * price_per_gram
+            taken = min(lot.remaining, grams)
+            lot.remaining -= taken
+            grams -= taken
+            cost += taken * lot.price_per_gram
+            if lot.pk is not None:
+                consumed[lot.pk] = lot
+        return cost
+
+
+class TradingStatsService:
+    """
+    Service maintaining ``UserTradingStats``.
+
+    Trades fold their totals into each user's row with a single UPDATE of
+    ``F()`` expressions in the trade's own transaction; ``rebuild`` replays
+    users' full history instead.
+    """
+
+    COUNTERS = {
+        'total_bought': DecimalField(max_digits=14, decimal_places=3),
+        'total_sold': DecimalField(max_digits=14, decimal_places=3),
+        'volume': DecimalField(max_digits=16, decimal_places=2),
+        'trade_count': IntegerField(),
+        'realized_pnl': DecimalField(max_digits=16, decimal_places=2),
+    }
+    FIELDS = (*COUNTERS, 'first_trade_at', 'last_trade_at')
+
+    @staticmethod
+    def empty():
+        stats = {field: Decimal('0') for field in TradingStatsService.COUNTERS}
+        stats.update(trade_count=0, first_trade_at=None, last_trade_at=None)
+        return stats
+
+    @staticmethod
+    def _add(stats, trade_type, grams, total, traded_at, realized=Decimal('0')):
+        if trade_type == 'BUY':
+            stats['total_bought'] += grams
+        else:
+            stats['total_sold'] += grams
+        stats['volume'] += total
+        stats['trade_count'] += 1
+        stats['realized_pnl'] += realized
+        if stats['first_trade_at'] is None or traded_at < stats['first_trade_at']:
+            stats['first_trade_at'] = traded_at
+        if stats['last_trade_at'] is None or traded_at > stats['last_trade_at']:
+            stats['last_trade_at'] = traded_at
+
+    @staticmethod
+    def record(records):
+        """
+        Fold newly created transactions into their users' lots and stats.
+
+        Call inside the trade's transaction after the holdings were updated.
+        """
+        if not records:
+            return
+        deltas = defaultdict(TradingStatsService.empty)
+        for trans, realized in zip(records, LotService.apply(records)):
+            TradingStatsService._add(
+                deltas[trans.user_id], trans.transaction_type, trans.gold_weight, trans.total_amount,
+                trans.transaction_date, realized,
+            )
+
+        def per_user(field, output_field):
+            return Case(
+                *[When(pk=user_id, then=Value(delta[field])) for user_id, delta in deltas.items()],
+                output_field=output_field,
+            )
+
+        UserTradingStats.objects.bulk_create(
+            [UserTradingStats(user_id=user_id) for user_id in deltas], ignore_conflicts=True
+        )
+        UserTradingStats.objects.filter(pk__in=list(deltas)).update(
+            **{
+                field: F(field) + per_user(field, output_field)
+                for field, output_field in TradingStatsService.COUNTERS.items()
+            },
+            first_trade_at=Coalesce(F('first_trade_at'), per_user('first_trade_at', DateTimeField())),
+            last_trade_at=per_user('last_trade_at', DateTimeField()),
+            updated_at=timezone.now(),
+        )
+
+    @staticmethod
+    def compute(rows, method=None):
+        """
+        Stats for one user's history, with realized P&L from ``lots.replay``.
+
+        Args:
+            rows: ``(transaction_type, gold_weight, gold_price_per_gram,
+                total_amount, transaction_date)`` tuples in trade order
+            method (str): Lot accounting method; defaults to the setting
+
+        Returns:
+            tuple: (dict of values for ``FIELDS``, ``lots.Replay``)
+        """
+        rows = list(rows)
+        trade_types, grams, prices, totals, dates = zip(*rows) if rows else ((),) * 5
+        result = lots.replay(trade_types, grams, prices, method or LotService.method())
+        stats = TradingStatsService.empty()
+        for trade_type, amount, total, traded_at, realized in zip(trade_types, grams, totals, dates, result.realized):
+            TradingStatsService._add(stats, trade_type, amount, total, traded_at, lots.to_money(realized))
+        return stats, result
+
+    @staticmethod
+    def rebuild(user_ids):
+        """
+        Recompute the stats and open lots of ``user_ids`` from their
+        completed transactions.
+
+        The users' rows are locked before their history is read, as every
+        trade updates its user's row: trades in flight commit first and are
+        included, and new trades wait until the rebuilt rows are written.
+
+        Returns:
+            int: Number of users with trades
+        """
+        with transaction.atomic():
+            list(User.objects.select_for_update().filter(pk__in=user_ids).order_by('pk').values_list('pk', flat=True))
+            rows = (
+                Transaction.objects.filter(user_id__in=user_ids, status='COMPLETED')
+                .order_by('user_id', 'transaction_date', 'id')
+                .values_list('user_id', 'id', 'transaction_type', 'gold_weight', 'gold_price_per_gram',
+                             'total_amount', 'transaction_date')
+                .iterator(chunk_size=2000)
+            )
+            now = timezone.now()
+            stats, open_lots = [], []
+            for user_id, user_rows in groupby(rows, key=lambda row: row[0]):
+                user_rows = list(user_rows)
+                values, result = TradingStatsService.compute(row[2:] for row in user_rows)
+                stats.append(UserTradingStats(user_id=user_id, updated_at=now, **values))
+                open_lots.extend(
+                    GoldLot(
+                        user_id=user_id, transaction_id=row[1], grams=row[3], remaining=lots.to_grams(remaining),
+                        price_per_gram=row[4], acquired_at=row[6],
+                    )
+                    for row, remaining in zip(user_rows, result.remaining)
+                    if row[2] == 'BUY' and remaining > lots.EPSILON
+                )
+
+            UserTradingStats.objects.filter(user_id__in=user_ids).exclude(
+                user_id__in=[row.user_id for row in stats]
+            ).delete()
+            UserTradingStats.objects.bulk_create(
+                stats, update_conflicts=True, unique_fields=['user'],
+                update_fields=[*TradingStatsService.FIELDS, 'updated_at'],
+            )
+            GoldLot.objects.filter(user_id__in=user_ids).delete()
+            GoldLot.objects.bulk_create(open_lots)
+        return len(stats)
+
+
+class DepositService:
+    """
+    Service for settling deposits exactly once.
+
+    A deposit is marked completed with a conditional UPDATE (``WHERE status =
+    'PENDING'``) and only the caller whose update matched credits the balance,
+    with a single ``F('balance') + amount`` UPDATE. Concurrent or repeated
+    settlements of the same deposit are no-ops, and no row lock is held
+    across Python code.
+    """
+
+    @staticmethod
+    def new_reference():
+        return f"MOCK-{uuid.uuid4().hex[:12].upper()}"
+
+    @staticmethod
+    def settle(deposit):
+        """
+        Complete a pending deposit and credit its amount.
+
+        Returns:
+            bool: True if this call settled it, False if it was not pending
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            settled = Deposit.objects.filter(pk=deposit.pk, status='PENDING').update(
+                status='COMPLETED', updated_at=now
+            )
+            if not settled:
+                return False
+            TradeService.credit_cash(deposit.user_id, deposit.amount)
+            LedgerService.record_deposit(deposit)
+            user_id = deposit.user_id
+            transaction.on_commit(lambda: UserUpdateService.send_wallet_update(user_id))
+        deposit.status, deposit.updated_at = 'COMPLETED', now
+        return True
+
+    @staticmethod
+    def settle_pending(chunk_size=500, references=None):
+        """
+        Settle pending deposits in chunks, as for a gateway batch file.
+
+        Each chunk is one transaction: the pending rows are locked, marked
+        completed with one set-based UPDATE, and every user's credits are
+        summed into one ``CASE`` UPDATE of the balances. Rows settled
+        concurrently through ``settle`` are no longer pending once the lock
+        is granted, so nothing is credited twice.
+
+        Args:
+            chunk_size (int): Deposits per transaction
+            references (iterable): Only settle deposits with these references
+
+        Returns:
+            tuple: (deposits settled, total amount credited)
+        """
+        pending = Deposit.objects.filter(status='PENDING')
+        if references is not None:
+            pending = pending.filter(reference__in=list(references))
+
+        settled, credited, last_id = 0, Decimal('0'), 0
+        while True:
+            with transaction.atomic():
+                chunk = list(
+                    pending.select_for_update().filter(id__gt=last_id).order_by('id')
+                    .values_list('id', 'user_id', 'amount')[:chunk_size]
+                )
+                if not chunk:
+                    break
+                last_id = chunk[-1][0]
+                now = timezone.now()
+                Deposit.objects.filter(pk__in=[row[0] for row in chunk]).update(status='COMPLETED', updated_at=now)
+
+                credits = defaultdict(Decimal)
+                for _, user_id, amount in chunk:
+                    credits[user_id] += amount
+                User.objects.filter(pk__in=list(credits)).update(
+                    balance=F('balance') + Case(
+                        *[When(pk=user_id, then=Value(amount)) for user_id, amount in credits.items()],
+                        output_field=DecimalField(max_digits=12, decimal_places=2),
+                    ),
+                    updated_at=now,
+                )
+                LedgerService.post_many([
+                    ('DEPOSIT', f'deposit:{deposit_id}', LedgerService.deposit(user_id, amount))
+                    for deposit_id, user_id, amount in chunk
+                ])
+                for user_id in credits:
+                    transaction.on_commit(lambda user_id=user_id: UserUpdateService.send_wallet_update(user_id))
+            settled += len(chunk)
+            credited += sum(credits.values())
+            if len(chunk) < chunk_size:
+                break
+        return settled, credited
+
+    @staticmethod
+    def reconcile():
+        """
+        Compare completed deposits with the balance credits posted for them.
+
+        Every completed deposit should have exactly one ``DEPOSIT`` credit to
+        its user's cash account for its amount, and every such credit should
+        belong to a completed deposit. Deposits completed before the first
+        ledger entry was posted predate the ledger; they are covered by
+        opening balances (see ``LedgerService.open_balances``) and skipped.
+
+        Returns:
+            dict: ``uncredited``, ``orphaned`` and ``mismatched`` deposit ids
+        """
+        completed, completed_at = {}, {}
+        rows = Deposit.objects.filter(status='COMPLETED').values_list('id', 'amount', 'updated_at')
+        for deposit_id, amount, updated_at in rows.iterator():
+            completed[deposit_id], completed_at[deposit_id] = amount, updated_at
+        ledger_started_at = LedgerEntry.objects.aggregate(first=Min('created_at'))['first']
+        credits = defaultdict(Decimal)
+        entries = LedgerEntry.objects.filter(
+            entry_type='DEPOSIT', account__code__startswith='user:', account__code__endswith=':cash'
+        ).values_list('reference', 'amount')
+        for reference, amount in entries.iterator():
+            credits[int(reference.split(':', 1)[1])] += amount
+
+        return {
+            'uncredited': sorted(
+                deposit_id for deposit_id in completed.keys() - credits.keys()
+                if ledger_started_at is not None and completed_at[deposit_id] >= ledger_started_at
+            ),
+            'orphaned': sorted(credits.keys() - completed.keys()),
+            'mismatched': sorted(
+                deposit_id for deposit_id in completed.keys() & credits.keys()
+                if completed[deposit_id] != credits[deposit_id]
+            ),
+        }
+
+    @staticmethod
+    def create_settled(user, amount):
+        """Create a deposit and settle it immediately, as the mock gateway does."""
+        with transaction.atomic():
+            deposit = Deposit.objects.create(user=user, amount=amount, reference=DepositService.new_reference())
+            DepositService.settle(deposit)
+        return deposit
+
+
+class LimitOrderService:
+    """
+    Service for placing, cancelling and filling limit orders.
+
+    Placing an order reserves its funds: a BUY debits ``amount * limit_price``
+    and a SELL removes the gold from the holding. A fill settles at the tick
+    price and refunds a BUY's difference to its limit.
+    """
+
+    @staticmethod
+    def place(user, side, amount, limit_price):
+        """
+        Reserve funds and open a limit order.
+
+        Raises:
+            TradeError: If the side is invalid or funds are insufficient
+        """
+        if side not in TradeService.TRADE_TYPES:
+            raise TradeError('ประเภทธุรกรรมไม่ถูกต้อง')
+
+        with transaction.atomic():
+            order = LimitOrder(user=user, side=side, amount=amount, limit_price=limit_price)
+            if side == 'BUY':
+                if not TradeService.debit_cash(user.pk, order.reserved_amount):
+                    raise TradeError('ยอดเงินไม่เพียงพอ')
+            else:
+                TradeService.reserve_gold(user.pk, amount)
+            order.save()
+            LedgerService.post('RESERVE', f'limit_order:{order.pk}', LedgerService.reservation(order))
+            TradeService.notify_changed(user.pk)
+        return order
+
+    @staticmethod
+    def cancel(user, order_id):
+        """
+        Cancel an open order and release its reservation.
+
+        Raises:
+            TradeError: If the user has no open order with that id
+        """
+        with transaction.atomic():
+            order = LimitOrder.objects.filter(pk=order_id, user=user).first()
+            cancelled = order is not None and LimitOrder.objects.filter(pk=order.pk, status='OPEN').update(
+                status='CANCELLED', updated_at=timezone.now()
+            )
+            if not cancelled:
+                raise TradeError('ไม่พบคำสั่งซื้อขายที่เปิดอยู่')
+            if order.side == 'BUY':
+                TradeService.credit_cash(user.pk, order.reserved_amount)
+            elif not TradeService.return_gold(user.pk, order.amount):
+                TradeService.add_gold(user.pk, order.amount, order.limit_price)
+            LedgerService.post('RELEASE', f'limit_order:{order.pk}', LedgerService.release(order))
+            TradeService.notify_changed(user.pk)
+        order.status = 'CANCELLED'
+        return order
+
+    @staticmethod
+    def match_tick(price):
+        """
+        Match the in-memory order book against a price tick and persist fills.
+
+        Returns:
+            list: Orders that filled
+        """
+        order_book.sync()
+        matched = order_book.match(price)
+        if not matched:
+            return []
+        return LimitOrderService.fill(matched, Decimal(str(price)))
+
+    @staticmethod
+    def fill(orders, price):
+        """
+        Settle ``orders`` at ``price`` in one transaction.
+
+        Orders cancelled since the book last synced are skipped. Cash and
+        gold changes are summed per user so each user is updated once, and
+        the resulting transactions are written with a single bulk insert.
+
+        Returns:
+            list: Orders that filled
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            open_ids = set(
+                LimitOrder.objects.select_for_update()
+                .filter(pk__in=[order.id for order in orders], status='OPEN')
+                .values_list('id', flat=True)
+            )
+            filled = [order for order in orders if order.id in open_ids]
+            if not filled:
+                return []
+            LimitOrder.objects.filter(pk__in=open_ids).update(
+                status='FILLED', filled_price=price, filled_at=now, updated_at=now
+            )
+
+            cash = defaultdict(Decimal)
+            gold = defaultdict(Decimal)
+            records = []
+            for order in filled:
+                total = _money(order.amount * price)
+                if order.side == 'BUY':
+                    cash[order.user_id] += order.reserved_amount - total
+                    gold[order.user_id] += order.amount
+                else:
+                    cash[order.user_id] += total
+                records.append(Transaction(
+                    user_id=order.user_id, transaction_type=order.side, gold_weight=order.amount,
+                    gold_price_per_gram=price, total_amount=total, status='COMPLETED', transaction_date=now,
+                ))
+
+            for user_id, amount in cash.items():
+                if amount:
+                    TradeService.credit_cash(user_id, amount)
+            for user_id, amount in gold.items():
+                TradeService.add_gold(user_id, amount, price)
+            Transaction.objects.bulk_create(records)
+            journals = []
+            for order, trans in zip(filled, records):
+                journals.append(('RELEASE', f'limit_order:{order.id}', LedgerService.release(order)))
+                journals.append(('TRADE', f'transaction:{trans.pk}', LedgerService.trade(
+                    trans.user_id, trans.transaction_type, trans.gold_weight, trans.total_amount
+                )))
+            LedgerService.post_many(journals)
+            TradingStatsService.record(records)
+            for user_id in cash.keys() | gold.keys():
+                TradeService.notify_changed(user_id)
+
+        for order in filled:
+            order.status, order.filled_price, order.filled_at = 'FILLED', price, now
+        logger.info(f"Filled {len(filled)} limit orders at {price}")
+        return filled
+
+
+class ConditionalOrderService:
+    """
+    Service for stop-loss / take-profit style conditional orders.
+    """
+
+    @staticmethod
+    def cancel(user, order_id):
+        """
+        Cancel an active conditional order.
+
+        Raises:
+            TradeError: If the user has no active order with that id
+        """
+        cancelled = ConditionalOrder.objects.filter(pk=order_id, user=user, status='ACTIVE').update(
+            status='CANCELLED', updated_at=timezone.now()
+        )
+        if not cancelled:
+            raise TradeError('ไม่พบคำสั่งซื้อขายที่เปิดอยู่')
+        return ConditionalOrder.objects.get(pk=order_id)
+
+    @staticmethod
+    def match_tick(price):
+        """
+        Execute every conditional order triggered by a price tick.
+
+        Returns:
+            list: Orders that executed
+        """
+        trigger_index.sync()
+        fired = trigger_index.match(price)
+        if not fired:
+            return []
+        return ConditionalOrderService.execute(fired, Decimal(str(price)))
+
+    @staticmethod
+    def execute(orders, price):
+        """
+        Execute triggered ``orders`` at ``price``.
+
+        Each user's orders run as one TradeService batch. If the batch cannot
+        be funded the user's orders are retried one by one, oldest first, and
+        the ones that still fail are marked FAILED with the reason.
+
+        Returns:
+            list: Orders that executed
+        """
+        now = timezone.now()
+        executed = []
+        failed = defaultdict(list)
+        with transaction.atomic():
+            active_ids = set(
+                ConditionalOrder.objects.select_for_update()
+                .filter(pk__in=[order.id for order in orders], status='ACTIVE')
+                .values_list('id', flat=True)
+            )
+            by_user = defaultdict(list)
+            for order in orders:
+                if order.id in active_ids:
+                    by_user[order.user_id].append(order)
+            users = User.objects.in_bulk(list(by_user))
+
+            for user_id, user_orders in by_user.items():
+                user = users[user_id]
+                try:
+                    TradeService.execute_batch(
+                        user, [{'type': order.side, 'amount': order.amount} for order in user_orders], price
+                    )
+                    executed.extend(user_orders)
+                    continue
+                except TradeError:
+                    pass
+                for order in user_orders:
+                    try:
+                        TradeService.execute(user, order.side, order.amount, price)
+                        executed.append(order)
+                    except TradeError as e:
+                        failed[str(e)].append(order.id)
+
+            if executed:
+                ConditionalOrder.objects.filter(pk__in=[order.id for order in executed]).update(
+                    status='EXECUTED', executed_price=price, executed_at=now, updated_at=now
+                )
+            for reason, ids in failed.items():
+                ConditionalOrder.objects.filter(pk__in=ids).update(
+                    status='FAILED', failure_reason=reason, updated_at=now
+                )
+
+        logger.info(f"Executed {len(executed)} conditional orders at {price}")
+        return executed
+
+
+class QuoteService:
+    """
+    Short-lived, single-use price quotes.
+
+    A quote locks in the latest tick price for ``settings.QUOTE_TTL_SECONDS``
+    and lives only in the shared cache, so executing it needs no price query.
+    """
+
+    KEY = 'quote:{}'
+
+    @staticmethod
+    def latest_price(tick=None):
+        """
+        Latest price per gram from ``tick`` (by default the tick buffer's
+        latest), falling back to PriceHistory.
+        """
+        tick = tick or tick_buffer.latest()
+        if tick is not None and tick.get('price_per_gram'):
+            return Decimal(str(tick['price_per_gram'])).quantize(Decimal('0.01'))
+        latest = PriceHistory.objects.order_by('-timestamp').values_list('price_per_gram', flat=True).first()
+        return latest
+
+    @staticmethod
+    def create(user, trade_type, amount):
+        """
+        Quote ``amount`` grams at the latest price.
+
+        Returns:
+            dict: The quote, including ``quote_id`` and ``expires_at``
+
+        Raises:
+            TradeError: If there is no price yet
+        """
+        price_per_gram = QuoteService.latest_price()
+        if price_per_gram is None:
+            raise TradeError('ไม่มีข้อมูลราคาทองในขณะนี้')
+        ttl = settings.QUOTE_TTL_SECONDS
+        quote = {
+            'quote_id': uuid.uuid4().hex,
+            'user_id': user.pk,
+            'type': trade_type,
+            'amount': amount,
+            'price_per_gram': price_per_gram,
+            'total_amount': amount * price_per_gram,
+            'expires_at': timezone.now() + timedelta(seconds=ttl),
+        }
+        cache.set(QuoteService.KEY.format(quote['quote_id']), quote, timeout=ttl)
+        return quote
+
+    @staticmethod
+    def redeem(user, quote_id):
+        """
+        Consume a quote. Each quote can be redeemed once, by its owner.
+
+        Raises:
+            TradeError: If the quote is unknown, expired, already used or
+                belongs to another user
+        """
+        key = QuoteService.KEY.format(quote_id)
+        quote = cache.get(key)
+        if quote is None or quote['user_id'] != user.pk or quote['expires_at'] <= timezone.now():
+            raise TradeError('ใบเสนอราคาหมดอายุหรือไม่ถูกต้อง')
+        if not cache.delete(key):
+            # Redeemed concurrently by another request
+            raise TradeError('ใบเสนอราคาหมดอายุหรือไม่ถูกต้อง')
+        return quote
+
+
+class RecurringBuyService:
+    """
+    Batch executor for recurring buy plans.
+
+    Due plans are processed in id-ordered chunks. Each chunk is one
+    transaction: the chunk's users are locked and debited with a single
+    CASE UPDATE, their holdings are updated with one bulk update, and all
+    resulting transactions are written with one bulk insert.
+    """
+
+    @staticmethod
+    def due_plans(cutoff):
+        return RecurringBuyPlan.objects.filter(is_active=True, next_run_at__lte=cutoff)
+
+    @staticmethod
+    def run_due(cutoff=None, chunk_size=500, price_per_gram=None):
+        """
+        Execute every active plan due at or before ``cutoff``.
+
+        Args:
+            cutoff (datetime): Execute plans due up to this time (default: now)
+            chunk_size (int): Plans per transaction
+            price_per_gram (Decimal): Execution price (default: latest price)
+
+        Returns:
+            Counter: Number of plans per run status
+
+        Raises:
+            TradeError: If there is no price yet
+        """
+        cutoff = cutoff or timezone.now()
+        price_per_gram = price_per_gram or QuoteService.latest_price()
+        if price_per_gram is None:
+            raise TradeError('ไม่มีข้อมูลราคาทองในขณะนี้')
+
+        results = Counter()
+        last_id = 0
+        while True:
+            with transaction.atomic():
+                # Plans locked by an overlapping run are skipped, not waited on;
+                # that run executes them.
+                chunk = list(
+                    RecurringBuyService.due_plans(cutoff)
+                    .select_for_update(skip_locked=True)
+                    .filter(id__gt=last_id)
+                    .order_by('id')[:chunk_size]
+                )
+                if not chunk:
+                    break
+                last_id = chunk[-1].id
+                results.update(RecurringBuyService.execute_chunk(chunk, price_per_gram, cutoff))
+        return results
+
+    @staticmethod
+    def execute_chunk(plans, price_per_gram, cutoff):
+        """
+        Execute one chunk of due plans at ``price_per_gram``.
+
+        Plans are funded in id order against each user's balance; a plan
+        the balance cannot cover is skipped for this period. The plans are
+        locked and re-read first, so a plan another run has already executed,
+        or one deactivated or rescheduled since it was read, is left alone.
+
+        Returns:
+            Counter: Number of plans per run status
+        """
+        now = timezone.now()
+        results = Counter()
+        with transaction.atomic():
+            plans = list(
+                RecurringBuyService.due_plans(cutoff)
+                .select_for_update(skip_locked=True)
+                .filter(pk__in=[plan.pk for plan in plans])
+                .order_by('id')
+            )
+            if not plans:
+                return results
+            balances = dict(
+                User.objects.select_for_update()
+                .filter(pk__in={plan.user_id for plan in plans})
+                .values_list('id', 'balance')
+            )
+            remaining = dict(balances)
+            bought = defaultdict(Decimal)
+            records = []
+            for plan in plans:
+                grams = (plan.amount / price_per_gram).quantize(Decimal('0.001'), rounding=ROUND_DOWN)
+                cost = _money(grams * price_per_gram)
+                if grams <= 0:
+                    plan.last_run_status = 'AMOUNT_TOO_SMALL'
+                elif remaining[plan.user_id] < cost:
+                    plan.last_run_status = 'INSUFFICIENT_FUNDS'
+                else:
+                    plan.last_run_status = 'EXECUTED'
+                    remaining[plan.user_id] -= cost
+                    bought[plan.user_id] += grams
+                    records.append(Transaction(
+                        user_id=plan.user_id, transaction_type='BUY', gold_weight=grams,
+                        gold_price_per_gram=price_per_gram, total_amount=cost, status='COMPLETED',
+                        transaction_date=now,
+                    ))
+                plan.last_run_at = now
+                plan.next_run_at = plan.following_run(cutoff)
+                plan.updated_at = now
+                results[plan.last_run_status] += 1
+
+            if bought:
+                debits = [When(pk=user_id, then=Value(balances[user_id] - remaining[user_id])) for user_id in bought]
+                User.objects.filter(pk__in=list(bought)).update(
+                    balance=F('balance') - Case(*debits, output_field=DecimalField(max_digits=12, decimal_places=2)),
+                    updated_at=now,
+                )
+                RecurringBuyService._add_holdings(bought, price_per_gram, now)
+                Transaction.objects.bulk_create(records)
+                LedgerService.record_trades(records)
+                TradingStatsService.record(records)
+            RecurringBuyPlan.objects.bulk_update(
+                plans, ['next_run_at', 'last_run_at', 'last_run_status', 'updated_at']
+            )
+            for user_id in bought:
+                TradeService.notify_changed(user_id)
+        return results
+
+    @staticmethod
+    def _add_holdings(bought, price_per_gram, now):
+        """Fold ``{user_id: grams}`` bought at one price into each user's holding."""
+        holdings = {}
+        for holding in GoldHolding.objects.select_for_update().filter(user_id__in=list(bought)).order_by('id'):
+            holdings.setdefault(holding.user_id, holding)
+
+        changed, created = [], []
+        for user_id, grams in bought.items():
+            holding = holdings.get(user_id)
+            if holding is None:
+                holding = GoldHolding(user_id=user_id, amount=Decimal('0'), avg_price=price_per_gram)
+                created.append(holding)
+            else:
+                changed.append(holding)
+            total_amount = holding.amount + grams
+            holding.avg_price = _money((holding.amount * holding.avg_price + grams * price_per_gram) / total_amount)
+            holding.amount = total_amount
+            holding.total_value = _money(holding.amount * holding.avg_price)
+            holding.updated_at = now
+
+        GoldHolding.objects.bulk_update(changed, ['amount', 'avg_price', 'total_value', 'updated_at'])
+        GoldHolding.objects.bulk_create(created)
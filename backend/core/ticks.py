@@ -0,0 +1,97 @@
+"""
+Sequence-numbered price ticks.
+
+The publisher stamps every broadcast tick with a monotonic sequence number
+and keeps the most recent ``settings.TICK_BUFFER_SIZE`` ticks in a ring
+buffer in the shared cache. A reconnecting client sends the last sequence
+it saw and gets back only the ticks it missed, or a snapshot when the gap no
+longer fits in the buffer.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+
+class TickBuffer:
+    """
+    Ring buffer of recent ticks stored in the Django cache.
+
+    Slot ``seq % size`` holds the tick with that sequence number; each stored
+    tick carries its own ``seq`` so overwritten slots are detected on read.
+    """
+
+    SEQUENCE_KEY = 'ticks:seq'
+    LATEST_KEY = 'ticks:latest'
+    SLOT_KEY = 'ticks:slot:{}'
+
+    def __init__(self, size=None):
+        self._size = size
+
+    @property
+    def size(self):
+        return self._size or getattr(settings, 'TICK_BUFFER_SIZE', 1000)
+
+    def _slot_key(self, seq):
+        return self.SLOT_KEY.format(seq % self.size)
+
+    def append(self, message):
+        """
+        Assign the next sequence number to ``message`` and store it.
+
+        Returns:
+            dict: Copy of ``message`` with a ``seq`` key
+        """
+        cache.add(self.SEQUENCE_KEY, 0, timeout=None)
+        seq = cache.incr(self.SEQUENCE_KEY)
+        tick = dict(message, seq=seq)
+        cache.set_many({self._slot_key(seq): tick, self.LATEST_KEY: tick}, timeout=None)
+        return tick
+
+    def latest(self):
+        """Most recent tick, or None before the first tick."""
+        return cache.get(self.LATEST_KEY)
+
+    async def alatest(self):
+        return await cache.aget(self.LATEST_KEY)
+
+    def since(self, last_seq):
+        """
+        Ticks with ``seq > last_seq`` in order.
+
+        Returns:
+            list | None: Missing ticks (possibly empty), or None when they are
+            no longer all buffered and the caller should send a snapshot.
+        """
+        return self._collect(last_seq, self.latest(), cache.get_many)
+
+    async def asince(self, last_seq):
+        latest = await self.alatest()
+        found = await cache.aget_many(self._keys(last_seq, latest))
+        return self._collect(last_seq, latest, lambda keys: found)
+
+    def _keys(self, last_seq, latest):
+        if latest is None or not self._in_window(last_seq, latest['seq']):
+            return []
+        return [self._slot_key(seq) for seq in range(last_seq + 1, latest['seq'] + 1)]
+
+    def _in_window(self, last_seq, current):
+        return last_seq <= current and current - last_seq <= self.size
+
+    def _collect(self, last_seq, latest, get_many):
+        if latest is None:
+            return []
+        current = latest['seq']
+        if not self._in_window(last_seq, current):
+            # Gap too large, or the sequence was reset since the client saw it
+            return None
+        keys = self._keys(last_seq, latest)
+        found = get_many(keys) if keys else {}
+        ticks = []
+        for seq, key in zip(range(last_seq + 1, current + 1), keys):
+            tick = found.get(key)
+            if tick is None or tick.get('seq') != seq:
+                return None
+            ticks.append(tick)
+        return ticks
+
+
+tick_buffer = TickBuffer()
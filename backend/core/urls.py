@@ -21,10 +21,22 @@ urlpatterns = [
     path('gold/prices/', views.PriceHistoryListView.as_view(), name='price_history_list'),
     path('gold/prices/<int:pk>/', views.PriceHistoryDetailView.as_view(), name='price_history_detail'),
     path('gold/prices/current/', views.CurrentGoldPriceView.as_view(), name='current_price'),
+    path('gold/prices/stream/', views.gold_price_stream_view, name='price_stream'),
 
     # ==================== Trading endpoints ====================
     path('gold/trade/', views.TradeAPIView.as_view(), name='gold_trade'),
+    path('gold/trade/quote/', views.QuoteAPIView.as_view(), name='gold_trade_quote'),
+    path('gold/trade/batch/', views.BatchTradeAPIView.as_view(), name='gold_trade_batch'),
     path('gold/transactions/', views.TransactionListView.as_view(), name='gold_transactions'),
+    path('gold/transactions/export/', views.TransactionExportView.as_view(), name='gold_transactions_export'),
+    path('gold/stats/', views.TradingStatsView.as_view(), name='gold_trading_stats'),
+    path('gold/orders/', views.LimitOrderListView.as_view(), name='limit_order_list'),
+    path('gold/orders/<int:pk>/cancel/', views.LimitOrderCancelView.as_view(), name='limit_order_cancel'),
+    path('gold/conditional-orders/', views.ConditionalOrderListView.as_view(), name='conditional_order_list'),
+    path('gold/conditional-orders/<int:pk>/cancel/', views.ConditionalOrderCancelView.as_view(),
+         name='conditional_order_cancel'),
+    path('gold/recurring-buys/', views.RecurringBuyPlanListView.as_view(), name='recurring_buy_list'),
+    path('gold/recurring-buys/<int:pk>/', views.RecurringBuyPlanDetailView.as_view(), name='recurring_buy_detail'),
 
     # ==================== Deposit endpoints ====================
     path('wallet/deposits/', views.DepositListView.as_view(), name='deposit_list'),
@@ -33,6 +45,10 @@ urlpatterns = [
     path('wallet/deposit/complete/', views.MockDepositProcessView.as_view(), name='deposit_complete'),
     path('wallet/balance/', views.WalletBalanceView.as_view(), name='wallet_balance'),
 
+    # ==================== Dashboard endpoints ====================
+    path('dashboard/', views.DashboardView.as_view(), name='dashboard'),
+    path('portfolio/history/', views.PortfolioHistoryView.as_view(), name='portfolio_history'),
+
     # ==================== Price Alert endpoints ====================
     path('alerts/', views.PriceAlertListView.as_view(), name='price_alert_list'),
     path('alerts/<int:pk>/', views.PriceAlertDetailView.as_view(), name='price_alert_detail'),
@@ -1,16 +1,34 @@
 from rest_framework import status, generics, permissions
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from django.contrib.auth import authenticate
-from django.db.models import Sum, F
+from django.db.models import Count, F, OuterRef, Subquery, Sum
 from django.db import transaction
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenRefreshView
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.views.decorators.http import require_GET
+from datetime import datetime, timedelta
 from decimal import Decimal, InvalidOperation
-import uuid
-
-from .models import User, GoldHolding, PriceHistory, Deposit, Transaction, PriceAlert
+from itertools import islice
+import csv
+import json
+
+from asgiref.sync import sync_to_async
+
+from .authentication import CachedUserJWTAuthentication
+from .models import User, GoldHolding, PriceHistory, Deposit, Transaction, PriceAlert, LimitOrder, ConditionalOrder, RecurringBuyPlan, UserTradingStats
+from .fanout import hub
+from .idempotency import idempotent
+from .services import (
+    ConditionalOrderService, DashboardCacheService, DepositService, HoldingsTotalsCacheService, LedgerService,
+    LimitOrderService, LotService, PortfolioHistoryService, PriceAlertService, QuoteService, TradeError, TradeService,
+    UserUpdateService,
+)
+from .ticks import tick_buffer
 from .serializers import (
     UserRegistrationSerializer,
     UserLoginSerializer,
@@ -28,6 +46,14 @@ from .serializers import (
     PriceAlertSerializer,
     PriceAlertCreateSerializer,
     PriceAlertUpdateSerializer,
+    LimitOrderSerializer,
+    LimitOrderCreateSerializer,
+    BatchTradeSerializer,
+    QuoteRequestSerializer,
+    ConditionalOrderSerializer,
+    ConditionalOrderCreateSerializer,
+    RecurringBuyPlanSerializer,
+    UserTradingStatsSerializer,
 )
 
 
@@ -74,6 +100,7 @@ class LoginAPIView(APIView):
 
 
 class ProfileView(generics.RetrieveUpdateAPIView):
+    authentication_classes = [CachedUserJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get_serializer_class(self):
@@ -82,7 +109,10 @@ class ProfileView(generics.RetrieveUpdateAPIView):
         return UserProfileSerializer
 
     def get_object(self):
-        return self.request.user
+        if self.request.method in permissions.SAFE_METHODS:
+            return self.request.user
+        # The authenticated user is built from the profile cache; updates need the row
+        return User.objects.get(pk=self.request.user.pk)
 
 
 class LogoutAPIView(APIView):
@@ -104,6 +134,7 @@ class TokenRefreshViewCustom(TokenRefreshView):
 
 
 @api_view(['GET'])
+@authentication_classes([CachedUserJWTAuthentication])
 @permission_classes([permissions.IsAuthenticated])
 def user_me_view(request):
     serializer = UserSerializer(request.user)
@@ -124,7 +155,10 @@ class GoldHoldingsListView(generics.ListCreateAPIView):
         return GoldHolding.objects.filter(user=self.request.user)
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        with transaction.atomic():
+            holding = serializer.save(user=self.request.user)
+            LedgerService.record_gold_adjustment(holding.user_id, holding.amount, f'gold_holding:{holding.pk}')
+        UserUpdateService.send_holdings_changed(self.request.user.id)
 
 
 class GoldHoldingDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -134,30 +168,54 @@ class GoldHoldingDetailView(generics.RetrieveUpdateDestroyAPIView):
     def get_queryset(self):
         return GoldHolding.objects.filter(user=self.request.user)
 
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            previous_amount = serializer.instance.amount
+            holding = serializer.save()
+            LedgerService.record_gold_adjustment(
+                holding.user_id, holding.amount - previous_amount, f'gold_holding:{holding.pk}'
+            )
+        UserUpdateService.send_holdings_changed(self.request.user.id)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            LedgerService.record_gold_adjustment(instance.user_id, -instance.amount, f'gold_holding:{instance.pk}')
+            instance.delete()
+        UserUpdateService.send_holdings_changed(self.request.user.id)
+
 
 class GoldHoldingsSummaryView(APIView):
+    """
+    Holdings totals valued at the latest price. Totals are cached until the
+    holdings change and the tick is read alongside them, so a refresh is
+    served from the cache unless something changed.
+    """
+    authentication_classes = [CachedUserJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        holdings = GoldHolding.objects.filter(user=request.user)
-        total_amount = holdings.aggregate(total=Sum('amount'))['total'] or 0
-        total_cost = holdings.aggregate(cost=Sum(F('amount') * F('avg_price')))['cost'] or 0
-        latest_price = PriceHistory.objects.order_by('-timestamp').first()
-        current_value = 0
-        profit_loss = 0
-        profit_loss_percent = 0
-        if latest_price:
-            current_value = total_amount * latest_price.price_per_gram
-            if total_cost > 0:
-                profit_loss = current_value - total_cost
-                profit_loss_percent = (profit_loss / total_cost) * 100
-        return Response({
-            'total_amount': float(total_amount),
-            'total_cost': float(total_cost),
-            'current_value': float(current_value),
-            'profit_loss': float(profit_loss),
-            'profit_loss_percent': float(profit_loss_percent),
-        })
+        totals, tick = HoldingsTotalsCacheService.get_with_tick(request.user.pk)
+        latest_price = QuoteService.latest_price(tick)
+        return Response(holdings_summary(totals['amount'], totals['cost'], latest_price))
+
+
+def holdings_summary(total_amount, total_cost, price_per_gram):
+    """Totals, value and P&L of a user's holdings at ``price_per_gram`` (None if unknown)."""
+    current_value = 0
+    profit_loss = 0
+    profit_loss_percent = 0
+    if price_per_gram:
+        current_value = total_amount * price_per_gram
+        if total_cost > 0:
+            profit_loss = current_value - total_cost
+            profit_loss_percent = (profit_loss / total_cost) * 100
+    return {
+        'total_amount': float(total_amount),
+        'total_cost': float(total_cost),
+        'current_value': float(current_value),
+        'profit_loss': float(profit_loss),
+        'profit_loss_percent': float(profit_loss_percent),
+    }
 
 
 # ==================== Price History Views ====================
@@ -189,70 +247,442 @@ class CurrentGoldPriceView(APIView):
         return Response(PriceHistorySerializer(latest_price).data)
 
 
+# ==================== Price Stream (SSE) ====================
+
+SSE_KEEPALIVE_SECONDS = 15
+SSE_REPLAY_LIMIT = 500
+
+
+def format_sse(data, event_id=None):
+    """Encode one Server-Sent Event."""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'data: {json.dumps(data)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+def _tick_event(message):
+    """SSE event for a tick; the id is its sequence number when it has one."""
+    return format_sse(message, event_id=message.get('seq', message.get('timestamp')))
+
+
+async def _replay_ticks(last_event_id):
+    """
+    Ticks missed since ``last_event_id``.
+
+    Sequence ids replay from the tick ring buffer, falling back to a snapshot
+    of the latest tick when the gap is too large. Timestamp ids (older
+    clients) replay persisted PriceHistory rows.
+    """
+    if not last_event_id:
+        return []
+    if last_event_id.isdigit():
+        ticks = await tick_buffer.asince(int(last_event_id))
+        if ticks is None:
+            latest = await tick_buffer.alatest()
+            return [dict(latest, type='snapshot')] if latest else []
+        return ticks
+
+    since = parse_datetime(last_event_id)
+    if since is None:
+        return []
+    queryset = PriceHistory.objects.filter(timestamp__gt=since).order_by('timestamp')[:SSE_REPLAY_LIMIT]
+    return [
+        PriceAlertService.build_price_message({
+            'price_per_gram': price.price_per_gram,
+            'price_per_baht': price.price_per_baht,
+            'currency': price.currency,
+            'timestamp': price.timestamp,
+        })
+        async for price in queryset
+    ]
+
+
+@require_GET
+async def gold_price_stream_view(request):
+    """
+    Stream gold price ticks as Server-Sent Events.
+
+    Uses the same broadcast group as GoldPriceConsumer. Event ids are tick
+    sequence numbers; a reconnecting client's Last-Event-ID replays the ticks
+    it missed before switching to live updates.
+    """
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+
+    async def event_stream():
+        yield 'retry: 3000\n\n'
+        last_seq = None
+        last_sent_at = None
+        if last_event_id and last_event_id.isdigit():
+            last_seq = int(last_event_id)
+        elif last_event_id:
+            last_sent_at = parse_datetime(last_event_id)
+
+        # Subscribe before replaying so ticks broadcast meanwhile are queued;
+        # the ones the replay already covered are dropped below
+        async with hub.subscription('gold_price_updates', 'gold_price_update') as next_tick:
+            for message in await _replay_ticks(last_event_id):
+                last_seq = message.get('seq', last_seq)
+                last_sent_at = parse_datetime(message.get('timestamp') or '') or last_sent_at
+                yield _tick_event(message)
+
+            while True:
+                event = await next_tick(SSE_KEEPALIVE_SECONDS)
+                if event is None:
+                    yield ': keepalive\n\n'
+                    continue
+                message = event.get('data', event)
+                seq = message.get('seq')
+                if seq is not None and last_seq is not None:
+                    if seq <= last_seq:
+                        continue
+                elif last_sent_at:
+                    timestamp = parse_datetime(message.get('timestamp') or '')
+                    if timestamp and timestamp <= last_sent_at:
+                        continue
+                last_seq = seq if seq is not None else last_seq
+                yield _tick_event(message)
+
+    response = StreamingHttpResponse(event_stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 # ==================== Trading Views ====================
 
+def trade_payload(trans):
+    """Client-facing summary of an executed trade."""
+    return {
+        'type': trans.transaction_type,
+        'amount': float(trans.gold_weight),
+        'gold_price_per_gram': float(trans.gold_price_per_gram),
+        'total_amount': float(trans.total_amount),
+        'status': trans.status,
+        'transaction_date': trans.transaction_date.isoformat()
+    }
+
+
 class TradeAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
+    @idempotent
     def post(self, request):
+        if request.data.get('quote_id'):
+            return self.execute_quote(request, request.data['quote_id'])
+
         trade_type = request.data.get('type')
-        amount = Decimal(str(request.data.get('amount', 0)))
+        try:
+            amount = Decimal(str(request.data.get('amount', 0)))
+        except InvalidOperation:
+            return Response({'error': 'จำนวนทองไม่ถูกต้อง'}, status=status.HTTP_400_BAD_REQUEST)
         if amount <= 0:
             return Response({'error': 'จำนวนทองต้องมากกว่า 0'}, status=status.HTTP_400_BAD_REQUEST)
         latest_price = PriceHistory.objects.order_by('-timestamp').first()
         if not latest_price:
             return Response({'error': 'ไม่มีข้อมูลราคาทองในขณะนี้'}, status=status.HTTP_400_BAD_REQUEST)
-        price_per_gram = latest_price.price_per_gram
-        total_cost = amount * price_per_gram
-        user = request.user
-        with transaction.atomic():
-            if trade_type == 'BUY':
-                if user.balance < total_cost:
-                    return Response({'error': 'ยอดเงินไม่เพียงพอ'}, status=status.HTTP_400_BAD_REQUEST)
-                user.balance -= total_cost
-                user.save()
-                holding, _ = GoldHolding.objects.get_or_create(user=user, defaults={'amount': Decimal('0'), 'avg_price': Decimal('0')})
-                new_total_amount = holding.amount + amount
-                new_avg_price = ((holding.amount * holding.avg_price) + (amount * price_per_gram)) / new_total_amount
-                holding.amount = new_total_amount
-                holding.avg_price = new_avg_price
-                holding.save()
-            elif trade_type == 'SELL':
-                try:
-                    holding = GoldHolding.objects.get(user=user)
-                    if holding.amount < amount:
-                        return Response({'error': 'จำนวนทองไม่เพียงพอ'}, status=status.HTTP_400_BAD_REQUEST)
-                except GoldHolding.DoesNotExist:
-                    return Response({'error': 'คุณยังไม่มีทองในครอบครอง'}, status=status.HTTP_400_BAD_REQUEST)
-                user.balance += total_cost
-                user.save()
-                holding.amount -= amount
-                holding.save()
-            else:
-                return Response({'error': 'ประเภทธุรกรรมไม่ถูกต้อง'}, status=status.HTTP_400_BAD_REQUEST)
-            trans = Transaction.objects.create(
-                user=user, transaction_type=trade_type, gold_weight=amount,
-                gold_price_per_gram=price_per_gram, total_amount=total_cost, status='COMPLETED'
+        try:
+            trans = TradeService.execute(request.user, trade_type, amount, latest_price.price_per_gram)
+        except TradeError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'message': 'สำเร็จ', 'transaction': trade_payload(trans)})
+
+    def execute_quote(self, request, quote_id):
+        """Execute at a previously quoted price without a price lookup."""
+        try:
+            quote = QuoteService.redeem(request.user, quote_id)
+            trans = TradeService.execute(request.user, quote['type'], quote['amount'], quote['price_per_gram'])
+        except TradeError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'message': 'สำเร็จ', 'transaction': trade_payload(trans)})
+
+
+class QuoteAPIView(APIView):
+    """
+    Quote a market trade at the latest price. The returned ``quote_id`` can
+    be passed to the trade endpoint until ``expires_at``.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = QuoteRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            quote = QuoteService.create(
+                request.user, serializer.validated_data['type'], serializer.validated_data['amount']
             )
+        except TradeError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         return Response({
-            'message': 'สำเร็จ', 
-            'transaction': {
-                'type': trans.transaction_type,
-                'amount': float(trans.gold_weight),
-                'gold_price_per_gram': float(trans.gold_price_per_gram),
-                'total_amount': float(trans.total_amount),
-                'status': trans.status,
-                'transaction_date': trans.transaction_date.isoformat()
-            }
+            'quote_id': quote['quote_id'],
+            'type': quote['type'],
+            'amount': float(quote['amount']),
+            'gold_price_per_gram': float(quote['price_per_gram']),
+            'total_amount': float(quote['total_amount']),
+            'expires_at': quote['expires_at'].isoformat(),
+        }, status=status.HTTP_201_CREATED)
+
+
+class BatchTradeAPIView(APIView):
+    """
+    Execute a list of market orders against one price snapshot in one
+    database transaction.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    @idempotent
+    def post(self, request):
+        serializer = BatchTradeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        latest_price = PriceHistory.objects.order_by('-timestamp').first()
+        if not latest_price:
+            return Response({'error': 'ไม่มีข้อมูลราคาทองในขณะนี้'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            records = TradeService.execute_batch(
+                request.user, serializer.validated_data['orders'], latest_price.price_per_gram
+            )
+        except TradeError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'message': 'สำเร็จ',
+            'gold_price_per_gram': float(latest_price.price_per_gram),
+            'transactions': [trade_payload(trans) for trans in records],
         })
 
 
+class LimitOrderListView(generics.ListCreateAPIView):
+    """
+    List the user's limit orders or place a new one.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_serializer_class(self):
+        if self.request.method == 'POST':
+            return LimitOrderCreateSerializer
+        return LimitOrderSerializer
+
+    def get_queryset(self):
+        queryset = LimitOrder.objects.filter(user=self.request.user)
+        order_status = self.request.query_params.get('status')
+        if order_status:
+            queryset = queryset.filter(status=order_status.upper())
+        return queryset
+
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            order = LimitOrderService.place(request.user, **serializer.validated_data)
+        except TradeError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(LimitOrderSerializer(order).data, status=status.HTTP_201_CREATED)
+
+
+class LimitOrderCancelView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, pk):
+        try:
+            order = LimitOrderService.cancel(request.user, pk)
+        except TradeError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(LimitOrderSerializer(order).data)
+
+
+class ConditionalOrderListView(generics.ListCreateAPIView):
+    """
+    List the user's conditional (stop-loss / take-profit) orders or create one.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_serializer_class(self):
+        if self.request.method == 'POST':
+            return ConditionalOrderCreateSerializer
+        return ConditionalOrderSerializer
+
+    def get_queryset(self):
+        queryset = ConditionalOrder.objects.filter(user=self.request.user)
+        order_status = self.request.query_params.get('status')
+        if order_status:
+            queryset = queryset.filter(status=order_status.upper())
+        return queryset
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        order = serializer.save(user=request.user)
+        return Response(ConditionalOrderSerializer(order).data, status=status.HTTP_201_CREATED)
+
+
+class ConditionalOrderCancelView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, pk):
+        try:
+            order = ConditionalOrderService.cancel(request.user, pk)
+        except TradeError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(ConditionalOrderSerializer(order).data)
+
+
+class RecurringBuyPlanListView(generics.ListCreateAPIView):
+    """
+    List the user's recurring buy plans or create a new one.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = RecurringBuyPlanSerializer
+
+    def get_queryset(self):
+        return RecurringBuyPlan.objects.filter(user=self.request.user)
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+
+class RecurringBuyPlanDetailView(generics.RetrieveUpdateDestroyAPIView):
+    """
+    Retrieve, update or delete a recurring buy plan.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = RecurringBuyPlanSerializer
+
+    def get_queryset(self):
+        return RecurringBuyPlan.objects.filter(user=self.request.user)
+
+
 class TransactionListView(generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = TransactionSerializer
 
     def get_queryset(self):
-        return Transaction.objects.filter(user=self.request.user).order_by('-transaction_date')
+        return Transaction.objects.filter(user=self.request.user).order_by('-transaction_date', '-id')
+
+
+class TradingStatsView(APIView):
+    """
+    The user's running trading totals, kept up to date by every trade, plus
+    the open position's cost basis and unrealized P&L at the latest price.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        stats = UserTradingStats.objects.filter(user=request.user).first() or UserTradingStats(user=request.user)
+        data = UserTradingStatsSerializer(stats).data
+        position = LotService.position(request.user.pk, QuoteService.latest_price())
+        data.update({
+            'cost_method': LotService.method(),
+            'open_grams': str(position['open_grams']),
+            'open_cost': str(position['open_cost']),
+            'unrealized_pnl': None if position['unrealized_pnl'] is None else str(position['unrealized_pnl']),
+        })
+        return Response(data)
+
+
+EXPORT_FIELDS = (
+    'id', 'transaction_type', 'gold_weight', 'gold_price_per_gram', 'total_amount', 'status', 'transaction_date',
+)
+EXPORT_CHUNK_SIZE = 2000
+
+
+class _Echo:
+    """File-like object whose ``write`` returns the value, for ``csv.writer``."""
+
+    def write(self, value):
+        return value
+
+
+def _parse_export_bound(value, end=False):
+    """
+    Parse an ISO date or datetime filter. A bare ``date_to`` date includes
+    that whole day. Raises ValueError on anything else.
+    """
+    day = parse_date(value)
+    if day is not None:
+        if end:
+            day += timedelta(days=1)
+        return timezone.make_aware(datetime.combine(day, datetime.min.time()))
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(value)
+    return parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed)
+
+
+async def _export_batches(queryset):
+    """
+    Rows of ``queryset`` in lists of up to EXPORT_CHUNK_SIZE, read from a
+    server-side cursor. ``QuerySet.aiterator`` runs ``values_list`` queries
+    in the event loop, so the sync iterator is advanced through
+    ``sync_to_async`` (always on the same thread, as the cursor requires).
+    """
+    rows = queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    next_batch = sync_to_async(lambda: list(islice(rows, EXPORT_CHUNK_SIZE)))
+    try:
+        while batch := await next_batch():
+            yield batch
+    finally:
+        await sync_to_async(rows.close)()
+
+
+async def _export_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    async for batch in _export_batches(rows):
+        yield ''.join(writer.writerow(row[:-1] + (row[-1].isoformat(),)) for row in batch)
+
+
+def _ndjson_line(row):
+    record = dict(zip(EXPORT_FIELDS, row))
+    record['transaction_date'] = record['transaction_date'].isoformat()
+    return json.dumps(record, default=str) + '\n'
+
+
+async def _export_ndjson(rows):
+    async for batch in _export_batches(rows):
+        yield ''.join(_ndjson_line(row) for row in batch)
+
+
+class TransactionExportView(APIView):
+    """
+    Stream the user's complete transaction history as CSV or NDJSON.
+
+    ``?output=csv|ndjson`` picks the format (``format`` is taken by DRF's
+    content negotiation); ``date_from``/``date_to`` take ISO dates or
+    datetimes, and a ``date_to`` datetime is exclusive. Rows come from a
+    server-side cursor as tuples and are written one chunk at a time by an
+    async generator, so under ASGI the body is sent as it is read and memory
+    stays flat however long the history is.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    writers = {
+        'csv': (_export_csv, 'text/csv'),
+        'ndjson': (_export_ndjson, 'application/x-ndjson'),
+    }
+
+    def get(self, request):
+        output = request.query_params.get('output', 'csv')
+        if output not in self.writers:
+            return Response({'error': 'output must be csv or ndjson'}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = Transaction.objects.filter(user=request.user)
+        try:
+            if request.query_params.get('date_from'):
+                queryset = queryset.filter(
+                    transaction_date__gte=_parse_export_bound(request.query_params['date_from'])
+                )
+            if request.query_params.get('date_to'):
+                queryset = queryset.filter(
+                    transaction_date__lt=_parse_export_bound(request.query_params['date_to'], end=True)
+                )
+        except ValueError:
+            return Response({'error': 'Invalid date filter'}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = queryset.order_by('transaction_date', 'id').values_list(*EXPORT_FIELDS)
+        writer, content_type = self.writers[output]
+        response = StreamingHttpResponse(writer(rows), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="transactions.{output}"'
+        return response
 
 
 # ==================== Deposit Views ====================
@@ -270,17 +700,10 @@ class DepositListView(generics.ListCreateAPIView):
         return DepositSerializer
 
     def perform_create(self, serializer):
-        # Auto-generate reference
-        reference = f"MOCK-{uuid.uuid4().hex[:12].upper()}"
-        # For mock purposes, auto-complete the deposit
-        serializer.save(user=self.request.user, reference=reference, status='COMPLETED')
-        
-        # Update user balance immediately for mock deposit
-        user = self.request.user
-        # Ensure balance is Decimal
-        current_balance = Decimal(str(user.balance)) if not isinstance(user.balance, Decimal) else user.balance
-        user.balance = current_balance + serializer.validated_data['amount']
-        user.save()
+        with transaction.atomic():
+            # For mock purposes, auto-complete the deposit
+            deposit = serializer.save(user=self.request.user, reference=DepositService.new_reference())
+            DepositService.settle(deposit)
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -296,12 +719,14 @@ class DepositListView(generics.ListCreateAPIView):
 class DepositCreateView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
+    @idempotent
     def post(self, request):
         serializer = DepositCreateSerializer(data=request.data)
         if serializer.is_valid():
             amount = serializer.validated_data['amount']
-            reference = f"MOCK-{uuid.uuid4().hex[:12].upper()}"
-            deposit = Deposit.objects.create(user=request.user, amount=amount, status='PENDING', reference=reference)
+            deposit = Deposit.objects.create(
+                user=request.user, amount=amount, status='PENDING', reference=DepositService.new_reference()
+            )
             return Response({'message': 'Deposit request created', 'deposit': DepositSerializer(deposit).data}, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -318,9 +743,9 @@ class DepositCompleteView(APIView):
                 deposit = Deposit.objects.get(id=deposit_id, user=request.user)
                 if deposit.reference != reference:
                     return Response({'error': 'Invalid reference'}, status=status.HTTP_400_BAD_REQUEST)
-                if deposit.status == 'COMPLETED':
+                if not DepositService.settle(deposit):
                     return Response({'message': 'Already completed'})
-                deposit.complete_deposit()
+                request.user.refresh_from_db(fields=['balance'])
                 return Response({'message': 'Deposit completed', 'new_balance': float(request.user.balance)})
             except Deposit.DoesNotExist:
                 return Response({'error': 'Deposit not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -330,6 +755,7 @@ class DepositCompleteView(APIView):
 class MockDepositProcessView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
+    @idempotent
     def post(self, request):
         amount = request.data.get('amount')
         payment_method = request.data.get('payment_method', 'BANK_TRANSFER')
@@ -351,33 +777,18 @@ class MockDepositProcessView(APIView):
         except (ValueError, TypeError, InvalidOperation):
             return Response({'error': 'Invalid amount format'}, status=status.HTTP_400_BAD_REQUEST)
         
-        with transaction.atomic():
-            # Create completed deposit
-            reference = f"MOCK-{uuid.uuid4().hex[:12].upper()}"
-            deposit = Deposit.objects.create(
-                user=request.user,
-                amount=amount_decimal,
-                status='COMPLETED',
-                reference=reference
-            )
-            
-            # Update user balance - refresh to get latest balance
-            from core.models import User
-            user = User.objects.select_for_update().get(pk=request.user.pk)
-            user.balance = Decimal(str(user.balance)) + amount_decimal
-            user.save()
-            
-            return Response({
-                'message': 'Mock deposit processed successfully',
-                'deposit': {
-                    'id': deposit.id,
-                    'amount': float(deposit.amount),
-                    'status': deposit.status,
-                    'reference': deposit.reference,
-                    'created_at': deposit.created_at.isoformat(),
-                    'updated_at': deposit.updated_at.isoformat()
-                }
-            }, status=status.HTTP_201_CREATED)
+        deposit = DepositService.create_settled(request.user, amount_decimal)
+        return Response({
+            'message': 'Mock deposit processed successfully',
+            'deposit': {
+                'id': deposit.id,
+                'amount': float(deposit.amount),
+                'status': deposit.status,
+                'reference': deposit.reference,
+                'created_at': deposit.created_at.isoformat(),
+                'updated_at': deposit.updated_at.isoformat()
+            }
+        }, status=status.HTTP_201_CREATED)
 
 
 class DepositDetailView(generics.RetrieveAPIView):
@@ -389,6 +800,7 @@ class DepositDetailView(generics.RetrieveAPIView):
 
 
 class WalletBalanceView(APIView):
+    authentication_classes = [CachedUserJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
@@ -399,6 +811,98 @@ class WalletBalanceView(APIView):
         })
 
 
+# ==================== Dashboard Views ====================
+
+DASHBOARD_RECENT_TRANSACTIONS = 5
+
+
+class DashboardView(APIView):
+    """
+    Everything the home page shows, in one response: balance, holdings
+    summary, current price, recent transactions and the active alert count.
+
+    Authentication comes from the profile cache and the payload is cached
+    per user until the next tick or the user's next change, so a cache hit
+    costs no queries. A rebuild costs at most three: the user row with
+    holdings totals and the alert count as subqueries, the recent
+    transactions, and the latest PriceHistory when no tick has arrived yet.
+    """
+    authentication_classes = [CachedUserJWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        tick = tick_buffer.latest()
+        seq = tick['seq'] if tick else None
+        data = DashboardCacheService.get(request.user.pk, seq)
+        if data is None:
+            data = self.build(request, tick)
+            DashboardCacheService.set(request.user.pk, seq, data)
+        return Response(data)
+
+    def build(self, request, tick):
+        holdings = GoldHolding.objects.filter(user=OuterRef('pk')).order_by().values('user')
+        account = User.objects.filter(pk=request.user.pk).annotate(
+            total_amount=Subquery(holdings.annotate(total=Sum('amount')).values('total')),
+            total_cost=Subquery(holdings.annotate(cost=Sum(F('amount') * F('avg_price'))).values('cost')),
+            active_alerts=Subquery(
+                PriceAlert.objects.filter(user=OuterRef('pk'), is_active=True).order_by().values('user')
+                .annotate(count=Count('id')).values('count')
+            ),
+        ).values('balance', 'updated_at', 'total_amount', 'total_cost', 'active_alerts').first()
+
+        recent = Transaction.objects.filter(user=request.user).order_by('-transaction_date', '-id')
+        transactions = TransactionSerializer(
+            recent[:DASHBOARD_RECENT_TRANSACTIONS], many=True, context={'request': request}
+        ).data
+
+        price = self.current_price(tick)
+        return {
+            'balance': float(account['balance']),
+            'balance_updated_at': account['updated_at'].isoformat(),
+            'holdings': holdings_summary(
+                account['total_amount'] or 0, account['total_cost'] or 0,
+                Decimal(str(price['price_per_gram'])) if price else None,
+            ),
+            'price': price,
+            'recent_transactions': transactions,
+            'active_alerts': account['active_alerts'] or 0,
+        }
+
+    @staticmethod
+    def current_price(tick):
+        """The latest tick, or the latest PriceHistory before the first tick."""
+        if tick is not None:
+            return {key: tick.get(key) for key in ('price_per_gram', 'price_per_baht', 'currency', 'timestamp', 'seq')}
+        latest = PriceHistory.objects.order_by('-timestamp').first()
+        if latest is None:
+            return None
+        return {
+            'price_per_gram': float(latest.price_per_gram),
+            'price_per_baht': float(latest.price_per_baht),
+            'currency': latest.currency,
+            'timestamp': latest.timestamp.isoformat(),
+            'seq': None,
+        }
+
+
+class PortfolioHistoryView(APIView):
+    """
+    The user's portfolio value over ``?range=`` (1d, 1w, 1m, 3m or 1y;
+    default 1m), sampled at that range's resolution.
+    """
+    authentication_classes = [CachedUserJWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        range_name = request.query_params.get('range', PortfolioHistoryService.DEFAULT_RANGE)
+        if range_name not in PortfolioHistoryService.RANGES:
+            return Response(
+                {'error': f'range must be one of {", ".join(PortfolioHistoryService.RANGES)}'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(PortfolioHistoryService.get(request.user.pk, range_name))
+
+
 # ==================== Price Alert Views ====================
 
 class PriceAlertListView(generics.ListCreateAPIView):
@@ -417,6 +921,7 @@ class PriceAlertListView(generics.ListCreateAPIView):
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+        DashboardCacheService.invalidate(self.request.user.pk)
 
 
 class PriceAlertDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -434,6 +939,14 @@ class PriceAlertDetailView(generics.RetrieveUpdateDestroyAPIView):
     def get_queryset(self):
         return PriceAlert.objects.filter(user=self.request.user)
 
+    def perform_update(self, serializer):
+        serializer.save()
+        DashboardCacheService.invalidate(self.request.user.pk)
+
+    def perform_destroy(self, instance):
+        instance.delete()
+        DashboardCacheService.invalidate(self.request.user.pk)
+
 
 class PriceAlertToggleView(APIView):
     """
@@ -446,6 +959,7 @@ class PriceAlertToggleView(APIView):
             alert = PriceAlert.objects.get(pk=pk, user=request.user)
             alert.is_active = not alert.is_active
             alert.save()
+            DashboardCacheService.invalidate(request.user.pk)
             return Response({
                 'message': f'Alert {"activated" if alert.is_active else "deactivated"}',
                 'is_active': alert.is_active
@@ -13,14 +13,17 @@ from django.core.asgi import get_asgi_application
 from channels.routing import ProtocolTypeRouter, URLRouter
 from channels.auth import AuthMiddlewareStack
 import core.routing
+from core.authentication import JWTAuthMiddleware
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gold_trader.settings')
 
 application = ProtocolTypeRouter({
     'http': get_asgi_application(),
     'websocket': AuthMiddlewareStack(
-        URLRouter(
-            core.routing.websocket_urlpatterns
+        JWTAuthMiddleware(
+            URLRouter(
+                core.routing.websocket_urlpatterns
+            )
         )
     ),
 })
@@ -6,6 +6,8 @@ Shared across all environments (dev, test, prod).
 from pathlib import Path
 from datetime import timedelta
 
+from corsheaders.defaults import default_headers
+
 # Build paths inside the project
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 
@@ -125,6 +127,70 @@ REST_FRAMEWORK = {
 }
 
 
+# =============================================================================
+# WebSocket Fan-out
+# =============================================================================
+# Broadcast groups that each worker process joins once and fans out in memory
+# (see core.fanout). Uses the 'fanout' channel layer when one is configured.
+FANOUT_GROUPS = ['gold_price_updates']
+FANOUT_CHANNEL_LAYER = 'fanout'
+
+
+# =============================================================================
+# Price Ticks
+# =============================================================================
+# Number of recent ticks kept for gap fill on reconnect (see core.ticks)
+TICK_BUFFER_SIZE = 1000
+
+# Minimum change in THB of a user's portfolio value before a live push
+PORTFOLIO_PUSH_THRESHOLD = 1.00
+
+# Ledger snapshots only cover entries at least this old, so transactions
+# still in flight are not skipped (see LedgerService.snapshot)
+LEDGER_SNAPSHOT_LAG_SECONDS = 60
+
+# Cost method for realized/unrealized P&L: 'FIFO' or 'AVERAGE' (see core.lots).
+# Run backfill_trading_stats after changing it.
+LOT_ACCOUNTING_METHOD = 'FIFO'
+
+# How long a trade quote's price is guaranteed
+QUOTE_TTL_SECONDS = 10
+
+# Maximum number of orders accepted by the batch trade endpoint
+BATCH_TRADE_MAX_ORDERS = 500
+
+# How often the publisher rebuilds its limit order book from the database
+# to drop cancelled orders (see core.orderbook)
+ORDER_BOOK_RESYNC_SECONDS = 60
+
+# How long a cached user profile (balance included) may be served. Balance
+# changes rewrite it on commit, so this only bounds edits made around the
+# model (e.g. queryset updates in the admin); see ProfileCacheService
+PROFILE_CACHE_TTL = 60 * 5
+
+# Upper bound on how long a cached dashboard is served. Entries are also
+# dropped on every new tick and on the user's own changes; see
+# DashboardCacheService
+DASHBOARD_CACHE_TTL = 60
+
+# Upper bound on how long a user's cached holdings totals are served; they
+# are dropped whenever the holdings change (see HoldingsTotalsCacheService)
+HOLDINGS_TOTALS_CACHE_TTL = 60 * 5
+
+
+# =============================================================================
+# Idempotency Keys
+# =============================================================================
+# How long a stored response is replayed for a repeated Idempotency-Key
+IDEMPOTENCY_KEY_TTL = 60 * 60 * 24
+
+# How long a key stays locked while its first request is still executing
+IDEMPOTENCY_LOCK_TTL = 30
+
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+CORS_EXPOSE_HEADERS = ['idempotent-replayed']
+
+
 # =============================================================================
 # JWT Settings
 # =============================================================================
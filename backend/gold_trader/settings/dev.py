@@ -70,6 +70,35 @@ else:
                 ],
             },
         },
+        'fanout': {
+            'BACKEND': 'channels_redis.pubsub.RedisPubSubChannelLayer',
+            'CONFIG': {
+                'hosts': [
+                    (
+                        config('REDIS_HOST', default='127.0.0.1'),
+                        config('REDIS_PORT', default=6379, cast=int)
+                    )
+                ],
+            },
+        },
+    }
+
+
+# =============================================================================
+# Cache Configuration
+# =============================================================================
+if 'test' in sys.argv or 'pytest' in sys.modules:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': f"redis://{config('REDIS_HOST', default='127.0.0.1')}:{config('REDIS_PORT', default=6379, cast=int)}/1",
+        },
     }
 
 
@@ -55,6 +55,24 @@ CHANNEL_LAYERS = {
             'hosts': [redis_hosts],
         },
     },
+    # Broadcast groups: one Redis pub/sub subscription per worker process
+    'fanout': {
+        'BACKEND': 'channels_redis.pubsub.RedisPubSubChannelLayer',
+        'CONFIG': {
+            'hosts': [redis_hosts],
+        },
+    },
+}
+
+
+# =============================================================================
+# Cache Configuration (shared across workers: tick buffer, sessions)
+# =============================================================================
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': f"redis://{redis_hosts}/1",
+    },
 }
 
 
@@ -4,11 +4,20 @@ Common pytest fixtures and configurations for Gold Trader tests.
 import pytest
 from decimal import Decimal
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from core.models import GoldPrice, Transaction, Wallet, GoldHolding, PriceHistory, Deposit
 
 User = get_user_model()
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Start every test with an empty cache (tick buffer, quotes, ...)."""
+    cache.clear()
+    yield
+    cache.clear()
+
+
 @pytest.fixture
 def user_data():
     """Return sample user data for testing."""
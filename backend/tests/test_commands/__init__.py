@@ -0,0 +1 @@
+# Test commands package
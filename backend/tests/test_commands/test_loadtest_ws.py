@@ -0,0 +1,59 @@
+"""
+Unit tests for the loadtest_ws command and its statistics helpers.
+"""
+import io
+import os
+import pytest
+from unittest import mock
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from core.management.commands.loadtest_ws import Command, count_dropped, percentiles, process_tree_rss_kb
+
+
+def test_percentiles():
+    result = percentiles(list(range(1, 1001)))
+    assert round(result[50]) == 500
+    assert round(result[99]) == 990
+    assert result[99.9] > result[99]
+
+
+def test_percentiles_empty():
+    assert percentiles([]) == {50: None, 99: None, 99.9: None}
+
+
+def test_count_dropped():
+    assert count_dropped([3, 4, 6], last_seq=7) == 2
+    assert count_dropped([1, 2, 3], last_seq=3) == 0
+    assert count_dropped([], last_seq=10) == 0
+
+
+def test_process_tree_rss_includes_current_process():
+    assert process_tree_rss_kb(os.getpid()) > 0
+
+
+@pytest.mark.parametrize('options, message', [
+    ({'clients': 0}, 'must be positive'),
+    ({'duration': -1}, 'must be positive'),
+    ({'tick_interval': 0}, 'must be positive'),
+    ({'ramp_rate': 0}, 'must be positive'),
+    ({'alerts_share': 1.5}, '--alerts-share'),
+    ({'url': 'http://localhost:8000'}, '--url'),
+])
+def test_rejects_invalid_arguments(options, message):
+    with mock.patch.object(Command, '_run') as run:
+        with pytest.raises(CommandError, match=message):
+            call_command('loadtest_ws', **options)
+    run.assert_not_called()
+
+
+def test_valid_arguments_start_run():
+    async def run(self, options):
+        run.options = options
+
+    with mock.patch.object(Command, '_run', run):
+        call_command('loadtest_ws', clients=10, alerts_share=0.5, duration=1, stdout=io.StringIO())
+
+    assert run.options['clients'] == 10
+    assert run.options['alerts_share'] == 0.5
+    assert run.options['url'] == 'ws://localhost:8000'
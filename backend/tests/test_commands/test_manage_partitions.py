@@ -0,0 +1,36 @@
+"""
+Tests for the transactions partition helpers and manage_partitions command.
+"""
+import io
+import pytest
+from datetime import date
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from core import partitions
+
+
+def test_add_months_wraps_years():
+    assert partitions.add_months(date(2026, 11, 1), 2) == date(2027, 1, 1)
+    assert partitions.add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+
+
+def test_months_between_is_inclusive():
+    months = partitions.months_between(date(2026, 11, 20), date(2027, 2, 3))
+
+    assert months == [date(2026, 11, 1), date(2026, 12, 1), date(2027, 1, 1), date(2027, 2, 1)]
+    assert partitions.partition_name(months[0]) == 'transactions_p2026_11'
+
+
+@pytest.mark.django_db
+class TestManagePartitionsCommand:
+    def test_noop_without_postgresql(self):
+        out = io.StringIO()
+
+        call_command('manage_partitions', stdout=out)
+
+        assert 'requires PostgreSQL' in out.getvalue()
+
+    def test_rejects_negative_months(self):
+        with pytest.raises(CommandError):
+            call_command('manage_partitions', months_ahead=-1, stdout=io.StringIO())
@@ -0,0 +1,171 @@
+"""
+Tests for the run_recurring_buys command and RecurringBuyService.
+"""
+import io
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.utils import timezone
+
+from core.models import GoldHolding, RecurringBuyPlan, Transaction
+from core.services import RecurringBuyService
+
+
+PRICE = Decimal('2500.00')
+
+
+def plan(user, amount, frequency='DAILY', due_in=timedelta(minutes=-1)):
+    return RecurringBuyPlan.objects.create(
+        user=user, amount=Decimal(amount), frequency=frequency, next_run_at=timezone.now() + due_in
+    )
+
+
+@pytest.mark.django_db
+class TestRecurringBuyService:
+    """Due plans execute in set-based chunks."""
+
+    def test_executes_due_plans(self, verified_user):
+        daily = plan(verified_user, '5000')
+        weekly = plan(verified_user, '2500', frequency='WEEKLY')
+        later = plan(verified_user, '1000', due_in=timedelta(hours=2))
+
+        results = RecurringBuyService.run_due(price_per_gram=PRICE)
+
+        assert results == {'EXECUTED': 2}
+        verified_user.refresh_from_db()
+        assert verified_user.balance == Decimal('92500.00')
+        holding = GoldHolding.objects.get(user=verified_user)
+        assert holding.amount == Decimal('3.000')
+        assert holding.avg_price == PRICE
+        assert Transaction.objects.filter(user=verified_user, transaction_type='BUY').count() == 2
+
+        daily.refresh_from_db()
+        weekly.refresh_from_db()
+        later.refresh_from_db()
+        assert daily.last_run_status == 'EXECUTED'
+        assert daily.next_run_at > timezone.now() + timedelta(hours=23)
+        assert weekly.next_run_at > timezone.now() + timedelta(days=6)
+        assert later.last_run_at is None
+
+    def test_rounds_grams_down(self, verified_user):
+        plan(verified_user, '1000')
+
+        RecurringBuyService.run_due(price_per_gram=Decimal('3000.00'))
+
+        trans = Transaction.objects.get(user=verified_user)
+        assert trans.gold_weight == Decimal('0.333')
+        assert trans.total_amount == Decimal('999.00')
+
+    def test_insufficient_funds_skips_period(self, user):
+        user.balance = Decimal('3000.00')
+        user.save()
+        first = plan(user, '2500')
+        second = plan(user, '2500')
+
+        results = RecurringBuyService.run_due(price_per_gram=PRICE)
+
+        assert results == {'EXECUTED': 1, 'INSUFFICIENT_FUNDS': 1}
+        second.refresh_from_db()
+        assert second.last_run_status == 'INSUFFICIENT_FUNDS'
+        assert second.next_run_at > timezone.now()
+        user.refresh_from_db()
+        assert user.balance == Decimal('500.00')
+        first.refresh_from_db()
+        assert first.last_run_status == 'EXECUTED'
+
+    def test_updates_existing_holding_average(self, user, gold_holding):
+        user.balance = Decimal('10000.00')
+        user.save()
+        plan(user, '2600')
+
+        RecurringBuyService.run_due(price_per_gram=Decimal('2600.00'))
+
+        gold_holding.refresh_from_db()
+        assert gold_holding.amount == Decimal('11.000')
+        # (10 * 2400 + 1 * 2600) / 11
+        assert gold_holding.avg_price == Decimal('2418.18')
+
+    def test_chunks_cover_every_plan(self, verified_user, user):
+        user.balance = Decimal('10000.00')
+        user.save()
+        for owner in (verified_user, user, verified_user, user, verified_user):
+            plan(owner, '250')
+
+        results = RecurringBuyService.run_due(chunk_size=2, price_per_gram=PRICE)
+
+        assert results == {'EXECUTED': 5}
+        assert Transaction.objects.count() == 5
+
+    def test_inactive_plans_are_ignored(self, verified_user):
+        inactive = plan(verified_user, '1000')
+        inactive.is_active = False
+        inactive.save()
+
+        assert RecurringBuyService.run_due(price_per_gram=PRICE) == {}
+
+    def test_overlapping_runs_execute_plans_once(self, verified_user):
+        plan(verified_user, '5000')
+        plan(verified_user, '2500')
+        cutoff = timezone.now()
+        # Both runs read the same chunk before either executes it.
+        chunk = list(RecurringBuyService.due_plans(cutoff))
+
+        first = RecurringBuyService.execute_chunk(chunk, PRICE, cutoff)
+        second = RecurringBuyService.execute_chunk(chunk, PRICE, cutoff)
+
+        assert first == {'EXECUTED': 2}
+        assert second == {}
+        assert Transaction.objects.count() == 2
+        verified_user.refresh_from_db()
+        assert verified_user.balance == Decimal('92500.00')
+
+    def test_plan_changed_after_read_is_not_executed(self, verified_user):
+        deactivated = plan(verified_user, '5000')
+        rescheduled = plan(verified_user, '2500')
+        cutoff = timezone.now()
+        chunk = list(RecurringBuyService.due_plans(cutoff))
+        RecurringBuyPlan.objects.filter(pk=deactivated.pk).update(is_active=False)
+        next_run_at = cutoff + timedelta(days=3)
+        RecurringBuyPlan.objects.filter(pk=rescheduled.pk).update(next_run_at=next_run_at)
+
+        assert RecurringBuyService.execute_chunk(chunk, PRICE, cutoff) == {}
+
+        assert not Transaction.objects.exists()
+        rescheduled.refresh_from_db()
+        assert rescheduled.next_run_at == next_run_at
+
+
+@pytest.mark.django_db
+class TestRunRecurringBuysCommand:
+    def test_runs_due_plans(self, verified_user, price_history):
+        plan(verified_user, '5000')
+        out = io.StringIO()
+
+        call_command('run_recurring_buys', stdout=out)
+
+        assert 'EXECUTED: 1' in out.getvalue()
+        assert Transaction.objects.filter(user=verified_user).exists()
+
+    def test_window_includes_upcoming_plans(self, verified_user, price_history):
+        plan(verified_user, '5000', due_in=timedelta(minutes=30))
+
+        call_command('run_recurring_buys', window_minutes=60, stdout=io.StringIO())
+
+        assert Transaction.objects.filter(user=verified_user).exists()
+
+    def test_dry_run(self, verified_user, price_history):
+        plan(verified_user, '5000')
+        out = io.StringIO()
+
+        call_command('run_recurring_buys', dry_run=True, stdout=out)
+
+        assert 'Due plans: 1' in out.getvalue()
+        assert not Transaction.objects.exists()
+
+    def test_requires_price(self, verified_user):
+        plan(verified_user, '5000')
+
+        with pytest.raises(CommandError):
+            call_command('run_recurring_buys', stdout=io.StringIO())
@@ -0,0 +1,120 @@
+"""
+Tests for the settle_deposits command and bulk DepositService settlement.
+"""
+import io
+import pytest
+from decimal import Decimal
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from core.models import Deposit
+from core.services import DepositService, LedgerService
+from tests.factories.deposit_factory import CompletedDepositFactory, DepositFactory
+from tests.factories.user_factory import UserFactory
+
+
+@pytest.mark.django_db
+class TestSettlePending:
+    """Pending deposits settle in set-based chunks."""
+
+    def test_settles_in_chunks(self, user):
+        other = UserFactory(email='other@example.com')
+        deposits = [DepositFactory(user=user) for _ in range(3)] + [DepositFactory(user=other, amount=Decimal('250.50'))]
+        failed = DepositFactory(user=user, status='FAILED')
+
+        settled, credited = DepositService.settle_pending(chunk_size=2)
+
+        assert (settled, credited) == (4, Decimal('30250.50'))
+        user.refresh_from_db()
+        other.refresh_from_db()
+        assert user.balance == Decimal('30000.00')
+        assert other.balance == Decimal('250.50')
+        assert set(Deposit.objects.filter(pk__in=[d.pk for d in deposits]).values_list('status', flat=True)) == {'COMPLETED'}
+        failed.refresh_from_db()
+        assert failed.status == 'FAILED'
+        assert LedgerService.balance(LedgerService.cash(user.pk)) == Decimal('30000.00')
+
+    def test_settled_deposits_are_not_credited_twice(self, user):
+        deposit = DepositFactory(user=user)
+        DepositService.settle(deposit)
+
+        assert DepositService.settle_pending() == (0, Decimal('0'))
+        user.refresh_from_db()
+        assert user.balance == Decimal('10000.00')
+
+    def test_only_listed_references(self, user):
+        listed, unlisted = DepositFactory(user=user), DepositFactory(user=user)
+
+        DepositService.settle_pending(references=[listed.reference])
+
+        listed.refresh_from_db()
+        unlisted.refresh_from_db()
+        assert (listed.status, unlisted.status) == ('COMPLETED', 'PENDING')
+
+
+@pytest.mark.django_db
+class TestReconcile:
+    """Completed deposits are matched against their ledger credits."""
+
+    def test_clean_after_settlement(self, user):
+        DepositFactory(user=user)
+        DepositService.settle_pending()
+
+        assert DepositService.reconcile() == {'uncredited': [], 'orphaned': [], 'mismatched': []}
+
+    def test_reports_discrepancies(self, user):
+        pending = DepositFactory(user=user)
+        LedgerService.record_deposit(pending)
+        uncredited = CompletedDepositFactory(user=user)
+        short = DepositFactory(user=user)
+        DepositService.settle(short)
+        Deposit.objects.filter(pk=short.pk).update(amount=Decimal('9999.00'))
+
+        assert DepositService.reconcile() == {
+            'uncredited': [uncredited.pk], 'orphaned': [pending.pk], 'mismatched': [short.pk],
+        }
+
+    def test_deposits_before_the_ledger_are_skipped(self, user):
+        CompletedDepositFactory(user=user)
+        DepositService.settle(DepositFactory(user=user))
+
+        assert DepositService.reconcile() == {'uncredited': [], 'orphaned': [], 'mismatched': []}
+
+
+@pytest.mark.django_db
+class TestSettleDepositsCommand:
+    """The command wraps bulk settlement and reconciliation."""
+
+    def test_settles_from_file(self, user, tmp_path):
+        listed, unlisted = DepositFactory(user=user), DepositFactory(user=user)
+        batch = tmp_path / 'batch.txt'
+        batch.write_text(f'{listed.reference}\n\n')
+        out = io.StringIO()
+
+        call_command('settle_deposits', file=str(batch), stdout=out)
+
+        assert 'Settled 1 deposits totalling 10000.00' in out.getvalue()
+        unlisted.refresh_from_db()
+        assert unlisted.status == 'PENDING'
+
+    def test_reconcile_fails_on_discrepancy(self, user):
+        DepositService.settle(DepositFactory(user=user))
+        CompletedDepositFactory(user=user)
+        out = io.StringIO()
+
+        with pytest.raises(CommandError):
+            call_command('settle_deposits', reconcile=True, stdout=out)
+        assert 'without a credit' in out.getvalue()
+
+    def test_reconcile_passes_with_pre_ledger_deposits(self, user):
+        CompletedDepositFactory(user=user)
+        DepositService.settle(DepositFactory(user=user))
+        out = io.StringIO()
+
+        call_command('settle_deposits', reconcile=True, stdout=out)
+
+        assert 'Deposits reconcile with ledger credits' in out.getvalue()
+
+    def test_rejects_bad_chunk_size(self):
+        with pytest.raises(CommandError):
+            call_command('settle_deposits', chunk_size=0)
@@ -0,0 +1,23 @@
+"""
+Smoke tests for the simulate_prices command.
+"""
+import io
+import pytest
+from decimal import Decimal
+from django.core.management import call_command
+
+from core.models import PriceHistory
+from core.ticks import tick_buffer
+
+
+@pytest.mark.django_db
+class TestSimulatePricesCommand:
+    def test_publishes_and_persists_ticks(self):
+        call_command('simulate_prices', count=2, interval=0, persist=True, stdout=io.StringIO())
+
+        prices = list(PriceHistory.objects.order_by('timestamp').values_list('price_per_gram', flat=True))
+        assert len(prices) == 2
+        assert all(Decimal('2500') <= price <= Decimal('3000') for price in prices)
+        latest = tick_buffer.latest()
+        assert latest['seq'] == 2
+        assert latest['price_per_gram'] == float(prices[-1])
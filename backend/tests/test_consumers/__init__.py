@@ -0,0 +1 @@
+# Test consumers package
@@ -0,0 +1,205 @@
+"""
+Unit tests for the per-process fan-out hub.
+"""
+import asyncio
+import pytest
+from unittest import mock
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+
+from core.consumers import GoldPriceConsumer, TickStreamMixin
+from core.fanout import FanoutConsumerMixin, FanoutHub, envelope, hub, is_fanout_group
+from core.ticks import tick_buffer
+
+
+class RecordingSubscriber:
+    """Minimal subscriber that records gold price events."""
+
+    def __init__(self):
+        self.events = []
+
+    async def gold_price_update(self, event):
+        self.events.append(event)
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class TestFanoutHub:
+    """Test cases for FanoutHub."""
+
+    def test_price_group_is_fanout(self):
+        assert is_fanout_group('gold_price_updates')
+        assert not is_fanout_group('user_1_alerts')
+
+    def test_single_group_membership_per_process(self):
+        async def scenario():
+            local_hub = FanoutHub()
+            first, second = RecordingSubscriber(), RecordingSubscriber()
+            await local_hub.subscribe('gold_price_updates', first)
+            await local_hub.subscribe('gold_price_updates', second)
+
+            layer = get_channel_layer()
+            assert list(layer.groups['gold_price_updates']) == [local_hub.channel_name]
+
+            event = {'type': 'gold_price_update', 'data': {'price_per_gram': 2500.0}}
+            await layer.group_send('gold_price_updates', envelope('gold_price_updates', event))
+            await settle()
+            assert first.events == [event]
+            assert second.events == [event]
+
+            await local_hub.unsubscribe('gold_price_updates', first)
+            await local_hub.unsubscribe('gold_price_updates', second)
+            assert 'gold_price_updates' not in layer.groups
+            assert local_hub.listener is None
+
+        async_to_sync(scenario)()
+
+    def test_failing_subscriber_does_not_block_others(self):
+        class Broken:
+            async def gold_price_update(self, event):
+                raise RuntimeError('socket gone')
+
+        async def scenario():
+            local_hub = FanoutHub()
+            healthy = RecordingSubscriber()
+            await local_hub.subscribe('gold_price_updates', Broken())
+            await local_hub.subscribe('gold_price_updates', healthy)
+            await local_hub.deliver('gold_price_updates', {'type': 'gold_price_update'})
+            assert len(healthy.events) == 1
+            local_hub.listener.cancel()
+
+        async_to_sync(scenario)()
+
+    def test_concurrent_subscribers_start_one_listener(self):
+        async def scenario():
+            local_hub = FanoutHub()
+            layer = get_channel_layer()
+            new_channel = layer.new_channel
+
+            async def slow_new_channel(*args, **kwargs):
+                await asyncio.sleep(0)
+                return await new_channel(*args, **kwargs)
+
+            first, second = RecordingSubscriber(), RecordingSubscriber()
+            with mock.patch.object(layer, 'new_channel', side_effect=slow_new_channel) as created:
+                await asyncio.gather(
+                    local_hub.subscribe('gold_price_updates', first),
+                    local_hub.subscribe('gold_price_updates', second),
+                )
+
+            assert created.call_count == 1
+            assert local_hub.subscribers['gold_price_updates'] == {first, second}
+            await local_hub.unsubscribe('gold_price_updates', first)
+            await local_hub.unsubscribe('gold_price_updates', second)
+
+        async_to_sync(scenario)()
+
+    def test_consumer_events_are_queued_not_run_by_listener(self):
+        class QueuedSubscriber(FanoutConsumerMixin, RecordingSubscriber):
+            pass
+
+        async def scenario():
+            local_hub = FanoutHub()
+            subscriber = QueuedSubscriber()
+            subscriber.fanout_queue = asyncio.Queue()
+            await local_hub.subscribe('gold_price_updates', subscriber)
+
+            event = {'type': 'gold_price_update'}
+            await local_hub.deliver('gold_price_updates', event)
+
+            assert subscriber.events == []
+            assert subscriber.fanout_queue.get_nowait() == event
+            await local_hub.unsubscribe('gold_price_updates', subscriber)
+
+        async_to_sync(scenario)()
+
+
+@pytest.mark.django_db
+class TestGoldPriceConsumerFanout:
+    """GoldPriceConsumer receives ticks through the hub."""
+
+    def test_consumer_receives_enveloped_tick(self):
+        async def scenario():
+            communicator = WebsocketCommunicator(GoldPriceConsumer.as_asgi(), '/ws/gold-price/')
+            connected, _ = await communicator.connect()
+            assert connected
+            assert len(hub.subscribers['gold_price_updates']) == 1
+
+            await get_channel_layer().group_send('gold_price_updates', envelope('gold_price_updates', {
+                'type': 'gold_price_update',
+                'data': {'price_per_gram': 2600.0},
+            }))
+            assert await communicator.receive_json_from() == {'price_per_gram': 2600.0}
+            await communicator.disconnect()
+            assert 'gold_price_updates' not in hub.subscribers
+
+        async_to_sync(scenario)()
+
+
+@pytest.mark.django_db
+class TestGoldPriceConsumerResume:
+    """Gap fill for reconnecting clients."""
+
+    def test_resume_replays_missing_ticks_then_dedupes_live(self):
+        for price in range(4):
+            tick_buffer.append({'price_per_gram': float(price)})
+
+        async def scenario():
+            communicator = WebsocketCommunicator(GoldPriceConsumer.as_asgi(), '/ws/gold-price/')
+            await communicator.connect()
+            await communicator.send_json_to({'action': 'resume', 'last_seq': 2})
+            assert (await communicator.receive_json_from())['seq'] == 3
+            assert (await communicator.receive_json_from())['seq'] == 4
+
+            # A live copy of an already replayed tick is not sent twice
+            await hub.deliver('gold_price_updates', {
+                'type': 'gold_price_update',
+                'data': {'price_per_gram': 3.0, 'seq': 4},
+            })
+            assert await communicator.receive_nothing()
+            await communicator.disconnect()
+
+        async_to_sync(scenario)()
+
+    def test_live_tick_during_replay_is_sent_after_it(self):
+        for price in range(4):
+            tick_buffer.append({'price_per_gram': float(price)})
+
+        class RecordingStream(TickStreamMixin):
+            def __init__(self):
+                self.sent = []
+
+            async def send_tick(self, tick):
+                self.sent.append(tick['seq'])
+
+        stream = RecordingStream()
+        since = tick_buffer.asince
+
+        async def since_then_live_tick(seq):
+            ticks = await since(seq)
+            await stream.deliver_tick({'price_per_gram': 4.0, 'seq': 5})
+            return ticks
+
+        with mock.patch.object(tick_buffer, 'asince', side_effect=since_then_live_tick):
+            async_to_sync(stream.resume_ticks)(1)
+
+        assert stream.sent == [2, 3, 4, 5]
+
+    def test_resume_sends_snapshot_when_gap_too_large(self):
+        for price in range(3):
+            tick_buffer.append({'price_per_gram': float(price)})
+
+        async def scenario():
+            communicator = WebsocketCommunicator(GoldPriceConsumer.as_asgi(), '/ws/gold-price/')
+            await communicator.connect()
+            await communicator.send_json_to({'action': 'resume', 'last_seq': 99})
+            message = await communicator.receive_json_from()
+            assert message['type'] == 'snapshot'
+            assert message['seq'] == 3
+            await communicator.disconnect()
+
+        async_to_sync(scenario)()
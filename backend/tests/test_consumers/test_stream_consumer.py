@@ -0,0 +1,163 @@
+"""
+Unit tests for the multiplexed StreamConsumer.
+"""
+import json
+import pytest
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import AnonymousUser
+from rest_framework_simplejwt.tokens import AccessToken
+from types import SimpleNamespace
+
+from core.consumers import StreamConsumer
+from core.fanout import envelope
+from gold_trader.asgi import application
+
+
+def make_communicator(user=None):
+    communicator = WebsocketCommunicator(StreamConsumer.as_asgi(), '/ws/stream/')
+    communicator.scope['user'] = user or AnonymousUser()
+    return communicator
+
+
+def authenticated_user(user_id=1):
+    return SimpleNamespace(id=user_id, is_authenticated=True)
+
+
+@pytest.mark.django_db
+class TestStreamConsumer:
+    """Test cases for topic subscriptions over a single socket."""
+
+    def test_subscribe_and_receive_price_tick(self):
+        async def scenario():
+            communicator = make_communicator()
+            connected, _ = await communicator.connect()
+            assert connected
+
+            await communicator.send_json_to({'action': 'subscribe', 'topic': 'prices'})
+            assert await communicator.receive_json_from() == {'type': 'subscribed', 'topic': 'prices'}
+
+            await get_channel_layer().group_send('gold_price_updates', envelope('gold_price_updates', {
+                'type': 'gold_price_update',
+                'data': {'price_per_gram': 2500.0},
+            }))
+            message = await communicator.receive_json_from()
+            assert message == {'topic': 'prices', 'data': {'price_per_gram': 2500.0}}
+            await communicator.disconnect()
+
+        async_to_sync(scenario)()
+
+    def test_unsubscribe_stops_delivery(self):
+        async def scenario():
+            communicator = make_communicator()
+            await communicator.connect()
+            await communicator.send_json_to({'action': 'subscribe', 'topic': 'prices'})
+            await communicator.receive_json_from()
+            await communicator.send_json_to({'action': 'unsubscribe', 'topic': 'prices'})
+            assert await communicator.receive_json_from() == {'type': 'unsubscribed', 'topic': 'prices'}
+
+            await get_channel_layer().group_send('gold_price_updates', envelope('gold_price_updates', {
+                'type': 'gold_price_update',
+                'data': {'price_per_gram': 2500.0},
+            }))
+            assert await communicator.receive_nothing()
+            await communicator.disconnect()
+
+        async_to_sync(scenario)()
+
+    def test_user_topics_multiplexed(self):
+        async def scenario():
+            communicator = make_communicator(authenticated_user(42))
+            await communicator.connect()
+            for topic in ('alerts', 'wallet'):
+                await communicator.send_json_to({'action': 'subscribe', 'topic': topic})
+                await communicator.receive_json_from()
+
+            layer = get_channel_layer()
+            await layer.group_send('user_42_alerts', {
+                'type': 'send_alert_notification',
+                'message': {'alert_id': 7},
+            })
+            await layer.group_send('user_42_wallet', {
+                'type': 'wallet_update',
+                'data': {'balance': 100.0},
+            })
+            assert await communicator.receive_json_from() == {'topic': 'alerts', 'data': {'alert_id': 7}}
+            assert await communicator.receive_json_from() == {'topic': 'wallet', 'data': {'balance': 100.0}}
+            await communicator.disconnect()
+
+        async_to_sync(scenario)()
+
+    def test_user_topic_requires_authentication(self):
+        async def scenario():
+            communicator = make_communicator()
+            await communicator.connect()
+            await communicator.send_json_to({'action': 'subscribe', 'topic': 'wallet'})
+            message = await communicator.receive_json_from()
+            assert message['type'] == 'error'
+            await communicator.disconnect()
+
+        async_to_sync(scenario)()
+
+    def test_invalid_messages(self):
+        async def scenario():
+            communicator = make_communicator()
+            await communicator.connect()
+            await communicator.send_to(text_data='not json')
+            assert (await communicator.receive_json_from())['type'] == 'error'
+            await communicator.send_json_to({'action': 'subscribe', 'topic': 'unknown'})
+            assert (await communicator.receive_json_from())['type'] == 'error'
+            await communicator.send_to(text_data=json.dumps({'action': 'dance', 'topic': 'prices'}))
+            assert (await communicator.receive_json_from())['type'] == 'error'
+            await communicator.disconnect()
+
+        async_to_sync(scenario)()
+
+
+@pytest.mark.django_db
+class TestJWTAuthMiddleware:
+    """Sockets routed through the ASGI application authenticate with a JWT."""
+
+    async def subscribe_wallet(self, communicator):
+        await communicator.send_json_to({'action': 'subscribe', 'topic': 'wallet'})
+        return await communicator.receive_json_from()
+
+    def test_wallet_subscribe_with_query_token(self, verified_user):
+        async def scenario():
+            communicator = WebsocketCommunicator(application, f'/ws/stream/?token={AccessToken.for_user(verified_user)}')
+            connected, _ = await communicator.connect()
+            assert connected
+            assert await self.subscribe_wallet(communicator) == {'type': 'subscribed', 'topic': 'wallet'}
+
+            await get_channel_layer().group_send(f'user_{verified_user.pk}_wallet', {
+                'type': 'wallet_update',
+                'data': {'balance': 100000.0},
+            })
+            assert await communicator.receive_json_from() == {'topic': 'wallet', 'data': {'balance': 100000.0}}
+            await communicator.disconnect()
+
+        async_to_sync(scenario)()
+
+    def test_wallet_subscribe_with_subprotocol_token(self, verified_user):
+        async def scenario():
+            communicator = WebsocketCommunicator(
+                application, '/ws/stream/', subprotocols=['bearer', str(AccessToken.for_user(verified_user))],
+            )
+            connected, subprotocol = await communicator.connect()
+            assert connected
+            assert subprotocol == 'bearer'
+            assert await self.subscribe_wallet(communicator) == {'type': 'subscribed', 'topic': 'wallet'}
+            await communicator.disconnect()
+
+        async_to_sync(scenario)()
+
+    def test_invalid_token_is_anonymous(self):
+        async def scenario():
+            communicator = WebsocketCommunicator(application, '/ws/stream/?token=not-a-jwt')
+            connected, _ = await communicator.connect()
+            assert connected
+            assert (await self.subscribe_wallet(communicator))['type'] == 'error'
+            await communicator.disconnect()
+
+        async_to_sync(scenario)()
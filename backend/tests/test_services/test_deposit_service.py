@@ -0,0 +1,48 @@
+"""
+Unit tests for exactly-once deposit settlement.
+"""
+import pytest
+from decimal import Decimal
+
+from core.models import Deposit, LedgerEntry, User
+from core.services import DepositService, TradeService
+from tests.factories.deposit_factory import DepositFactory
+
+
+@pytest.mark.django_db
+class TestDepositService:
+    def test_settle_credits_once(self, user):
+        deposit = DepositFactory(user=user, amount=Decimal('5000.00'))
+        stale = Deposit.objects.get(pk=deposit.pk)
+
+        assert DepositService.settle(deposit) is True
+        assert DepositService.settle(stale) is False
+
+        user.refresh_from_db()
+        assert user.balance == Decimal('5000.00')
+        assert deposit.status == 'COMPLETED'
+        assert LedgerEntry.objects.filter(entry_type='DEPOSIT').count() == 2
+
+    def test_failed_deposit_is_not_credited(self, user):
+        deposit = DepositFactory(user=user, status='FAILED')
+
+        assert DepositService.settle(deposit) is False
+        user.refresh_from_db()
+        assert user.balance == Decimal('0')
+
+    def test_credit_does_not_overwrite_concurrent_changes(self, verified_user):
+        deposit = DepositFactory(user=verified_user, amount=Decimal('5000.00'))
+        # A trade debits the balance after the deposit's user row was loaded
+        assert deposit.user.balance == Decimal('100000.00')
+        TradeService.debit_cash(verified_user.pk, Decimal('2500.00'))
+
+        deposit.complete_deposit()
+
+        assert User.objects.get(pk=verified_user.pk).balance == Decimal('102500.00')
+
+    def test_create_settled(self, user):
+        deposit = DepositService.create_settled(user, Decimal('100.00'))
+
+        assert deposit.status == 'COMPLETED'
+        assert deposit.reference.startswith('MOCK-')
+        assert User.objects.get(pk=user.pk).balance == Decimal('100.00')
@@ -0,0 +1,177 @@
+"""
+Unit tests for the double-entry ledger.
+"""
+import io
+import pytest
+from decimal import Decimal
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import F, Sum
+
+from core.models import ConditionalOrder, Deposit, GoldHolding, LedgerEntry, LedgerSnapshot, User
+from core.services import (
+    ConditionalOrderService, LedgerService, LimitOrderService, RecurringBuyService, TradeService,
+)
+
+
+def ledger_cash(user):
+    return LedgerService.balance(LedgerService.cash(user.pk))
+
+
+def ledger_gold(user):
+    return LedgerService.balance(LedgerService.gold(user.pk))
+
+
+def assert_balanced():
+    """Every asset sums to zero across all accounts."""
+    for asset in ('CASH', 'GOLD'):
+        total = LedgerEntry.objects.filter(account__asset=asset).aggregate(total=Sum('amount'))['total']
+        assert Decimal(total or 0).quantize(Decimal('0.001')) == 0
+
+
+def assert_projection_matches(user):
+    user.refresh_from_db()
+    gold = GoldHolding.objects.filter(user=user).aggregate(total=Sum('amount'))['total'] or Decimal('0')
+    assert ledger_cash(user) == user.balance
+    assert ledger_gold(user) == gold
+
+
+@pytest.fixture
+def funded_user(user):
+    """User whose whole balance was deposited through the ledger."""
+    user.refresh_from_db()
+    deposit = Deposit.objects.create(user=user, amount=Decimal('50000.00'), reference='LEDGER-1')
+    deposit.complete_deposit()
+    user.refresh_from_db()
+    return user
+
+
+@pytest.mark.django_db
+class TestLedgerService:
+    def test_deposit_posts_balanced_journal(self, funded_user):
+        assert ledger_cash(funded_user) == Decimal('50000.00')
+        assert LedgerService.balance(LedgerService.EXTERNAL_CASH) == Decimal('-50000.00')
+        assert_balanced()
+
+    def test_trades_keep_projection_in_sync(self, funded_user):
+        TradeService.execute(funded_user, 'BUY', Decimal('3.5'), Decimal('2500.55'))
+        TradeService.execute(funded_user, 'SELL', Decimal('1.25'), Decimal('2600.10'))
+        TradeService.execute_batch(funded_user, [
+            {'type': 'BUY', 'amount': Decimal('0.333')},
+            {'type': 'SELL', 'amount': Decimal('0.5')},
+        ], Decimal('2555.55'))
+
+        assert_projection_matches(funded_user)
+        assert_balanced()
+
+    def test_limit_order_lifecycle(self, funded_user):
+        filled = LimitOrderService.place(funded_user, 'BUY', Decimal('2'), Decimal('2400.00'))
+        cancelled = LimitOrderService.place(funded_user, 'BUY', Decimal('1'), Decimal('2300.00'))
+        assert LedgerService.balance(LedgerService.ESCROW_CASH) == Decimal('7100.00')
+
+        LimitOrderService.cancel(funded_user, cancelled.id)
+        LimitOrderService.fill([filled], Decimal('2350.00'))
+
+        assert LedgerService.balance(LedgerService.ESCROW_CASH) == 0
+        assert_projection_matches(funded_user)
+        assert_balanced()
+
+    def test_conditional_and_recurring_buys(self, funded_user):
+        funded_user.recurring_buy_plans.create(amount=Decimal('1000.00'), frequency='DAILY')
+        order = ConditionalOrder.objects.create(
+            user=funded_user, side='BUY', amount=Decimal('1'), trigger_price=Decimal('2500'), condition='ABOVE'
+        )
+
+        RecurringBuyService.run_due(price_per_gram=Decimal('2999.99'))
+        ConditionalOrderService.execute([order], Decimal('2600.00'))
+
+        assert_projection_matches(funded_user)
+        assert_balanced()
+
+    def test_unbalanced_journal_is_rejected(self, user):
+        with pytest.raises(ValueError):
+            LedgerService.post('ADJUSTMENT', 'test', [(LedgerService.cash(user.pk), Decimal('1'))])
+        assert not LedgerEntry.objects.exists()
+
+    def test_entries_are_append_only(self, funded_user):
+        entry = LedgerEntry.objects.first()
+        entry.amount = Decimal('1')
+        with pytest.raises(ValueError):
+            entry.save()
+        with pytest.raises(ValueError):
+            entry.delete()
+
+    def test_snapshot_plus_tail(self, funded_user):
+        assert LedgerService.snapshot(lag_seconds=0) == 2
+        TradeService.execute(funded_user, 'BUY', Decimal('1'), Decimal('2500.00'))
+
+        snapshot = LedgerSnapshot.objects.get(account__code=LedgerService.cash(funded_user.pk))
+        assert snapshot.balance == Decimal('50000.00')
+        assert ledger_cash(funded_user) == Decimal('47500.00')
+
+        # Only accounts with new entries get a new snapshot
+        assert LedgerService.snapshot(lag_seconds=0) == 4
+        assert LedgerService.snapshot(lag_seconds=0) == 0
+        assert ledger_cash(funded_user) == Decimal('47500.00')
+
+    def test_snapshot_respects_lag(self, funded_user):
+        assert LedgerService.snapshot(lag_seconds=3600) == 0
+
+    def test_open_balances(self, user, gold_holding):
+        User.objects.filter(pk=user.pk).update(balance=Decimal('1234.56'))
+
+        assert LedgerService.open_balances() == 1
+        assert LedgerService.open_balances() == 0
+
+        assert_projection_matches(user)
+        assert_balanced()
+
+    def test_open_balances_after_user_already_traded(self, user, gold_holding):
+        User.objects.filter(pk=user.pk).update(balance=Decimal('10000.00'))
+        TradeService.execute(user, 'BUY', Decimal('1'), Decimal('2500.00'))
+
+        assert LedgerService.open_balances() == 1
+        assert LedgerService.open_balances() == 0
+
+        assert_projection_matches(user)
+        assert_balanced()
+
+    def test_balances_of_several_accounts(self, funded_user):
+        LedgerService.snapshot(lag_seconds=0)
+        TradeService.execute(funded_user, 'BUY', Decimal('2'), Decimal('2500.00'))
+        cash, gold = LedgerService.cash(funded_user.pk), LedgerService.gold(funded_user.pk)
+
+        assert LedgerService.balances([cash, gold, 'user:0:cash']) == {
+            cash: Decimal('45000.000'), gold: Decimal('2.000'),
+        }
+
+    def test_verify_reports_projection_drift(self, funded_user):
+        TradeService.execute(funded_user, 'BUY', Decimal('1'), Decimal('2500.00'))
+        LedgerService.snapshot(lag_seconds=0)
+        assert LedgerService.verify() == []
+
+        User.objects.filter(pk=funded_user.pk).update(balance=F('balance') + Decimal('10.00'))
+
+        assert LedgerService.verify() == [(funded_user.pk, 'CASH', Decimal('10.000'))]
+
+@pytest.mark.django_db
+def test_snapshot_ledger_command(user, gold_holding):
+    out = io.StringIO()
+
+    call_command('snapshot_ledger', open_balances=True, lag_seconds=0, stdout=out)
+
+    assert 'Opened ledger balances for 1 users' in out.getvalue()
+    assert LedgerSnapshot.objects.filter(account__code=LedgerService.gold(user.pk)).exists()
+
+
+@pytest.mark.django_db
+def test_snapshot_ledger_command_verify(funded_user):
+    out = io.StringIO()
+    call_command('snapshot_ledger', verify=True, lag_seconds=0, stdout=out)
+    assert 'Balance projections match the ledger' in out.getvalue()
+
+    GoldHolding.objects.create(user=funded_user, amount=Decimal('1.000'), avg_price=Decimal('2500.00'))
+
+    with pytest.raises(CommandError):
+        call_command('snapshot_ledger', verify=True, lag_seconds=0, stdout=out)
+    assert f'User {funded_user.pk} GOLD' in out.getvalue()
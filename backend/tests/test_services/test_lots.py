@@ -0,0 +1,139 @@
+"""
+Unit tests for lot accounting: the vectorized replay and live FIFO lots.
+"""
+import pytest
+from decimal import Decimal
+
+from core import lots
+from core.models import GoldLot, UserTradingStats
+from core.services import LotService, TradeService, TradingStatsService
+
+
+def reference(trades, method):
+    """Per-trade loop the vectorized replay must agree with."""
+    open_lots, held, cost, realized = [], 0.0, 0.0, []
+    for side, grams, price in trades:
+        if side == 'BUY':
+            open_lots.append([grams, price])
+            held, cost = held + grams, cost + grams * price
+            realized.append(0.0)
+        elif method == 'AVERAGE':
+            # Grams beyond what is held predate the history and realize nothing
+            covered = min(grams, held)
+            avg = cost / held if held > 1e-12 else price
+            realized.append(covered * (price - avg))
+            held, cost = held - covered, cost - avg * covered
+        else:
+            need, consumed = grams, 0.0
+            while need > 1e-12 and open_lots:
+                lot = open_lots[0]
+                taken = min(lot[0], need)
+                consumed, lot[0], need = consumed + taken * lot[1], lot[0] - taken, need - taken
+                if lot[0] <= 1e-12:
+                    open_lots.pop(0)
+            realized.append((grams - need) * price - consumed)
+            held, cost = held - (grams - need), cost - consumed
+    return realized, cost, held
+
+
+TRADES = [
+    ('BUY', 2.0, 2000.0), ('BUY', 1.0, 2600.0), ('SELL', 2.5, 2500.0),
+    ('SELL', 0.5, 2700.0), ('BUY', 3.0, 2400.0), ('SELL', 0.75, 2450.0),
+    ('BUY', 0.25, 2550.0), ('SELL', 1.0, 2300.0),
+]
+
+
+# Sells beyond the grams bought so far, as for holdings that predate the history
+UNCOVERED_TRADES = [
+    ('SELL', 1.0, 100.0), ('BUY', 1.0, 50.0), ('SELL', 1.0, 60.0),
+    ('BUY', 2.0, 40.0), ('SELL', 3.0, 45.0), ('BUY', 1.0, 70.0),
+]
+
+
+class TestReplay:
+    @pytest.mark.parametrize('method', lots.METHODS)
+    @pytest.mark.parametrize('trades', [TRADES, UNCOVERED_TRADES])
+    def test_matches_per_trade_loop(self, method, trades):
+        result = lots.replay(*zip(*trades), method=method)
+        expected, open_cost, open_grams = reference(trades, method)
+
+        assert result.realized.tolist() == pytest.approx(expected)
+        assert result.open_cost == pytest.approx(open_cost)
+        assert result.open_grams == pytest.approx(open_grams)
+
+    def test_uncovered_sell_does_not_take_later_buys(self):
+        result = lots.replay(['SELL', 'BUY', 'SELL'], [1, 1, 1], [100, 50, 60], method='FIFO')
+
+        assert result.realized.tolist() == pytest.approx([0, 0, 10])
+
+    def test_fifo_remaining_per_buy(self):
+        result = lots.replay(*zip(*TRADES), method='FIFO')
+
+        assert result.remaining.tolist() == pytest.approx([0, 0, 0, 0, 1.25, 0, 0.25, 0])
+
+    def test_long_shrinking_position_stays_finite(self):
+        trades, held = [('BUY', 1000.0, 2500.0)], 1000.0
+        for i in range(300):
+            trades.append(('SELL', held * 0.9, 2600.0))
+            trades.append(('BUY', 1.0, 2000.0 + i))
+            held = held * 0.1 + 1.0
+
+        result = lots.replay(*zip(*trades), method='AVERAGE')
+        expected, open_cost, _ = reference(trades, 'AVERAGE')
+
+        assert result.realized.tolist() == pytest.approx(expected)
+        assert result.open_cost == pytest.approx(open_cost)
+
+    def test_empty_history(self):
+        result = lots.replay([], [], [])
+
+        assert result.open_grams == 0
+        assert result.open_cost == 0
+
+    def test_unknown_method(self):
+        with pytest.raises(ValueError):
+            lots.replay(['BUY'], [1], [2500], method='LIFO')
+
+
+@pytest.mark.django_db
+class TestLiveLots:
+    def test_sells_consume_oldest_lots(self, verified_user):
+        TradeService.execute(verified_user, 'BUY', Decimal('2'), Decimal('2000.00'))
+        TradeService.execute(verified_user, 'BUY', Decimal('1'), Decimal('2600.00'))
+        TradeService.execute(verified_user, 'SELL', Decimal('2.5'), Decimal('2500.00'))
+
+        open_lots = GoldLot.objects.filter(user=verified_user, remaining__gt=0)
+        assert [(lot.remaining, lot.price_per_gram) for lot in open_lots] == [(Decimal('0.500'), Decimal('2600.00'))]
+        # 2.5 * 2500 - (2 * 2000 + 0.5 * 2600)
+        assert UserTradingStats.objects.get(user=verified_user).realized_pnl == Decimal('950.00')
+
+    def test_batch_sell_can_consume_lot_bought_in_same_batch(self, verified_user):
+        TradeService.execute_batch(verified_user, [
+            {'type': 'BUY', 'amount': Decimal('1')},
+            {'type': 'SELL', 'amount': Decimal('0.4')},
+        ], Decimal('2500.00'))
+
+        lot = GoldLot.objects.get(user=verified_user)
+        assert lot.remaining == Decimal('0.600')
+
+    def test_position_and_unrealized_pnl(self, verified_user):
+        TradeService.execute(verified_user, 'BUY', Decimal('2'), Decimal('2000.00'))
+        TradeService.execute(verified_user, 'BUY', Decimal('1'), Decimal('2600.00'))
+        TradeService.execute(verified_user, 'SELL', Decimal('2.5'), Decimal('2500.00'))
+
+        position = LotService.position(verified_user.pk, Decimal('2700.00'))
+
+        assert position == {
+            'open_grams': Decimal('0.500'), 'open_cost': Decimal('1300.00'), 'unrealized_pnl': Decimal('50.00'),
+        }
+
+    def test_rebuild_recreates_open_lots(self, verified_user):
+        TradeService.execute(verified_user, 'BUY', Decimal('2'), Decimal('2000.00'))
+        TradeService.execute(verified_user, 'BUY', Decimal('1'), Decimal('2600.00'))
+        TradeService.execute(verified_user, 'SELL', Decimal('2.5'), Decimal('2500.00'))
+        live = list(GoldLot.objects.filter(remaining__gt=0).values_list('remaining', 'price_per_gram'))
+
+        TradingStatsService.rebuild([verified_user.pk])
+
+        assert list(GoldLot.objects.values_list('remaining', 'price_per_gram')) == live
+        assert UserTradingStats.objects.get(user=verified_user).realized_pnl == Decimal('950.00')
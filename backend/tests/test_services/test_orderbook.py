@@ -0,0 +1,246 @@
+"""
+Unit tests for the limit order book, trigger index and matching engine.
+"""
+import pytest
+from decimal import Decimal
+from types import SimpleNamespace
+
+from core.models import ConditionalOrder, GoldHolding, LimitOrder, Transaction
+from core.orderbook import OrderBook, TriggerIndex, order_book, trigger_index
+from core.services import ConditionalOrderService, LimitOrderService, PriceAlertService, TradeError
+
+
+def order(order_id, side, limit_price, amount='1.000'):
+    return SimpleNamespace(id=order_id, user_id=1, side=side, amount=Decimal(amount), limit_price=Decimal(limit_price))
+
+
+def trigger(order_id, condition, trigger_price):
+    return SimpleNamespace(id=order_id, user_id=1, side='SELL', amount=Decimal('1'),
+                           condition=condition, trigger_price=Decimal(trigger_price))
+
+
+@pytest.fixture(autouse=True)
+def empty_book():
+    order_book.clear()
+    trigger_index.clear()
+    yield
+    order_book.clear()
+    trigger_index.clear()
+
+
+class TestOrderBook:
+    """Price-time priority matching."""
+
+    def test_bids_fill_at_or_above_price_best_first(self):
+        book = OrderBook()
+        for o in (order(1, 'BUY', '2490'), order(2, 'BUY', '2510'), order(3, 'BUY', '2500'), order(4, 'BUY', '2510')):
+            book.add(o)
+
+        matched = book.match(2500)
+
+        assert [o.id for o in matched] == [2, 4, 3]
+        assert len(book) == 1
+
+    def test_asks_fill_at_or_below_price_best_first(self):
+        book = OrderBook()
+        for o in (order(1, 'SELL', '2510'), order(2, 'SELL', '2490'), order(3, 'SELL', '2500')):
+            book.add(o)
+
+        matched = book.match(Decimal('2505'))
+
+        assert [o.id for o in matched] == [2, 3]
+        assert book.asks.prices == [Decimal('2510')]
+
+    def test_no_cross(self):
+        book = OrderBook()
+        book.add(order(1, 'BUY', '2400'))
+        book.add(order(2, 'SELL', '2600'))
+
+        assert book.match(2500) == []
+        assert len(book) == 2
+
+    def test_discarded_orders_are_skipped(self):
+        book = OrderBook()
+        book.add(order(1, 'BUY', '2500'))
+        book.add(order(2, 'BUY', '2500'))
+        book.discard(1)
+
+        assert [o.id for o in book.match(2500)] == [2]
+
+
+class TestTriggerIndex:
+    """Threshold index follows PriceAlert.check_alert."""
+
+    def test_fires_crossed_thresholds_oldest_first(self):
+        index = TriggerIndex()
+        for o in (trigger(1, 'BELOW', '2400'), trigger(2, 'ABOVE', '2600'), trigger(3, 'BELOW', '2450'),
+                  trigger(4, 'ABOVE', '2450'), trigger(5, 'BELOW', '2300')):
+            index.add(o)
+
+        assert [o.id for o in index.match(2450)] == [3, 4]
+        assert [o.id for o in index.match(2300)] == [1, 5]
+        assert len(index) == 1
+
+    def test_threshold_is_inclusive(self):
+        index = TriggerIndex()
+        index.add(trigger(1, 'ABOVE', '2500'))
+        index.add(trigger(2, 'BELOW', '2500'))
+
+        assert [o.id for o in index.match(Decimal('2500'))] == [1, 2]
+
+    def test_nothing_fires_between_thresholds(self):
+        index = TriggerIndex()
+        index.add(trigger(1, 'ABOVE', '2600'))
+        index.add(trigger(2, 'BELOW', '2400'))
+
+        assert index.match(2500) == []
+        assert index.match(2600)[0].id == 1
+
+
+@pytest.mark.django_db
+class TestLimitOrderService:
+    """Reservation, cancellation and batch fills."""
+
+    def test_place_buy_reserves_cash(self, verified_user):
+        LimitOrderService.place(verified_user, 'BUY', Decimal('2'), Decimal('2400.00'))
+
+        verified_user.refresh_from_db()
+        assert verified_user.balance == Decimal('95200.00')
+
+    def test_place_buy_insufficient_balance(self, user):
+        with pytest.raises(TradeError, match='ยอดเงินไม่เพียงพอ'):
+            LimitOrderService.place(user, 'BUY', Decimal('1'), Decimal('2400.00'))
+        assert not LimitOrder.objects.exists()
+
+    def test_place_sell_reserves_gold(self, user, gold_holding):
+        LimitOrderService.place(user, 'SELL', Decimal('4'), Decimal('2600.00'))
+
+        gold_holding.refresh_from_db()
+        assert gold_holding.amount == Decimal('6.000')
+
+    def test_cancel_releases_reservation(self, verified_user):
+        placed = LimitOrderService.place(verified_user, 'BUY', Decimal('2'), Decimal('2400.00'))
+
+        LimitOrderService.cancel(verified_user, placed.id)
+
+        verified_user.refresh_from_db()
+        assert verified_user.balance == Decimal('100000.00')
+        with pytest.raises(TradeError):
+            LimitOrderService.cancel(verified_user, placed.id)
+
+    def test_cancel_sell_restores_holding(self, user, gold_holding):
+        placed = LimitOrderService.place(user, 'SELL', Decimal('4'), Decimal('2600.00'))
+
+        LimitOrderService.cancel(user, placed.id)
+
+        gold_holding.refresh_from_db()
+        assert gold_holding.amount == Decimal('10.000')
+        assert gold_holding.avg_price == Decimal('2400.00')
+
+    def test_tick_fills_crossing_orders(self, verified_user):
+        buy = LimitOrderService.place(verified_user, 'BUY', Decimal('2'), Decimal('2400.00'))
+        LimitOrderService.place(verified_user, 'BUY', Decimal('1'), Decimal('2300.00'))
+
+        filled = LimitOrderService.match_tick(Decimal('2350.00'))
+
+        assert [o.id for o in filled] == [buy.id]
+        buy.refresh_from_db()
+        assert buy.status == 'FILLED'
+        assert buy.filled_price == Decimal('2350.00')
+        # Reserved 4800 + 2300, refunded 100 on the fill
+        verified_user.refresh_from_db()
+        assert verified_user.balance == Decimal('93000.00')
+        holding = GoldHolding.objects.get(user=verified_user)
+        assert holding.amount == Decimal('2.000')
+        assert holding.avg_price == Decimal('2350.00')
+        trans = Transaction.objects.get(user=verified_user)
+        assert trans.total_amount == Decimal('4700.00')
+
+    def test_sell_fill_credits_proceeds(self, user, gold_holding):
+        LimitOrderService.place(user, 'SELL', Decimal('4'), Decimal('2600.00'))
+
+        LimitOrderService.match_tick(Decimal('2650.00'))
+
+        user.refresh_from_db()
+        assert user.balance == Decimal('10600.00')
+        assert Transaction.objects.get(user=user).transaction_type == 'SELL'
+
+    def test_cancelled_order_does_not_fill(self, verified_user):
+        placed = LimitOrderService.place(verified_user, 'BUY', Decimal('2'), Decimal('2400.00'))
+        order_book.sync()
+        LimitOrderService.cancel(verified_user, placed.id)
+
+        assert LimitOrderService.match_tick(Decimal('2300.00')) == []
+        assert not Transaction.objects.exists()
+
+    def test_broadcast_matches_orders(self, verified_user, monkeypatch):
+        monkeypatch.setattr('core.services._group_send', lambda group, event: None)
+        placed = LimitOrderService.place(verified_user, 'BUY', Decimal('1'), Decimal('2400.00'))
+
+        PriceAlertService.broadcast_price_update({
+            'price_per_gram': Decimal('2390.00'),
+            'price_per_baht': Decimal('36000.00'),
+            'currency': 'THB',
+        })
+
+        placed.refresh_from_db()
+        assert placed.status == 'FILLED'
+
+
+@pytest.mark.django_db
+class TestConditionalOrderService:
+    """Triggered orders execute through TradeService."""
+
+    def test_stop_loss_sells_on_drop(self, user, gold_holding):
+        stop = ConditionalOrder.objects.create(
+            user=user, side='SELL', amount=Decimal('4'), trigger_price=Decimal('2300'), condition='BELOW'
+        )
+
+        assert ConditionalOrderService.match_tick(Decimal('2350.00')) == []
+        executed = ConditionalOrderService.match_tick(Decimal('2290.00'))
+
+        assert [o.id for o in executed] == [stop.id]
+        stop.refresh_from_db()
+        assert stop.status == 'EXECUTED'
+        assert stop.executed_price == Decimal('2290.00')
+        gold_holding.refresh_from_db()
+        assert gold_holding.amount == Decimal('6.000')
+        user.refresh_from_db()
+        assert user.balance == Decimal('9160.00')
+
+    def test_same_tick_orders_execute_as_one_batch(self, verified_user):
+        for amount in ('1', '2'):
+            ConditionalOrder.objects.create(
+                user=verified_user, side='BUY', amount=Decimal(amount), trigger_price=Decimal('2500'), condition='ABOVE'
+            )
+
+        executed = ConditionalOrderService.match_tick(Decimal('2500.00'))
+
+        assert len(executed) == 2
+        assert Transaction.objects.filter(user=verified_user).count() == 2
+        assert GoldHolding.objects.get(user=verified_user).amount == Decimal('3.000')
+
+    def test_unfunded_orders_fail_individually(self, user, gold_holding):
+        first = ConditionalOrder.objects.create(
+            user=user, side='SELL', amount=Decimal('8'), trigger_price=Decimal('2300'), condition='BELOW'
+        )
+        second = ConditionalOrder.objects.create(
+            user=user, side='SELL', amount=Decimal('8'), trigger_price=Decimal('2300'), condition='BELOW'
+        )
+
+        executed = ConditionalOrderService.match_tick(Decimal('2200.00'))
+
+        assert [o.id for o in executed] == [first.id]
+        second.refresh_from_db()
+        assert second.status == 'FAILED'
+        assert second.failure_reason == 'จำนวนทองไม่เพียงพอ'
+
+    def test_cancelled_order_does_not_execute(self, user, gold_holding):
+        stop = ConditionalOrder.objects.create(
+            user=user, side='SELL', amount=Decimal('1'), trigger_price=Decimal('2300'), condition='BELOW'
+        )
+        trigger_index.sync()
+        ConditionalOrderService.cancel(user, stop.id)
+
+        assert ConditionalOrderService.match_tick(Decimal('2200.00')) == []
+        assert not Transaction.objects.exists()
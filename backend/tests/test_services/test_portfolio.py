@@ -0,0 +1,154 @@
+"""
+Unit tests for live portfolio valuation.
+"""
+import pytest
+from decimal import Decimal
+from asgiref.sync import async_to_sync
+from channels.testing import WebsocketCommunicator
+from types import SimpleNamespace
+
+from core.consumers import StreamConsumer
+from core.fanout import hub
+from core.models import GoldHolding
+from core.portfolio import PortfolioBook, load_totals, portfolio_book, valuation, value_curve
+from core.ticks import tick_buffer
+
+
+class RecordingConsumer:
+    """Stands in for a StreamConsumer."""
+
+    def __init__(self):
+        self.pushes = []
+
+    async def portfolio_update(self, event):
+        self.pushes.append(event['data'])
+
+
+def tick(price):
+    return {'type': 'gold_price_update', 'data': {'price_per_gram': price}}
+
+
+class TestValuation:
+    """valuation() mirrors GoldHoldingsSummaryView."""
+
+    def test_profit(self):
+        data = valuation(2.0, 5000.0, 2600.0)
+        assert data['current_value'] == 5200.0
+        assert data['profit_loss'] == 200.0
+        assert data['profit_loss_percent'] == 4.0
+
+    def test_zero_cost(self):
+        data = valuation(0.0, 0.0, 2600.0)
+        assert data['profit_loss'] == 0.0
+        assert data['profit_loss_percent'] == 0.0
+
+
+class TestValueCurve:
+    """Holdings step function times carried-forward prices."""
+
+    def test_steps_and_carries_prices(self):
+        grams, invested, price, value = value_curve(
+            grid=[0, 10, 20, 30],
+            trade_times=[5, 25], trade_grams=[2.0, -0.5], trade_cash=[5000.0, -1300.0],
+            price_times=[8, 22], prices=[2500.0, 2600.0],
+        )
+
+        assert grams.tolist() == [0.0, 2.0, 2.0, 1.5]
+        assert invested.tolist() == [0.0, 5000.0, 5000.0, 3700.0]
+        assert price[0] != price[0]  # NaN before the first price
+        assert price[1:].tolist() == [2500.0, 2500.0, 2600.0]
+        assert value[1:].tolist() == [5000.0, 5000.0, 3900.0]
+
+    def test_no_trades_or_prices(self):
+        grams, invested, price, value = value_curve([0, 1], [], [], [], [], [])
+
+        assert grams.tolist() == [0.0, 0.0]
+        assert all(v != v for v in value)
+
+
+class TestPortfolioBook:
+    """Test cases for the in-memory holdings table."""
+
+    def test_pushes_only_when_change_exceeds_threshold(self, settings):
+        settings.PORTFOLIO_PUSH_THRESHOLD = 10.0
+
+        async def scenario():
+            book = PortfolioBook()
+            consumer = RecordingConsumer()
+            await book.register(1, consumer, 2.0, 5000.0)
+            await book.gold_price_update(tick(2500.0))
+            await book.gold_price_update(tick(2504.0))  # +8 THB: below threshold
+            await book.gold_price_update(tick(2510.0))  # +20 THB since last push
+            await book.unregister(1, consumer)
+            return consumer.pushes
+
+        pushes = async_to_sync(scenario)()
+        assert [push['current_value'] for push in pushes] == [5000.0, 5020.0]
+        assert pushes[-1]['profit_loss'] == 20.0
+
+    def test_unregister_swaps_rows(self):
+        async def scenario():
+            book = PortfolioBook(capacity=1)
+            consumers = [RecordingConsumer() for _ in range(3)]
+            for user_id, consumer in enumerate(consumers, start=1):
+                await book.register(user_id, consumer, float(user_id), 100.0)
+            await book.unregister(1, consumers[0])
+            await book.gold_price_update(tick(1000.0))
+            values = {user_id: book.amounts[index] for user_id, index in book.rows.items()}
+            for user_id, consumer in ((2, consumers[1]), (3, consumers[2])):
+                await book.unregister(user_id, consumer)
+            return values, consumers, book
+
+        values, consumers, book = async_to_sync(scenario)()
+        assert values == {2: 2.0, 3: 3.0}
+        assert consumers[0].pushes == []
+        assert consumers[2].pushes[-1]['current_value'] == 3000.0
+        assert book.size == 0
+
+    def test_update_holdings_pushes_immediately(self):
+        async def scenario():
+            book = PortfolioBook()
+            consumer = RecordingConsumer()
+            await book.register(1, consumer, 1.0, 2500.0)
+            await book.gold_price_update(tick(2500.0))
+            await book.update_holdings(1, 3.0, 7500.0)
+            await book.unregister(1, consumer)
+            return consumer.pushes
+
+        pushes = async_to_sync(scenario)()
+        assert pushes[-1]['total_amount'] == 3.0
+        assert pushes[-1]['current_value'] == 7500.0
+
+
+@pytest.mark.django_db
+class TestPortfolioTopic:
+    """StreamConsumer portfolio subscriptions."""
+
+    def test_load_totals_single_query(self, user, django_assert_num_queries):
+        GoldHolding.objects.create(user=user, amount=Decimal('2.000'), avg_price=Decimal('2500.00'))
+        with django_assert_num_queries(1):
+            assert load_totals(user.id) == (2.0, 5000.0)
+
+    def test_subscribe_pushes_current_valuation(self, user):
+        GoldHolding.objects.create(user=user, amount=Decimal('2.000'), avg_price=Decimal('2500.00'))
+        tick_buffer.append({'price_per_gram': 2600.0})
+        portfolio_book.price = None
+
+        async def scenario():
+            communicator = WebsocketCommunicator(StreamConsumer.as_asgi(), '/ws/stream/')
+            communicator.scope['user'] = SimpleNamespace(id=user.id, is_authenticated=True)
+            await communicator.connect()
+            await communicator.send_json_to({'action': 'subscribe', 'topic': 'portfolio'})
+            assert (await communicator.receive_json_from())['type'] == 'subscribed'
+            push = await communicator.receive_json_from()
+            assert push['topic'] == 'portfolio'
+            assert push['data']['current_value'] == 5200.0
+            assert push['data']['profit_loss'] == 200.0
+
+            await hub.deliver('gold_price_updates', tick(2700.0))
+            push = await communicator.receive_json_from()
+            assert push['data']['current_value'] == 5400.0
+            await communicator.disconnect()
+            assert portfolio_book.size == 0
+
+        async_to_sync(scenario)()
@@ -0,0 +1,106 @@
+"""
+Tests for ProfileCacheService and the cache-backed JWT authentication.
+"""
+import pytest
+from decimal import Decimal
+from unittest import mock
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.models import User
+from core.services import ProfileCacheService, TradeService
+
+
+def bearer(api_client, user):
+    api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+    return api_client
+
+
+@pytest.mark.django_db
+class TestProfileCacheService:
+    """Profiles are read through and written through on balance changes."""
+
+    def test_get_loads_once(self, user, django_assert_num_queries):
+        with django_assert_num_queries(1):
+            ProfileCacheService.get(user.pk)
+        with django_assert_num_queries(0):
+            profile = ProfileCacheService.get(user.pk)
+
+        assert profile['email'] == user.email
+        assert ProfileCacheService.get(0) is None
+
+    def test_balance_change_writes_through(self, verified_user, django_capture_on_commit_callbacks):
+        ProfileCacheService.get(verified_user.pk)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            TradeService.execute(verified_user, 'BUY', Decimal('2.000'), Decimal('2500.00'))
+
+        assert ProfileCacheService.get(verified_user.pk)['balance'] == Decimal('95000.00')
+
+    def test_refresh_finishing_after_a_later_change_is_not_served(self, user):
+        load = ProfileCacheService._load
+        interleaved = []
+
+        def load_then_change(user_id):
+            profile = load(user_id)
+            if not interleaved:
+                # A later balance change commits and refreshes before this
+                # refresh stores what it loaded
+                interleaved.append(True)
+                User.objects.filter(pk=user_id).update(balance=Decimal('42.00'))
+                ProfileCacheService.refresh(user_id)
+            return profile
+
+        with mock.patch.object(ProfileCacheService, '_load', side_effect=load_then_change):
+            ProfileCacheService.refresh(user.pk)
+
+        assert ProfileCacheService.get(user.pk)['balance'] == Decimal('42.00')
+
+    def test_save_invalidates(self, user, django_capture_on_commit_callbacks):
+        ProfileCacheService.get(user.pk)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            user.first_name = 'Somchai'
+            user.save()
+
+        assert ProfileCacheService.get(user.pk)['first_name'] == 'Somchai'
+
+    def test_user_is_built_without_a_query(self, user, django_assert_num_queries):
+        ProfileCacheService.get(user.pk)
+
+        with django_assert_num_queries(0):
+            cached = ProfileCacheService.user(user.pk)
+
+        assert (cached.pk, cached.email, cached.balance) == (user.pk, user.email, user.balance)
+
+
+@pytest.mark.django_db
+class TestCachedUserAuthentication:
+    """Balance and profile reads authenticate from the cache."""
+
+    def test_balance_served_from_cache(self, api_client, verified_user, django_assert_num_queries):
+        client = bearer(api_client, verified_user)
+        client.get('/api/wallet/balance/')
+
+        with django_assert_num_queries(0):
+            response = client.get('/api/wallet/balance/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['balance'] == 100000.0
+
+    def test_inactive_user_rejected(self, api_client, user):
+        User.objects.filter(pk=user.pk).update(is_active=False)
+
+        response = bearer(api_client, user).get('/api/auth/me/')
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_profile_update_saves_the_row(self, api_client, user):
+        client = bearer(api_client, user)
+
+        response = client.patch('/api/auth/profile/', {'first_name': 'Malee'}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        user.refresh_from_db()
+        assert user.first_name == 'Malee'
+        assert user.check_password('testpass123')
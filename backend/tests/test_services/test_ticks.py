@@ -0,0 +1,63 @@
+"""
+Unit tests for the sequence-numbered tick buffer.
+"""
+from unittest.mock import patch
+from asgiref.sync import async_to_sync
+from django.utils import timezone
+
+from core.services import PriceAlertService
+from core.ticks import TickBuffer, tick_buffer
+
+
+class TestTickBuffer:
+    """Test cases for TickBuffer."""
+
+    def test_append_assigns_monotonic_sequence(self):
+        buffer = TickBuffer(size=10)
+        first = buffer.append({'price_per_gram': 1.0})
+        second = buffer.append({'price_per_gram': 2.0})
+        assert (first['seq'], second['seq']) == (1, 2)
+        assert buffer.latest() == second
+
+    def test_since_returns_only_missing_ticks(self):
+        buffer = TickBuffer(size=10)
+        for price in range(5):
+            buffer.append({'price_per_gram': float(price)})
+        assert [tick['seq'] for tick in buffer.since(2)] == [3, 4, 5]
+        assert buffer.since(5) == []
+
+    def test_since_returns_none_when_gap_exceeds_buffer(self):
+        buffer = TickBuffer(size=3)
+        for price in range(6):
+            buffer.append({'price_per_gram': float(price)})
+        assert buffer.since(1) is None
+        assert [tick['seq'] for tick in buffer.since(3)] == [4, 5, 6]
+
+    def test_since_returns_none_after_sequence_reset(self):
+        buffer = TickBuffer(size=10)
+        buffer.append({'price_per_gram': 1.0})
+        assert buffer.since(50) is None
+
+    def test_since_empty_buffer(self):
+        assert TickBuffer(size=10).since(0) == []
+
+    def test_async_since_matches_sync(self):
+        buffer = TickBuffer(size=10)
+        for price in range(3):
+            buffer.append({'price_per_gram': float(price)})
+        assert async_to_sync(buffer.asince)(1) == buffer.since(1)
+
+
+class TestBroadcastSequence:
+    """Broadcast ticks carry sequence numbers."""
+
+    @patch('core.services.PriceAlertService.check_and_trigger_alerts')
+    @patch('core.services._group_send')
+    def test_broadcast_stamps_sequence(self, mock_send, mock_alerts):
+        price_data = {'price_per_gram': 2500, 'price_per_baht': 38110, 'timestamp': timezone.now()}
+        PriceAlertService.broadcast_price_update(price_data)
+        PriceAlertService.broadcast_price_update(price_data)
+
+        sent = [call.args[1]['data']['seq'] for call in mock_send.call_args_list]
+        assert sent == [1, 2]
+        assert tick_buffer.latest()['seq'] == 2
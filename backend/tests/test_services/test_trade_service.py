@@ -0,0 +1,157 @@
+"""
+Unit tests for TradeService conditional updates.
+"""
+import pytest
+from decimal import Decimal
+
+from core.models import GoldHolding, Transaction, User
+from core.services import TradeError, TradeService
+
+
+@pytest.mark.django_db
+class TestTradeService:
+    """Trades are applied with conditional UPDATE statements."""
+
+    def test_buy_debits_and_creates_holding(self, verified_user):
+        trans = TradeService.execute(verified_user, 'BUY', Decimal('2'), Decimal('2500.00'))
+
+        verified_user.refresh_from_db()
+        holding = GoldHolding.objects.get(user=verified_user)
+        assert verified_user.balance == Decimal('95000.00')
+        assert holding.amount == Decimal('2.000')
+        assert holding.avg_price == Decimal('2500.00')
+        assert trans.status == 'COMPLETED'
+        assert trans.total_amount == Decimal('5000.00')
+
+    def test_buy_updates_average_price(self, verified_user):
+        GoldHolding.objects.create(user=verified_user, amount=Decimal('1'), avg_price=Decimal('2000.00'))
+
+        TradeService.execute(verified_user, 'BUY', Decimal('1'), Decimal('3000.00'))
+
+        holding = GoldHolding.objects.get(user=verified_user)
+        assert holding.amount == Decimal('2.000')
+        assert holding.avg_price == Decimal('2500.00')
+        assert holding.total_value == Decimal('5000.00')
+
+    def test_sell_credits_and_reduces_holding(self, verified_user):
+        GoldHolding.objects.create(user=verified_user, amount=Decimal('3'), avg_price=Decimal('2000.00'))
+
+        TradeService.execute(verified_user, 'SELL', Decimal('1'), Decimal('2500.00'))
+
+        verified_user.refresh_from_db()
+        holding = GoldHolding.objects.get(user=verified_user)
+        assert verified_user.balance == Decimal('102500.00')
+        assert holding.amount == Decimal('2.000')
+        assert holding.avg_price == Decimal('2000.00')
+        assert holding.total_value == Decimal('4000.00')
+
+    def test_insufficient_balance_changes_nothing(self, user):
+        with pytest.raises(TradeError, match='ยอดเงินไม่เพียงพอ'):
+            TradeService.execute(user, 'BUY', Decimal('1'), Decimal('2500.00'))
+
+        assert not GoldHolding.objects.filter(user=user).exists()
+        assert not Transaction.objects.filter(user=user).exists()
+
+    def test_insufficient_gold(self, verified_user):
+        GoldHolding.objects.create(user=verified_user, amount=Decimal('1'), avg_price=Decimal('2000.00'))
+
+        with pytest.raises(TradeError, match='จำนวนทองไม่เพียงพอ'):
+            TradeService.execute(verified_user, 'SELL', Decimal('2'), Decimal('2500.00'))
+
+        verified_user.refresh_from_db()
+        assert verified_user.balance == Decimal('100000.00')
+
+    def test_sell_without_holding(self, verified_user):
+        with pytest.raises(TradeError, match='คุณยังไม่มีทองในครอบครอง'):
+            TradeService.execute(verified_user, 'SELL', Decimal('1'), Decimal('2500.00'))
+
+    def test_invalid_trade_type(self, verified_user):
+        with pytest.raises(TradeError, match='ประเภทธุรกรรมไม่ถูกต้อง'):
+            TradeService.execute(verified_user, 'HOLD', Decimal('1'), Decimal('2500.00'))
+
+    def test_stale_instance_does_not_overwrite_balance(self, verified_user):
+        """A concurrent debit made after the user was loaded is preserved."""
+        stale = User.objects.get(pk=verified_user.pk)
+        User.objects.filter(pk=verified_user.pk).update(balance=Decimal('6000.00'))
+
+        TradeService.execute(stale, 'BUY', Decimal('2'), Decimal('2500.00'))
+
+        verified_user.refresh_from_db()
+        assert verified_user.balance == Decimal('1000.00')
+
+    def test_debit_is_conditional(self, verified_user):
+        assert TradeService.debit_cash(verified_user.pk, Decimal('100000.00'))
+        assert not TradeService.debit_cash(verified_user.pk, Decimal('0.01'))
+
+
+@pytest.mark.django_db
+class TestExecuteBatch:
+    """Batches settle their net position in one transaction."""
+
+    def test_net_buy(self, verified_user):
+        orders = [
+            {'type': 'BUY', 'amount': Decimal('3')},
+            {'type': 'SELL', 'amount': Decimal('1')},
+        ]
+
+        records = TradeService.execute_batch(verified_user, orders, Decimal('2500.00'))
+
+        assert [r.transaction_type for r in records] == ['BUY', 'SELL']
+        verified_user.refresh_from_db()
+        assert verified_user.balance == Decimal('95000.00')
+        assert GoldHolding.objects.get(user=verified_user).amount == Decimal('2.000')
+
+    def test_net_sell_keeps_average_price(self, verified_user):
+        GoldHolding.objects.create(user=verified_user, amount=Decimal('5'), avg_price=Decimal('2000.00'))
+        orders = [
+            {'type': 'SELL', 'amount': Decimal('4')},
+            {'type': 'BUY', 'amount': Decimal('1')},
+        ]
+
+        TradeService.execute_batch(verified_user, orders, Decimal('2500.00'))
+
+        holding = GoldHolding.objects.get(user=verified_user)
+        assert holding.amount == Decimal('2.000')
+        assert holding.avg_price == Decimal('2000.00')
+        verified_user.refresh_from_db()
+        assert verified_user.balance == Decimal('107500.00')
+
+    def test_unfunded_batch_writes_nothing(self, user):
+        with pytest.raises(TradeError, match='ยอดเงินไม่เพียงพอ'):
+            TradeService.execute_batch(user, [{'type': 'BUY', 'amount': Decimal('1')}], Decimal('2500.00'))
+        assert not Transaction.objects.exists()
+
+    def test_sell_before_buy_needs_gold_already_held(self, verified_user):
+        orders = [
+            {'type': 'SELL', 'amount': Decimal('10')},
+            {'type': 'BUY', 'amount': Decimal('10')},
+        ]
+
+        with pytest.raises(TradeError, match='คุณยังไม่มีทองในครอบครอง'):
+            TradeService.execute_batch(verified_user, orders, Decimal('2500.00'))
+        assert not Transaction.objects.exists()
+
+    def test_buy_must_be_funded_before_later_sells(self, user):
+        User.objects.filter(pk=user.pk).update(balance=Decimal('1000.00'))
+        GoldHolding.objects.create(user=user, amount=Decimal('2'), avg_price=Decimal('2000.00'))
+        orders = [
+            {'type': 'BUY', 'amount': Decimal('1')},
+            {'type': 'SELL', 'amount': Decimal('1')},
+        ]
+
+        with pytest.raises(TradeError, match='ยอดเงินไม่เพียงพอ'):
+            TradeService.execute_batch(user, orders, Decimal('2500.00'))
+        assert not Transaction.objects.exists()
+
+    def test_zero_net_batch_notifies(self, verified_user, django_capture_on_commit_callbacks):
+        GoldHolding.objects.create(user=verified_user, amount=Decimal('1'), avg_price=Decimal('2000.00'))
+        orders = [
+            {'type': 'SELL', 'amount': Decimal('1')},
+            {'type': 'BUY', 'amount': Decimal('1')},
+        ]
+
+        with django_capture_on_commit_callbacks() as callbacks:
+            TradeService.execute_batch(verified_user, orders, Decimal('2500.00'))
+
+        assert Transaction.objects.filter(user=verified_user).count() == 2
+        assert callbacks
@@ -0,0 +1,123 @@
+"""
+Unit tests for incrementally maintained trading statistics.
+"""
+import io
+import pytest
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+from django.core.management import call_command
+from django.db.models import QuerySet
+
+from core.models import User, UserTradingStats
+from core.services import LimitOrderService, RecurringBuyService, TradeService, TradingStatsService
+from tests.factories.transaction_factory import TransactionFactory
+
+
+def stats_of(user):
+    return UserTradingStats.objects.get(user=user)
+
+
+def snapshot(stats):
+    return {field: getattr(stats, field) for field in TradingStatsService.FIELDS}
+
+
+@pytest.mark.django_db
+class TestLiveStats:
+    def test_buy_then_sell(self, verified_user):
+        TradeService.execute(verified_user, 'BUY', Decimal('2'), Decimal('2500.00'))
+        sell = TradeService.execute(verified_user, 'SELL', Decimal('1.5'), Decimal('2600.00'))
+
+        stats = stats_of(verified_user)
+        assert stats.total_bought == Decimal('2.000')
+        assert stats.total_sold == Decimal('1.500')
+        assert stats.volume == Decimal('8900.00')
+        assert stats.trade_count == 2
+        assert stats.realized_pnl == Decimal('150.00')
+        assert stats.last_trade_at == sell.transaction_date
+        assert stats.first_trade_at < stats.last_trade_at
+
+    def test_batch_limit_and_recurring_paths(self, verified_user, user, gold_holding, settings):
+        # The fixture holding predates any lots, so measure against its average cost
+        settings.LOT_ACCOUNTING_METHOD = 'AVERAGE'
+        TradeService.execute_batch(verified_user, [
+            {'type': 'BUY', 'amount': Decimal('1')},
+            {'type': 'BUY', 'amount': Decimal('2')},
+        ], Decimal('2500.00'))
+        order = LimitOrderService.place(user, 'SELL', Decimal('4'), Decimal('2600.00'))
+        LimitOrderService.fill([order], Decimal('2650.00'))
+        verified_user.recurring_buy_plans.create(amount=Decimal('2500.00'), frequency='DAILY')
+        RecurringBuyService.run_due(price_per_gram=Decimal('2500.00'))
+
+        assert stats_of(verified_user).trade_count == 3
+        assert stats_of(verified_user).total_bought == Decimal('4.000')
+        # Holding bought at 2400, sold at 2650
+        assert stats_of(user).realized_pnl == Decimal('1000.00')
+
+    def test_failed_trade_leaves_stats_untouched(self, user):
+        with pytest.raises(Exception):
+            TradeService.execute(user, 'BUY', Decimal('100'), Decimal('2500.00'))
+
+        assert not UserTradingStats.objects.exists()
+
+
+class TestCompute:
+    def test_realized_pnl_by_method(self):
+        at = datetime(2026, 1, 1, tzinfo=dt_timezone.utc)
+        rows = [
+            ('BUY', Decimal('1'), Decimal('2000.00'), Decimal('2000.00'), at),
+            ('BUY', Decimal('1'), Decimal('3000.00'), Decimal('3000.00'), at),
+            ('SELL', Decimal('1'), Decimal('2800.00'), Decimal('2800.00'), at),
+        ]
+
+        stats, _ = TradingStatsService.compute(rows, method='AVERAGE')
+
+        assert stats['realized_pnl'] == Decimal('300.00')
+        assert TradingStatsService.compute(rows, method='FIFO')[0]['realized_pnl'] == Decimal('800.00')
+        assert stats['volume'] == Decimal('7800.00')
+        assert stats['trade_count'] == 3
+
+    def test_empty_history(self):
+        assert TradingStatsService.compute([])[0]['trade_count'] == 0
+
+
+@pytest.mark.django_db
+class TestRebuild:
+    def test_rebuild_matches_live_updates(self, verified_user):
+        TradeService.execute(verified_user, 'BUY', Decimal('2'), Decimal('2500.00'))
+        TradeService.execute(verified_user, 'BUY', Decimal('1'), Decimal('2800.00'))
+        TradeService.execute(verified_user, 'SELL', Decimal('2'), Decimal('2700.00'))
+        live = snapshot(stats_of(verified_user))
+        UserTradingStats.objects.all().delete()
+
+        assert TradingStatsService.rebuild([verified_user.pk]) == 1
+
+        assert snapshot(stats_of(verified_user)) == live
+
+    def test_rebuild_locks_users_before_reading_history(self, verified_user):
+        TradeService.execute(verified_user, 'BUY', Decimal('2'), Decimal('2500.00'))
+        select_for_update = QuerySet.select_for_update
+        locked = []
+
+        def lock(queryset, *args, **kwargs):
+            locked.append(queryset.model)
+            return select_for_update(queryset, *args, **kwargs)
+
+        with mock.patch.object(QuerySet, 'select_for_update', autospec=True, side_effect=lock):
+            TradingStatsService.rebuild([verified_user.pk])
+
+        assert locked == [User]
+
+    def test_backfill_command(self, user, verified_user):
+        for _ in range(3):
+            TransactionFactory(user=user)
+        UserTradingStats.objects.create(user=verified_user, trade_count=99)
+        out = io.StringIO()
+
+        call_command('backfill_trading_stats', stdout=out)
+        call_command('backfill_trading_stats', user_ids=[verified_user.pk], stdout=out)
+
+        assert 'Rebuilt trading stats for 1 users' in out.getvalue()
+        assert stats_of(user).trade_count == 3
+        assert stats_of(user).volume == Decimal('15000.00')
+        assert not UserTradingStats.objects.filter(user=verified_user).exists()
@@ -0,0 +1,60 @@
+import pytest
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from decimal import Decimal
+from core.models import Transaction, GoldHolding
+
+
+@pytest.mark.django_db
+class TestBatchTradeView:
+    def test_batch_executes_all_orders(self, authenticated_client, user, price_history):
+        user.balance = Decimal('20000.00')
+        user.save()
+
+        url = reverse('core:gold_trade_batch')
+        data = {'orders': [
+            {'type': 'BUY', 'amount': '2'},
+            {'type': 'BUY', 'amount': '1.5'},
+            {'type': 'SELL', 'amount': '0.5'},
+        ]}
+        response = authenticated_client.post(url, data, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data['transactions']) == 3
+        assert Transaction.objects.filter(user=user).count() == 3
+        user.refresh_from_db()
+        assert user.balance == Decimal('20000.00') - Decimal('3') * price_history.price_per_gram
+        assert GoldHolding.objects.get(user=user).amount == Decimal('3.000')
+
+    def test_batch_insufficient_balance_is_atomic(self, authenticated_client, user, price_history):
+        url = reverse('core:gold_trade_batch')
+        data = {'orders': [{'type': 'BUY', 'amount': '1'}]}
+        response = authenticated_client.post(url, data, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'ยอดเงินไม่เพียงพอ' in response.data['error']
+        assert not Transaction.objects.filter(user=user).exists()
+
+    def test_batch_rejects_invalid_order(self, authenticated_client, price_history):
+        url = reverse('core:gold_trade_batch')
+        data = {'orders': [{'type': 'HOLD', 'amount': '1'}]}
+        response = authenticated_client.post(url, data, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'orders' in response.data
+
+    def test_batch_rejects_empty_list(self, authenticated_client, price_history):
+        url = reverse('core:gold_trade_batch')
+        response = authenticated_client.post(url, {'orders': []}, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    @override_settings(BATCH_TRADE_MAX_ORDERS=2)
+    def test_batch_size_limit(self, authenticated_client, price_history):
+        url = reverse('core:gold_trade_batch')
+        data = {'orders': [{'type': 'BUY', 'amount': '1'}] * 3}
+        response = authenticated_client.post(url, data, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'orders' in response.data
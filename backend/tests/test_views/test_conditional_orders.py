@@ -0,0 +1,48 @@
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from decimal import Decimal
+from core.models import ConditionalOrder
+
+
+@pytest.mark.django_db
+class TestConditionalOrderViews:
+    def test_create_stop_loss(self, authenticated_client, user):
+        url = reverse('core:conditional_order_list')
+        data = {'side': 'SELL', 'amount': '1.5', 'trigger_price': '2300.00', 'condition': 'BELOW'}
+        response = authenticated_client.post(url, data)
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['status'] == 'ACTIVE'
+        assert ConditionalOrder.objects.filter(user=user).count() == 1
+
+    def test_create_invalid_condition(self, authenticated_client):
+        url = reverse('core:conditional_order_list')
+        data = {'side': 'SELL', 'amount': '1', 'trigger_price': '2300.00', 'condition': 'SIDEWAYS'}
+        response = authenticated_client.post(url, data)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'condition' in response.data
+
+    def test_list_only_own_orders(self, authenticated_client, user, verified_user):
+        for owner in (user, verified_user):
+            ConditionalOrder.objects.create(
+                user=owner, side='SELL', amount=Decimal('1'), trigger_price=Decimal('2300'), condition='BELOW'
+            )
+
+        response = authenticated_client.get(reverse('core:conditional_order_list'))
+
+        data = response.data['results'] if 'results' in response.data else response.data
+        assert len(data) == 1
+
+    def test_cancel(self, authenticated_client, user):
+        order = ConditionalOrder.objects.create(
+            user=user, side='BUY', amount=Decimal('1'), trigger_price=Decimal('2600'), condition='ABOVE'
+        )
+
+        response = authenticated_client.post(reverse('core:conditional_order_cancel', args=[order.id]))
+        again = authenticated_client.post(reverse('core:conditional_order_cancel', args=[order.id]))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['status'] == 'CANCELLED'
+        assert again.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,92 @@
+"""
+Tests for the consolidated dashboard endpoint.
+"""
+import pytest
+from decimal import Decimal
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.models import PriceAlert
+from core.services import PriceAlertService, TradeService
+from core.ticks import tick_buffer
+from tests.factories.transaction_factory import TransactionFactory
+
+
+URL = '/api/dashboard/'
+
+
+def tick(price):
+    return tick_buffer.append(PriceAlertService.build_price_message({
+        'price_per_gram': Decimal(price), 'price_per_baht': Decimal(price) * Decimal('15.244'),
+    }))
+
+
+@pytest.fixture
+def client(api_client, user):
+    api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+    return api_client
+
+
+@pytest.mark.django_db
+class TestDashboardView:
+    """One response, a fixed query budget, cached until the next tick."""
+
+    def test_unauthorized(self, api_client):
+        assert api_client.get(URL).status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_payload(self, client, user, gold_holding):
+        for _ in range(7):
+            TransactionFactory(user=user)
+        PriceAlert.objects.create(user=user, target_price=Decimal('2600.00'), condition='ABOVE')
+        PriceAlert.objects.create(user=user, target_price=Decimal('2300.00'), condition='BELOW', is_active=False)
+        current = tick('2500.00')
+
+        response = client.get(URL)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['balance'] == float(user.balance)
+        assert response.data['holdings'] == {
+            'total_amount': 10.0, 'total_cost': 24000.0, 'current_value': 25000.0,
+            'profit_loss': 1000.0, 'profit_loss_percent': pytest.approx(4.1666, rel=1e-3),
+        }
+        assert response.data['price']['price_per_gram'] == 2500.0
+        assert response.data['price']['seq'] == current['seq']
+        assert len(response.data['recent_transactions']) == 5
+        assert response.data['active_alerts'] == 1
+
+    def test_query_budget(self, client, user, price_history, django_assert_num_queries):
+        TransactionFactory.create_batch(3, user=user)
+        client.get('/api/wallet/balance/')  # warm the profile cache
+
+        # User row with subqueries + transactions + PriceHistory fallback
+        with django_assert_num_queries(3):
+            client.get(URL)
+        with django_assert_num_queries(0):
+            response = client.get(URL)
+
+        assert response.data['price']['seq'] is None
+        tick('2510.00')
+        with django_assert_num_queries(2):
+            response = client.get(URL)
+        assert response.data['price']['price_per_gram'] == 2510.0
+
+    def test_trade_invalidates(self, client, user, django_capture_on_commit_callbacks):
+        user.balance = Decimal('10000.00')
+        user.save()
+        tick('2500.00')
+        assert client.get(URL).data['recent_transactions'] == []
+
+        with django_capture_on_commit_callbacks(execute=True):
+            TradeService.execute(user, 'BUY', Decimal('1.000'), Decimal('2500.00'))
+
+        response = client.get(URL)
+        assert response.data['balance'] == 7500.0
+        assert len(response.data['recent_transactions']) == 1
+
+    def test_alert_changes_invalidate(self, client, user):
+        tick('2500.00')
+        assert client.get(URL).data['active_alerts'] == 0
+
+        client.post('/api/alerts/', {'target_price': '2600.00', 'condition': 'ABOVE'}, format='json')
+
+        assert client.get(URL).data['active_alerts'] == 1
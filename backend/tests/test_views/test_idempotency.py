@@ -0,0 +1,126 @@
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from decimal import Decimal
+from core.models import Deposit, Transaction
+
+
+@pytest.mark.django_db
+class TestIdempotencyKeys:
+    def test_trade_retry_replays_response(self, authenticated_client, user, price_history):
+        user.balance = Decimal('10000.00')
+        user.save()
+        url = reverse('core:gold_trade')
+        data = {'type': 'BUY', 'amount': 1.0}
+
+        first = authenticated_client.post(url, data, HTTP_IDEMPOTENCY_KEY='trade-1')
+        retry = authenticated_client.post(url, data, HTTP_IDEMPOTENCY_KEY='trade-1')
+
+        assert first.status_code == status.HTTP_200_OK
+        assert retry.status_code == status.HTTP_200_OK
+        assert retry.data == first.data
+        assert retry['Idempotent-Replayed'] == 'true'
+        assert Transaction.objects.filter(user=user).count() == 1
+        user.refresh_from_db()
+        assert user.balance == Decimal('10000.00') - price_history.price_per_gram
+
+    def test_different_keys_execute_twice(self, authenticated_client, user, price_history):
+        user.balance = Decimal('10000.00')
+        user.save()
+        url = reverse('core:gold_trade')
+        data = {'type': 'BUY', 'amount': 1.0}
+
+        authenticated_client.post(url, data, HTTP_IDEMPOTENCY_KEY='trade-1')
+        authenticated_client.post(url, data, HTTP_IDEMPOTENCY_KEY='trade-2')
+
+        assert Transaction.objects.filter(user=user).count() == 2
+
+    def test_key_reused_with_different_body(self, authenticated_client, user, price_history):
+        user.balance = Decimal('10000.00')
+        user.save()
+        url = reverse('core:gold_trade')
+
+        authenticated_client.post(url, {'type': 'BUY', 'amount': 1.0}, HTTP_IDEMPOTENCY_KEY='trade-1')
+        response = authenticated_client.post(url, {'type': 'BUY', 'amount': 2.0}, HTTP_IDEMPOTENCY_KEY='trade-1')
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert Transaction.objects.filter(user=user).count() == 1
+
+    def test_mock_deposit_retry(self, authenticated_client, user):
+        url = reverse('core:deposit_complete')
+        data = {'amount': '500.00'}
+
+        first = authenticated_client.post(url, data, HTTP_IDEMPOTENCY_KEY='dep-1')
+        retry = authenticated_client.post(url, data, HTTP_IDEMPOTENCY_KEY='dep-1')
+
+        assert first.status_code == status.HTTP_201_CREATED
+        assert retry.status_code == status.HTTP_201_CREATED
+        assert retry.data['deposit']['id'] == first.data['deposit']['id']
+        assert Deposit.objects.filter(user=user).count() == 1
+        user.refresh_from_db()
+        assert user.balance == Decimal('500.00')
+
+    def test_deposit_create_retry(self, authenticated_client, user):
+        url = reverse('core:deposit_create')
+        data = {'amount': '1000.00'}
+
+        authenticated_client.post(url, data, HTTP_IDEMPOTENCY_KEY='create-1')
+        retry = authenticated_client.post(url, data, HTTP_IDEMPOTENCY_KEY='create-1')
+
+        assert retry.status_code == status.HTTP_201_CREATED
+        assert Deposit.objects.filter(user=user).count() == 1
+
+    def test_keys_are_scoped_per_user(self, api_client, user, verified_user):
+        url = reverse('core:deposit_complete')
+        data = {'amount': '500.00'}
+
+        api_client.force_authenticate(user=user)
+        api_client.post(url, data, HTTP_IDEMPOTENCY_KEY='shared')
+        api_client.force_authenticate(user=verified_user)
+        response = api_client.post(url, data, HTTP_IDEMPOTENCY_KEY='shared')
+
+        assert 'Idempotent-Replayed' not in response
+        assert Deposit.objects.filter(user=verified_user).count() == 1
+
+    def test_in_progress_key_conflicts(self, authenticated_client, user):
+        from django.core.cache import cache
+        from core.idempotency import _cache_key
+
+        request = type('Request', (), {'user': user})()
+        cache.add(f"{_cache_key(request, 'MockDepositProcessView', 'busy')}:lock", 'x')
+
+        response = authenticated_client.post(
+            reverse('core:deposit_complete'), {'amount': '500.00'}, HTTP_IDEMPOTENCY_KEY='busy'
+        )
+
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert not Deposit.objects.filter(user=user).exists()
+
+    def test_retry_that_read_before_first_finished_replays(self, authenticated_client, user, price_history):
+        from unittest import mock
+        from django.core.cache import cache
+
+        user.balance = Decimal('10000.00')
+        user.save()
+        url = reverse('core:gold_trade')
+        data = {'type': 'BUY', 'amount': 1.0}
+        first = authenticated_client.post(url, data, HTTP_IDEMPOTENCY_KEY='trade-race')
+
+        # The retry's first read happened while the first request was in
+        # flight; it takes the lock only after the first one released it.
+        real_get = cache.get
+        stale_reads = []
+
+        def get(key, *args, **kwargs):
+            if key.startswith('idempotency:') and not stale_reads:
+                stale_reads.append(key)
+                return None
+            return real_get(key, *args, **kwargs)
+
+        with mock.patch.object(cache, 'get', side_effect=get):
+            retry = authenticated_client.post(url, data, HTTP_IDEMPOTENCY_KEY='trade-race')
+
+        assert retry.status_code == status.HTTP_200_OK
+        assert retry.data == first.data
+        assert retry['Idempotent-Replayed'] == 'true'
+        assert Transaction.objects.filter(user=user).count() == 1
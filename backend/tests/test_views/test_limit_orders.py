@@ -0,0 +1,65 @@
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from decimal import Decimal
+from core.models import LimitOrder
+
+
+@pytest.mark.django_db
+class TestLimitOrderViews:
+    def test_place_order(self, authenticated_client, user):
+        user.balance = Decimal('10000.00')
+        user.save()
+
+        url = reverse('core:limit_order_list')
+        response = authenticated_client.post(url, {'side': 'BUY', 'amount': '1.5', 'limit_price': '2400.00'})
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['status'] == 'OPEN'
+        user.refresh_from_db()
+        assert user.balance == Decimal('6400.00')
+
+    def test_place_order_insufficient_balance(self, authenticated_client):
+        url = reverse('core:limit_order_list')
+        response = authenticated_client.post(url, {'side': 'BUY', 'amount': '1', 'limit_price': '2400.00'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'ยอดเงินไม่เพียงพอ' in response.data['error']
+
+    def test_place_order_invalid_amount(self, authenticated_client):
+        url = reverse('core:limit_order_list')
+        response = authenticated_client.post(url, {'side': 'BUY', 'amount': '0', 'limit_price': '2400.00'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'amount' in response.data
+
+    def test_list_orders_by_status(self, authenticated_client, user):
+        LimitOrder.objects.create(user=user, side='BUY', amount=Decimal('1'), limit_price=Decimal('2400'))
+        LimitOrder.objects.create(user=user, side='BUY', amount=Decimal('1'), limit_price=Decimal('2400'), status='FILLED')
+
+        url = reverse('core:limit_order_list')
+        response = authenticated_client.get(url, {'status': 'open'})
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.data['results'] if 'results' in response.data else response.data
+        assert len(data) == 1
+
+    def test_cancel_order(self, authenticated_client, user, gold_holding):
+        url = reverse('core:limit_order_list')
+        placed = authenticated_client.post(url, {'side': 'SELL', 'amount': '2', 'limit_price': '2600.00'})
+
+        response = authenticated_client.post(reverse('core:limit_order_cancel', args=[placed.data['id']]))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['status'] == 'CANCELLED'
+        gold_holding.refresh_from_db()
+        assert gold_holding.amount == Decimal('10.000')
+
+    def test_cannot_cancel_other_users_order(self, authenticated_client, verified_user):
+        order = LimitOrder.objects.create(user=verified_user, side='BUY', amount=Decimal('1'), limit_price=Decimal('2400'))
+
+        response = authenticated_client.post(reverse('core:limit_order_cancel', args=[order.id]))
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        order.refresh_from_db()
+        assert order.status == 'OPEN'
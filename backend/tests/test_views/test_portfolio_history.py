@@ -0,0 +1,102 @@
+"""
+Tests for the portfolio history endpoint.
+"""
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+from django.utils import timezone
+from rest_framework import status
+
+from core import portfolio
+from core.models import PriceHistory
+from core.services import PortfolioHistoryService, UserUpdateService
+from tests.factories.transaction_factory import TransactionFactory
+
+
+URL = '/api/portfolio/history/'
+
+
+@pytest.fixture
+def history(user):
+    now = timezone.now()
+    for hours_ago, price in ((30, '2400.00'), (10, '2500.00'), (2, '2600.00')):
+        PriceHistory.objects.create(
+            price_per_gram=Decimal(price), price_per_baht=Decimal(price) * 15, timestamp=now - timedelta(hours=hours_ago)
+        )
+    TransactionFactory(
+        user=user, transaction_type='BUY', gold_weight=Decimal('2.000'), gold_price_per_gram=Decimal('2500.00'),
+        total_amount=Decimal('5000.00'), status='COMPLETED', transaction_date=now - timedelta(hours=9),
+    )
+    TransactionFactory(
+        user=user, transaction_type='SELL', gold_weight=Decimal('0.500'), gold_price_per_gram=Decimal('2600.00'),
+        total_amount=Decimal('1300.00'), status='COMPLETED', transaction_date=now - timedelta(hours=1),
+    )
+
+
+@pytest.mark.django_db
+class TestPortfolioHistoryView:
+    def test_unauthorized(self, api_client):
+        assert api_client.get(URL).status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_day_curve(self, authenticated_client, history):
+        response = authenticated_client.get(URL, {'range': '1d'})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['range'] == '1d'
+        assert response.data['resolution_seconds'] == 15 * 60
+        points = response.data['points']
+        assert len(points) == 97
+        # The price from before the range carries into its first point
+        assert points[0]['price_per_gram'] == 2400.0
+        assert points[0]['value'] == 0.0
+        assert points[-1]['gold_grams'] == 1.5
+        assert points[-1]['invested'] == 3700.0
+        assert points[-1]['value'] == 3900.0
+
+    def test_fixed_query_count_and_cache(self, authenticated_client, history, django_assert_num_queries):
+        # Trades + prices, whatever the number of points
+        with django_assert_num_queries(2):
+            authenticated_client.get(URL, {'range': '1y'})
+        with django_assert_num_queries(0):
+            authenticated_client.get(URL, {'range': '1y'})
+
+    def test_holdings_change_invalidates(self, authenticated_client, user, history, django_assert_num_queries):
+        authenticated_client.get(URL)
+
+        UserUpdateService.send_holdings_changed(user.pk)
+
+        with django_assert_num_queries(2):
+            authenticated_client.get(URL)
+
+    def test_rejects_unknown_range(self, authenticated_client):
+        response = authenticated_client.get(URL, {'range': '5y'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'error' in response.data
+
+    def test_cached_until_next_point(self, user, history, django_assert_num_queries):
+        now = timezone.now()
+        first = PortfolioHistoryService.get(user.pk, '1w', now=now)
+
+        with django_assert_num_queries(0):
+            assert PortfolioHistoryService.get(user.pk, '1w', now=now) == first
+        later = PortfolioHistoryService.get(user.pk, '1w', now=now + timedelta(hours=1))
+        assert later['points'][-1]['timestamp'] != first['points'][-1]['timestamp']
+
+    def test_fetches_at_most_one_price_per_point(self, user, history):
+        now = timezone.now()
+        PriceHistory.objects.bulk_create(
+            PriceHistory(price_per_gram=Decimal(2500 + i), price_per_baht=Decimal('38110.00'),
+                         timestamp=now - timedelta(minutes=i))
+            for i in range(1, 600)
+        )
+        span, step = timedelta(hours=6), timedelta(hours=1)
+
+        with mock.patch.object(portfolio, 'value_curve', wraps=portfolio.value_curve) as value_curve:
+            data = PortfolioHistoryService.build(user.pk, span, step, now)
+
+        grid, price_times = value_curve.call_args.args[0], value_curve.call_args.args[4]
+        assert len(price_times) <= len(grid) == 7
+        # Each point still gets the last price at or before it
+        assert [point['price_per_gram'] for point in data['points']] == [2860.0, 2800.0, 2740.0, 2680.0, 2620.0, 2560.0, 2501.0]
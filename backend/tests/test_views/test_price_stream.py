@@ -0,0 +1,125 @@
+"""
+Unit tests for the Server-Sent Events price stream.
+"""
+import asyncio
+import json
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.test import AsyncClient
+from django.utils import timezone
+
+from core import views
+from core.fanout import envelope
+from core.models import PriceHistory
+from core.ticks import tick_buffer
+from core.views import format_sse
+
+
+def parse_event(chunk):
+    if isinstance(chunk, bytes):
+        chunk = chunk.decode()
+    fields = dict(line.split(': ', 1) for line in chunk.strip().split('\n'))
+    return fields.get('id'), json.loads(fields['data'])
+
+
+def test_format_sse():
+    assert format_sse({'a': 1}, event_id='7') == 'id: 7\ndata: {"a": 1}\n\n'
+    assert format_sse({'a': 1}) == 'data: {"a": 1}\n\n'
+
+
+@pytest.mark.django_db
+class TestPriceStreamView:
+    """Test cases for /api/gold/prices/stream/."""
+
+    url = '/api/gold/prices/stream/'
+
+    def test_streams_live_ticks(self):
+        async def scenario():
+            response = await AsyncClient().get(self.url)
+            assert response.status_code == 200
+            assert response['Content-Type'] == 'text/event-stream'
+            stream = aiter(response.streaming_content)
+            assert (await anext(stream)).startswith(b'retry:')
+
+            pending = asyncio.ensure_future(anext(stream))
+            await asyncio.sleep(0.05)  # let the stream subscribe
+            timestamp = timezone.now().isoformat()
+            await get_channel_layer().group_send('gold_price_updates', envelope('gold_price_updates', {
+                'type': 'gold_price_update',
+                'data': {'price_per_gram': 2500.0, 'timestamp': timestamp},
+            }))
+            event_id, data = parse_event(await asyncio.wait_for(pending, 2))
+            assert event_id == timestamp
+            assert data['price_per_gram'] == 2500.0
+            await stream.aclose()
+
+        async_to_sync(scenario)()
+
+    def test_resume_replays_missed_ticks(self):
+        now = timezone.now()
+        for minutes, price in ((3, '2500.00'), (2, '2510.00'), (1, '2520.00')):
+            PriceHistory.objects.create(
+                price_per_gram=Decimal(price),
+                price_per_baht=Decimal(price) * Decimal('15.244'),
+                timestamp=now - timedelta(minutes=minutes),
+            )
+        last_seen = (now - timedelta(minutes=3)).isoformat()
+
+        async def scenario():
+            response = await AsyncClient().get(self.url, headers={'Last-Event-ID': last_seen})
+            stream = aiter(response.streaming_content)
+            await anext(stream)
+            replayed = [parse_event(await anext(stream))[1] for _ in range(2)]
+            assert [tick['price_per_gram'] for tick in replayed] == [2510.0, 2520.0]
+            await stream.aclose()
+
+        async_to_sync(scenario)()
+
+    def test_resume_by_sequence_from_tick_buffer(self):
+        for price in (2500.0, 2510.0, 2520.0):
+            tick_buffer.append({'price_per_gram': price})
+
+        async def scenario():
+            response = await AsyncClient().get(self.url, headers={'Last-Event-ID': '1'})
+            stream = aiter(response.streaming_content)
+            await anext(stream)
+            replayed = [parse_event(await anext(stream)) for _ in range(2)]
+            assert [event_id for event_id, _ in replayed] == ['2', '3']
+            assert [tick['price_per_gram'] for _, tick in replayed] == [2510.0, 2520.0]
+            await stream.aclose()
+
+        async_to_sync(scenario)()
+
+    def test_ticks_broadcast_during_replay_are_not_lost(self):
+        for price in (2500.0, 2510.0, 2520.0):
+            tick_buffer.append({'price_per_gram': price})
+        replay_ticks = views._replay_ticks
+
+        async def replay_then_broadcast(last_event_id):
+            replayed = await replay_ticks(last_event_id)
+            # Tick 3 is delivered live as well, and tick 4 arrives before
+            # the replay is written out
+            live = [replayed[-1], tick_buffer.append({'price_per_gram': 2530.0})]
+            for tick in live:
+                await get_channel_layer().group_send('gold_price_updates', envelope('gold_price_updates', {
+                    'type': 'gold_price_update', 'data': tick,
+                }))
+            return replayed
+
+        async def scenario():
+            with mock.patch.object(views, '_replay_ticks', replay_then_broadcast):
+                response = await AsyncClient().get(self.url, headers={'Last-Event-ID': '1'})
+                stream = aiter(response.streaming_content)
+                await anext(stream)
+                received = [parse_event(await asyncio.wait_for(anext(stream), 2))[0] for _ in range(3)]
+                assert received == ['2', '3', '4']
+                await stream.aclose()
+
+        async_to_sync(scenario)()
+
+    def test_post_not_allowed(self, client):
+        assert client.post(self.url).status_code == 405
@@ -0,0 +1,67 @@
+"""
+Query-count regression tests for list endpoints.
+
+Each endpoint is checked with several rows so a per-row lookup (N+1) shows
+up as a changed count.
+"""
+import pytest
+from decimal import Decimal
+
+from core.models import PriceAlert
+from tests.factories.deposit_factory import DepositFactory
+from tests.factories.gold_price_factory import PriceHistoryFactory
+from tests.factories.transaction_factory import TransactionFactory
+from tests.factories.wallet_factory import GoldHoldingFactory
+
+
+ROWS = 5
+
+
+def fresh_client(api_client, user):
+    # A user instance with no cached relations, as authentication would load it
+    user.refresh_from_db()
+    api_client.force_authenticate(user=user)
+    return api_client
+
+
+@pytest.mark.django_db
+class TestListQueryCounts:
+    def test_transactions(self, api_client, user, django_assert_num_queries):
+        TransactionFactory.create_batch(ROWS, user=user)
+        client = fresh_client(api_client, user)
+
+        # COUNT + page
+        with django_assert_num_queries(2):
+            response = client.get('/api/gold/transactions/')
+
+        assert response.data['results'][0]['user_email'] == user.email
+
+    def test_deposits(self, api_client, user, django_assert_num_queries):
+        DepositFactory.create_batch(ROWS, user=user)
+        client = fresh_client(api_client, user)
+
+        with django_assert_num_queries(2):
+            response = client.get('/api/wallet/deposits/')
+
+        assert response.data['results'][0]['user_email'] == user.email
+
+    def test_gold_holdings(self, api_client, user, django_assert_num_queries):
+        GoldHoldingFactory.create_batch(ROWS, user=user)
+        PriceHistoryFactory()
+        client = fresh_client(api_client, user)
+
+        # COUNT + page + latest price once
+        with django_assert_num_queries(3):
+            response = client.get('/api/gold/holdings/')
+
+        assert len(response.data['results']) == ROWS
+
+    def test_price_alerts(self, api_client, user, django_assert_num_queries):
+        for i in range(ROWS):
+            PriceAlert.objects.create(user=user, target_price=Decimal('2500') + i, condition='ABOVE')
+        client = fresh_client(api_client, user)
+
+        with django_assert_num_queries(2):
+            response = client.get('/api/alerts/')
+
+        assert response.data['results'][0]['user_id'] == user.pk
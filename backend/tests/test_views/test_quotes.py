@@ -0,0 +1,80 @@
+import pytest
+from datetime import timedelta
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from decimal import Decimal
+from core.models import Transaction
+from core.ticks import tick_buffer
+
+
+@pytest.mark.django_db
+class TestQuoteViews:
+    def test_quote_uses_latest_tick(self, authenticated_client):
+        tick_buffer.append({'type': 'gold_price_update', 'price_per_gram': 2555.5})
+
+        response = authenticated_client.post(reverse('core:gold_trade_quote'), {'type': 'BUY', 'amount': '2'})
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['gold_price_per_gram'] == 2555.5
+        assert response.data['total_amount'] == 5111.0
+        assert response.data['quote_id']
+
+    def test_quote_falls_back_to_price_history(self, authenticated_client, price_history):
+        response = authenticated_client.post(reverse('core:gold_trade_quote'), {'type': 'SELL', 'amount': '1'})
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert Decimal(str(response.data['gold_price_per_gram'])) == price_history.price_per_gram
+
+    def test_quote_without_price(self, authenticated_client):
+        response = authenticated_client.post(reverse('core:gold_trade_quote'), {'type': 'BUY', 'amount': '1'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_trade_executes_at_quoted_price(self, authenticated_client, user, price_history):
+        user.balance = Decimal('10000.00')
+        user.save()
+        tick_buffer.append({'type': 'gold_price_update', 'price_per_gram': 2000.0})
+        quote = authenticated_client.post(reverse('core:gold_trade_quote'), {'type': 'BUY', 'amount': '2'}).data
+        tick_buffer.append({'type': 'gold_price_update', 'price_per_gram': 2600.0})
+
+        response = authenticated_client.post(reverse('core:gold_trade'), {'quote_id': quote['quote_id']})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['transaction']['gold_price_per_gram'] == 2000.0
+        user.refresh_from_db()
+        assert user.balance == Decimal('6000.00')
+
+    def test_quote_is_single_use(self, authenticated_client, user, price_history):
+        user.balance = Decimal('100000.00')
+        user.save()
+        quote = authenticated_client.post(reverse('core:gold_trade_quote'), {'type': 'BUY', 'amount': '1'}).data
+
+        authenticated_client.post(reverse('core:gold_trade'), {'quote_id': quote['quote_id']})
+        response = authenticated_client.post(reverse('core:gold_trade'), {'quote_id': quote['quote_id']})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert Transaction.objects.filter(user=user).count() == 1
+
+    def test_expired_quote_is_rejected(self, authenticated_client, user, price_history):
+        quote = authenticated_client.post(reverse('core:gold_trade_quote'), {'type': 'BUY', 'amount': '1'}).data
+        key = f"quote:{quote['quote_id']}"
+        stored = cache.get(key)
+        stored['expires_at'] = timezone.now() - timedelta(seconds=1)
+        cache.set(key, stored)
+
+        response = authenticated_client.post(reverse('core:gold_trade'), {'quote_id': quote['quote_id']})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not Transaction.objects.filter(user=user).exists()
+
+    def test_quote_belongs_to_its_user(self, api_client, user, verified_user, price_history):
+        api_client.force_authenticate(user=user)
+        quote = api_client.post(reverse('core:gold_trade_quote'), {'type': 'BUY', 'amount': '1'}).data
+
+        api_client.force_authenticate(user=verified_user)
+        response = api_client.post(reverse('core:gold_trade'), {'quote_id': quote['quote_id']})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not Transaction.objects.exists()
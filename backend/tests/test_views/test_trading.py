@@ -2,7 +2,10 @@ import pytest
 from django.urls import reverse
 from rest_framework import status
 from decimal import Decimal
+from unittest import mock
 from core.models import Transaction, GoldHolding
+from core.services import HoldingsTotalsCacheService, UserUpdateService
+from core.ticks import tick_buffer
 
 @pytest.mark.django_db
 class TestTradingViews:
@@ -65,3 +68,121 @@ class TestTradingViews:
         
         gold_holding.refresh_from_db()
         assert gold_holding.amount == Decimal('5.000') # 10 - 5
+
+
+@pytest.mark.django_db
+class TestRecurringBuyPlanViews:
+    def test_create_plan(self, authenticated_client, user):
+        url = reverse('core:recurring_buy_list')
+        response = authenticated_client.post(url, {'amount': '1000.00', 'frequency': 'WEEKLY'}, format='json')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['is_active'] is True
+        assert user.recurring_buy_plans.count() == 1
+
+    def test_create_plan_rejects_non_positive_amount(self, authenticated_client):
+        url = reverse('core:recurring_buy_list')
+        response = authenticated_client.post(url, {'amount': '0', 'frequency': 'DAILY'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_pause_plan(self, authenticated_client, user):
+        plan = user.recurring_buy_plans.create(amount=Decimal('500.00'), frequency='DAILY')
+
+        url = reverse('core:recurring_buy_detail', args=[plan.id])
+        response = authenticated_client.patch(url, {'is_active': False})
+
+        assert response.status_code == status.HTTP_200_OK
+        plan.refresh_from_db()
+        assert plan.is_active is False
+
+    def test_cannot_see_other_users_plan(self, authenticated_client, verified_user):
+        plan = verified_user.recurring_buy_plans.create(amount=Decimal('500.00'), frequency='DAILY')
+
+        response = authenticated_client.get(reverse('core:recurring_buy_detail', args=[plan.id]))
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+class TestTradingStatsView:
+    def test_stats_follow_trades(self, authenticated_verified_client, price_history):
+        client = authenticated_verified_client
+        trade_url = reverse('core:gold_trade')
+        client.post(trade_url, {'type': 'BUY', 'amount': 2}, format='json')
+        client.post(trade_url, {'type': 'SELL', 'amount': 1}, format='json')
+
+        response = client.get(reverse('core:gold_trading_stats'))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['trade_count'] == 2
+        assert Decimal(response.data['total_bought']) == Decimal('2')
+        assert Decimal(response.data['realized_pnl']) == Decimal('0')
+
+    def test_stats_before_first_trade(self, authenticated_client):
+        response = authenticated_client.get(reverse('core:gold_trading_stats'))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['trade_count'] == 0
+        assert response.data['last_trade_at'] is None
+
+    def test_stats_include_unrealized_pnl(self, authenticated_verified_client, price_history):
+        client = authenticated_verified_client
+        client.post(reverse('core:gold_trade'), {'type': 'BUY', 'amount': 2}, format='json')
+
+        response = client.get(reverse('core:gold_trading_stats'))
+
+        assert response.data['cost_method'] == 'FIFO'
+        assert Decimal(response.data['open_grams']) == Decimal('2')
+        assert Decimal(response.data['unrealized_pnl']) == Decimal('0')
+
+
+@pytest.mark.django_db
+class TestGoldHoldingsSummaryView:
+    def test_summary_at_latest_price(self, authenticated_client, gold_holding, price_history):
+        response = authenticated_client.get(reverse('core:gold_summary'))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['total_amount'] == 10.0
+        assert response.data['current_value'] == 25000.0
+        assert response.data['profit_loss'] == 1000.0
+
+    def test_totals_cached_and_priced_on_read(self, authenticated_client, gold_holding, django_assert_num_queries):
+        url = reverse('core:gold_summary')
+        tick_buffer.append({'price_per_gram': 2500.0})
+        authenticated_client.get(url)
+
+        tick_buffer.append({'price_per_gram': 2600.0})
+        with django_assert_num_queries(0):
+            response = authenticated_client.get(url)
+
+        assert response.data['current_value'] == 26000.0
+
+    def test_holdings_change_invalidates(self, authenticated_client, gold_holding, price_history):
+        url = reverse('core:gold_summary')
+        authenticated_client.get(url)
+
+        authenticated_client.patch(
+            reverse('core:gold_holding_detail', args=[gold_holding.pk]), {'amount': '12.000'}, format='json'
+        )
+
+        assert authenticated_client.get(url).data['total_amount'] == 12.0
+
+    def test_miss_loaded_before_change_does_not_overwrite(self, authenticated_client, user, gold_holding,
+                                                          price_history):
+        load = HoldingsTotalsCacheService._load
+        interleaved = []
+
+        def load_then_change(user_id):
+            totals = load(user_id)
+            if not interleaved:
+                # The holdings change commits while this miss is being filled
+                interleaved.append(True)
+                GoldHolding.objects.filter(pk=gold_holding.pk).update(amount=Decimal('12.000'))
+                UserUpdateService.send_holdings_changed(user_id)
+            return totals
+
+        with mock.patch.object(HoldingsTotalsCacheService, '_load', side_effect=load_then_change):
+            HoldingsTotalsCacheService.get_with_tick(user.pk)
+
+        assert authenticated_client.get(reverse('core:gold_summary')).data['total_amount'] == 12.0
@@ -1,8 +1,11 @@
 """
 Unit tests for Transaction and Trading views.
 """
+import json
 import pytest
+from datetime import datetime, timezone as dt_timezone
 from decimal import Decimal
+from asgiref.sync import async_to_sync
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
@@ -48,6 +51,15 @@ class TestTransactionListView:
         assert response.status_code == status.HTTP_200_OK
         assert len(response.data['results']) == 0  # No transactions for authenticated user
 
+    def test_transactions_newest_first_with_stable_ties(self, authenticated_client, user):
+        """Transactions sharing a timestamp are ordered by id, newest first."""
+        first = TransactionFactory(user=user)
+        second = TransactionFactory(user=user, transaction_date=first.transaction_date)
+
+        response = authenticated_client.get('/api/gold/transactions/')
+
+        assert [t['id'] for t in response.data['results']] == [second.id, first.id]
+
 
 @pytest.mark.django_db
 class TestTradeAPIView:
@@ -182,3 +194,66 @@ class TestTradeAPIView:
         
         assert response.status_code == status.HTTP_400_BAD_REQUEST
         assert 'error' in response.data
+
+
+def stream_chunks(response):
+    """Consume an async streaming response from synchronous test code."""
+    async def collect():
+        return [chunk async for chunk in response.streaming_content]
+    return async_to_sync(collect)()
+
+
+@pytest.mark.django_db
+class TestTransactionExportView:
+    """Test cases for the streaming transaction export."""
+
+    url = '/api/gold/transactions/export/'
+
+    @pytest.fixture
+    def history(self, user):
+        return [
+            TransactionFactory(user=user, transaction_date=datetime(2026, month, 15, 9, 30, tzinfo=dt_timezone.utc))
+            for month in (1, 2, 3)
+        ]
+
+    def test_export_unauthorized(self, api_client):
+        response = api_client.get(self.url)
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_export_csv(self, authenticated_client, history):
+        TransactionFactory(user=UserFactory(email='other@example.com'))
+
+        response = authenticated_client.get(self.url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == 'text/csv'
+        assert 'transactions.csv' in response['Content-Disposition']
+        lines = b''.join(stream_chunks(response)).decode().splitlines()
+        assert lines[0] == 'id,transaction_type,gold_weight,gold_price_per_gram,total_amount,status,transaction_date'
+        assert [int(line.split(',')[0]) for line in lines[1:]] == [t.id for t in history]
+        assert lines[1].endswith('2026-01-15T09:30:00+00:00')
+
+    def test_export_ndjson_with_date_range(self, authenticated_client, history):
+        response = authenticated_client.get(self.url, {
+            'output': 'ndjson', 'date_from': '2026-02-01', 'date_to': '2026-02-15',
+        })
+
+        assert response['Content-Type'] == 'application/x-ndjson'
+        records = [json.loads(line) for line in b''.join(stream_chunks(response)).splitlines()]
+        assert [r['id'] for r in records] == [history[1].id]
+        assert Decimal(records[0]['total_amount']) == history[1].total_amount
+
+    def test_export_streams_asynchronously_in_chunks(self, authenticated_client, history, monkeypatch):
+        monkeypatch.setattr('core.views.EXPORT_CHUNK_SIZE', 1)
+
+        response = authenticated_client.get(self.url)
+
+        assert response.is_async
+        chunks = stream_chunks(response)
+        # Header, then one chunk per batch of rows
+        assert len(chunks) == 1 + len(history)
+
+    def test_export_rejects_bad_params(self, authenticated_client):
+        assert authenticated_client.get(self.url, {'output': 'xml'}).status_code == status.HTTP_400_BAD_REQUEST
+        assert authenticated_client.get(self.url, {'date_from': 'soon'}).status_code == status.HTTP_400_BAD_REQUEST